@@ -0,0 +1,103 @@
+"""
+Benchmark: latency of logging calls on a busy event loop, written synchronously
+by the rotating file handlers (LOG_ASYNC=false) or queued to the listener thread.
+
+Concurrent tasks log request/response-sized messages (one per millisecond each)
+while a probe task measures how late the event loop wakes it up. Files rotate
+during the run (LOG_MAX_SIZE=1).
+
+Usage:
+  PYTHONPATH=. python scripts/resource/benchmark_logging.py [--tasks 50] [--records 200] [--payload 2000] [--dir DIR]
+
+Run from the repository root. Log files are written to a temporary directory in
+--dir (default: the system temp directory); point it at the disk the services log to.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from services.common.logging_config import get_logger, setup_logging, shutdown_logging
+
+
+def percentile(values: list, ratio: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+async def run_load(tasks: int, records: int, payload: str) -> tuple:
+    logger = get_logger("services.api_service.benchmark")
+    latencies = []
+    lags = []
+    done = asyncio.Event()
+
+    async def worker(worker_id: int):
+        for i in range(records):
+            started = time.perf_counter()
+            logger.info(f"Tool call response - Worker: {worker_id}, Call: {i}, Body: {payload}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.001)
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - started - 0.001) * 1000)
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(tasks)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+    return sorted(latencies), sorted(lags), elapsed
+
+
+def run_mode(mode: str, args) -> None:
+    os.environ.update(
+        LOG_ASYNC="true" if mode == "queue" else "false",
+        LOG_LEVEL="INFO",
+        LOG_MAX_SIZE="1",
+        LOG_MAX_MESSAGE_CHARS="0",
+    )
+    setup_logging(f"benchmark_{mode}")
+    latencies, lags, elapsed = asyncio.run(run_load(args.tasks, args.records, "x" * args.payload))
+    shutdown_started = time.perf_counter()
+    shutdown_logging()
+    drain_ms = (time.perf_counter() - shutdown_started) * 1000
+
+    print(
+        f"{mode:>5}: {len(latencies)} records in {elapsed * 1000:.0f} ms | "
+        f"call mean {statistics.mean(latencies):.3f} ms, p50 {percentile(latencies, 0.5):.3f} ms, "
+        f"p99 {percentile(latencies, 0.99):.3f} ms, max {latencies[-1]:.2f} ms | "
+        f"loop lag p99 {percentile(lags, 0.99):.2f} ms, max {lags[-1]:.2f} ms | drain {drain_ms:.0f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Logging pipeline benchmark")
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--payload", type=int, default=2000, help="Characters of the logged body")
+    parser.add_argument("--dir", default=None, help="Directory for the temporary log files")
+    args = parser.parse_args()
+
+    repo_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp_dir, open(os.devnull, "w") as devnull:
+        os.chdir(tmp_dir)
+        # Console output goes to stderr: discard it, keep the file handlers
+        stderr, sys.stderr = sys.stderr, devnull
+        try:
+            print(f"tasks: {args.tasks}, records per task: {args.records}, payload: {args.payload} chars")
+            for mode in ("sync", "queue"):
+                run_mode(mode, args)
+        finally:
+            sys.stderr = stderr
+            os.chdir(repo_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: build and query the tool search index of a large synthetic service.
+
+Usage:
+  PYTHONPATH=. python scripts/resource/benchmark_tool_search.py [--tools 5000] [--queries 1000] [--limit 10]
+
+Run from the repository root. No database or Redis needed.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import mcp.types as types
+
+from services.api_service.utils.tool_search import ToolSearchIndex
+
+VERBS = ["get", "list", "create", "update", "delete", "search", "export", "import", "sync", "validate"]
+NOUNS = [
+    "customer", "invoice", "order", "payment", "refund", "shipment", "product", "coupon", "subscription",
+    "ticket", "user", "team", "project", "report", "webhook", "document", "contract", "lead", "campaign", "warehouse",
+]
+QUALIFIERS = ["", "by id", "in bulk", "for account", "with history", "by date range", "summary", "status", "details"]
+PARAMS = ["id", "name", "email", "start_date", "end_date", "page", "page_size", "status", "currency", "amount", "region"]
+
+
+def synthetic_tools(count: int, rng: random.Random) -> list:
+    tools = []
+    for i in range(count):
+        verb, noun, qualifier = rng.choice(VERBS), rng.choice(NOUNS), rng.choice(QUALIFIERS)
+        name = f"{verb}_{noun}_{i}"
+        description = f"{verb.capitalize()} a {noun} {qualifier}. Returns the {noun} record of the {rng.choice(NOUNS)} module."
+        params = {param: {"type": "string"} for param in rng.sample(PARAMS, rng.randint(1, 5))}
+        tools.append(types.Tool(name=name, description=description, inputSchema={"type": "object", "properties": params}))
+    return tools
+
+
+def synthetic_queries(count: int, rng: random.Random) -> list:
+    return [
+        f"{rng.choice(VERBS)} the {rng.choice(NOUNS)} {rng.choice(QUALIFIERS)} using {rng.choice(PARAMS)}".strip()
+        for _ in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tool search index benchmark")
+    parser.add_argument("--tools", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tools = synthetic_tools(args.tools, rng)
+    queries = synthetic_queries(args.queries, rng)
+
+    started = time.perf_counter()
+    index = ToolSearchIndex(tools)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, args.limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    print(f"tools: {args.tools}, queries: {args.queries}, limit: {args.limit}")
+    print(f"index build: {build_ms:.1f} ms")
+    print(
+        f"query latency: mean {statistics.mean(latencies):.3f} ms, "
+        f"p50 {latencies[len(latencies) // 2]:.3f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1]:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+ALTER TABLE `mcp_tool_api` ADD COLUMN `timeout_ms` int NULL DEFAULT NULL COMMENT 'Upstream call timeout in milliseconds, NULL for default' AFTER `operation_examples`;
+ALTER TABLE `mcp_tool_api` ADD COLUMN `hedge_enabled` tinyint NOT NULL DEFAULT 0 COMMENT 'Hedge slow GET calls: 0 (disabled), 1 (enabled)' AFTER `timeout_ms`;
+
+ALTER TABLE `mcp_service` ADD COLUMN `auth_config` text NULL COMMENT 'Upstream auth configuration (encrypted JSON), e.g. OAuth2 client credentials' AFTER `headers`;
+ALTER TABLE `mcp_service` ADD COLUMN `mock_enabled` tinyint NOT NULL DEFAULT 0 COMMENT 'Serve response examples instead of calling the upstream: 0 (disabled), 1 (enabled)' AFTER `service_type`;
+ALTER TABLE `mcp_service` ADD COLUMN `mock_billing_enabled` tinyint NOT NULL DEFAULT 0 COMMENT 'Charge calls served in mock mode at the service price: 0 (free), 1 (charged)' AFTER `mock_enabled`;
+ALTER TABLE `mcp_service` ADD COLUMN `isolation_pool` varchar(64) NULL DEFAULT NULL COMMENT 'Bulkhead isolation pool, NULL for the default pool' AFTER `service_type`;
+
+
+INSERT INTO `sys_config` (`id`,`key`, `value`,`description`,`created_at`,`updated_at`)
+VALUES ('xpack-version','version', '1.4.0', 'Add per-tool upstream timeout and hedging settings, upstream OAuth2 auth, mock upstream mode, service isolation pools', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    ON DUPLICATE KEY UPDATE `value` = VALUES(`value`), `description` = VALUES(`description`), `updated_at` = CURRENT_TIMESTAMP;
@@ -34,11 +34,18 @@ fi
 # 初始化数据库
 python ./init_db.py
 
-nohup uvicorn services.admin_service.main:app --host 0.0.0.0 --port 8001 --timeout-graceful-shutdown 2 --timeout-keep-alive 1 > ${LOG_DIR}/admin_service.log 2>&1 &
+# Prometheus multiprocess metrics (multi-worker uvicorn): one empty directory per service
+METRICS_DIR=${PROMETHEUS_MULTIPROC_DIR}
+if [ -n "${METRICS_DIR}" ]; then
+    rm -rf ${METRICS_DIR}/admin_service ${METRICS_DIR}/api_service
+    mkdir -p ${METRICS_DIR}/admin_service ${METRICS_DIR}/api_service
+fi
+
+PROMETHEUS_MULTIPROC_DIR=${METRICS_DIR:+${METRICS_DIR}/admin_service} nohup uvicorn services.admin_service.main:app --host 0.0.0.0 --port 8001 --timeout-graceful-shutdown 2 --timeout-keep-alive 1 > ${LOG_DIR}/admin_service.log 2>&1 &
 
 sleep 5s
 
-nohup uvicorn services.api_service.main:app --host 0.0.0.0 --port 8002 --timeout-graceful-shutdown 2 --timeout-keep-alive 1 > ${LOG_DIR}/api_service.log 2>&1 &
+PROMETHEUS_MULTIPROC_DIR=${METRICS_DIR:+${METRICS_DIR}/api_service} nohup uvicorn services.api_service.main:app --host 0.0.0.0 --port 8002 --timeout-graceful-shutdown 2 --timeout-keep-alive 1 > ${LOG_DIR}/api_service.log 2>&1 &
 HOSTNAME=""
 cd frontend/ && nohup node server.js> ${LOG_DIR}//frontend.log 2>&1 &
 
@@ -4,6 +4,7 @@ RabbitMQ billing message consumer
 
 import json
 import pika
+from opentelemetry.trace import SpanKind
 import threading
 import time
 import logging
@@ -11,6 +12,8 @@ from typing import Callable
 import os
 from services.common.config import Config
 from services.common.database import get_db
+from services.common.metrics import BILLING_MESSAGE_LAG_SECONDS, BILLING_MESSAGE_SECONDS, BILLING_MESSAGES
+from services.common.tracing import current_trace_id, extract_context, tracer
 from services.admin_service.services.billing_message_handler import BillingMessageHandler
 
 logger = logging.getLogger(__name__)
@@ -124,30 +127,42 @@ class BillingMessageConsumer:
             body: Message body
         """
         message_data = None
+        started = time.perf_counter()
+        status = "error"
+        published_at = (properties.headers or {}).get("x-published-at") if properties else None
+        if published_at:
+            BILLING_MESSAGE_LAG_SECONDS.observe(max(0.0, time.time() - float(published_at)))
         try:
             # Parse message
             message_data = json.loads(body)
             logger.info(f"Received billing message: user_id={message_data.get('user_id')}, tool={message_data.get('tool_name')}")
 
-            # Get DB session and process message
+            # Get DB session and process message, continuing the trace of the tool call
             db = next(get_db())
             try:
-                handler = BillingMessageHandler(db)
-                success = handler.process_billing_message(message_data)
-
-                if success:
-                    # Ack if processed successfully
-                    channel.basic_ack(delivery_tag=method.delivery_tag)
-                    logger.info(f"Message processed and acknowledged: {message_data.get('user_id')}")
-                else:
-                    # If failed, ack and drop (avoid infinite retry)
-                    channel.basic_ack(delivery_tag=method.delivery_tag)
-                    logger.error(f"Message processing failed, message dropped: {message_data.get('user_id')}")
+                with tracer.start_as_current_span(
+                    "billing.consume", context=extract_context(properties.headers if properties else None),
+                    kind=SpanKind.CONSUMER,
+                    attributes={"messaging.destination.name": self.queue_name, "mcp.tool": str(message_data.get("tool_name"))},
+                ):
+                    handler = BillingMessageHandler(db)
+                    success = handler.process_billing_message(message_data)
+
+                    status = "processed" if success else "failed"
+                    if success:
+                        # Ack if processed successfully
+                        channel.basic_ack(delivery_tag=method.delivery_tag)
+                        logger.info(f"Message processed and acknowledged: {message_data.get('user_id')}, trace_id={current_trace_id()}")
+                    else:
+                        # If failed, ack and drop (avoid infinite retry)
+                        channel.basic_ack(delivery_tag=method.delivery_tag)
+                        logger.error(f"Message processing failed, message dropped: {message_data.get('user_id')}, trace_id={current_trace_id()}")
 
             finally:
                 db.close()
 
         except json.JSONDecodeError as e:
+            status = "invalid"
             logger.error(f"Message format error: {str(e)}, body: {body}")
             # Format error, ack directly (do not requeue)
             channel.basic_ack(delivery_tag=method.delivery_tag)
@@ -162,6 +177,10 @@ class BillingMessageConsumer:
                 # If even ack fails, log error but do not raise
                 logger.error("Unable to acknowledge message", exc_info=True)
 
+        finally:
+            BILLING_MESSAGES.labels(status).inc()
+            BILLING_MESSAGE_SECONDS.observe(time.perf_counter() - started)
+
     def _get_retry_count(self, properties):
         """
         Get message retry count
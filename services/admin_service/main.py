@@ -32,6 +32,8 @@ from services.admin_service.controllers import resource_group
 from services.admin_service.consumers.billing_message_consumer import BillingMessageConsumer
 from services.admin_service.middleware import AuthMiddleware
 from services.common.middleware.exception_middleware import ExceptionHandlingMiddleware
+from services.common import metrics
+from services.common.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 from services.common.utils.response_utils import ResponseUtils
 from services.common import error_msg
 from fastapi.responses import JSONResponse
@@ -40,6 +42,7 @@ from services.admin_service.task import *
 # Setup logging for admin service
 setup_logging("admin_service")
 logger = get_logger(__name__)
+setup_tracing("admin_service")
 
 # Global consumer instance
 consumer_instance = None
@@ -78,16 +81,21 @@ async def lifespan(app: FastAPI):
         logger.info("Billing message consumer started in background")
     except Exception as e:
         logger.error(f"Failed to start billing consumer: {str(e)}")
+    metrics.gauge_refresher.start()
     
     yield
     
     # Shutdown: Stop consumer
     logger.info("Admin Service shutting down...")
     stop_billing_consumer()
+    await metrics.gauge_refresher.stop()
+    metrics.mark_process_dead()
+    shutdown_tracing()
     # stop_order_monitor()
 
 
-app = FastAPI(title="Admin Service", openapi_url="/openapi.json", lifespan=lifespan)
+# Request spans come from TracingMiddleware
+app = FastAPI(title="Admin Service", openapi_url="/openapi.json", lifespan=lifespan, telemetry={"tracing": False})
 
 # Add custom exception handlers for unified response format
 @app.exception_handler(StarletteHTTPException)
@@ -153,6 +161,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request spans
+if Config.TRACING_EXPORTERS:
+    app.add_middleware(TracingMiddleware)
+
+# Request latency by route
+if Config.METRICS_ENABLED:
+    app.add_middleware(metrics.HttpMetricsMiddleware)
+
 app.include_router(user.router, prefix="/api/user")
 app.include_router(auth.router, prefix="/api/auth")
 app.include_router(user_apikey.router, prefix="/api/apikey")
@@ -182,6 +198,13 @@ if not os.path.exists(uploads_dir):
 # Mount static file directory
 app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
 
+if Config.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        """Prometheus metrics of all workers of this service"""
+        return metrics.metrics_response()
+
+
 @app.get("/")
 def read_root():
     return {"message": f"Admin Service running on port {Config.ADMIN_PORT}"}
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 from services.common.models.mcp_service import McpService
+from services.common.models.resource_group import ResourceGroupServiceMap
 from typing import Optional, Tuple, List
 
 
@@ -92,6 +93,15 @@ class McpServiceRepository:
         """Get all services not include in ids"""
         return self.db.query(McpService).order_by(McpService.created_at.desc()).filter(McpService.id.not_in(ids)).all()
 
+    def get_all_unbound_to_group(self, group_id: str) -> List[McpService]:
+        """Get all services not bound to a resource group (anti-join, no ID list round trip)"""
+        bound = (
+            self.db.query(ResourceGroupServiceMap.id)
+            .filter(ResourceGroupServiceMap.group_id == group_id, ResourceGroupServiceMap.service_id == McpService.id)
+            .exists()
+        )
+        return self.db.query(McpService).order_by(McpService.created_at.desc()).filter(~bound).all()
+
     def create(self, mcp_service: McpService) -> McpService:
         """Create a service; set timestamps if missing and persist."""
         # Set timestamps explicitly if not already set
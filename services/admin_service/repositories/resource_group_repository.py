@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
-from services.common.models.resource_group import ResourceGroup
+from services.common.models.resource_group import ResourceGroup, ResourceGroupServiceMap
 
 
 class ResourceGroupRepository:
@@ -55,6 +55,15 @@ class ResourceGroupRepository:
         """Get all groups not include in ids"""
         return self.db.query(ResourceGroup).filter(ResourceGroup.id.not_in(ids)).all()
 
+    def get_all_unbound_to_service(self, service_id: str) -> List[ResourceGroup]:
+        """Get all groups not bound to a service (anti-join, no ID list round trip)"""
+        bound = (
+            self.db.query(ResourceGroupServiceMap.id)
+            .filter(ResourceGroupServiceMap.service_id == service_id, ResourceGroupServiceMap.group_id == ResourceGroup.id)
+            .exists()
+        )
+        return self.db.query(ResourceGroup).filter(~bound).all()
+
     def get_all_paginated(self, page: int = 1, page_size: int = 10, keyword: Optional[str] = None) -> Tuple[List[ResourceGroup], int]:
         offset = (page - 1) * page_size
         query = self.db.query(ResourceGroup)
@@ -1,12 +1,29 @@
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
 from datetime import datetime
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from services.common.models.resource_group import ResourceGroupServiceMap
+from services.common.utils import permission_index
 
 
 class ResourceGroupServiceMapRepository:
     def __init__(self, db: Session):
         self.db = db
+
+    def _sync_index_on_commit(self, update: Callable[[], None]) -> None:
+        """Apply a permission index update once the current transaction commits (dropped on rollback)"""
+        state = {"done": False}
+
+        def on_commit(session):
+            if not state["done"]:
+                state["done"] = True
+                update()
+
+        def on_rollback(session):
+            state["done"] = True
+
+        event.listen(self.db, "after_commit", on_commit, once=True)
+        event.listen(self.db, "after_rollback", on_rollback, once=True)
     
     def bind_group(self, service_id: str, group_ids: List[str], commit: bool = True) -> int:
         created = 0
@@ -22,8 +39,13 @@ class ResourceGroupServiceMapRepository:
             mapping = ResourceGroupServiceMap(group_id=gid, service_id=service_id, created_at=now)
             self.db.add(mapping)
             created += 1
-        if created and commit:
-            self.db.commit()
+        if created:
+            def sync():
+                for gid in group_ids:
+                    permission_index.add_group_services(gid, [service_id])
+            self._sync_index_on_commit(sync)
+            if commit:
+                self.db.commit()
         return created
     
     def unbind_group(self, service_id: str, group_ids: List[str], commit: bool = True) -> int:
@@ -34,6 +56,10 @@ class ResourceGroupServiceMapRepository:
         count = q.count()
         if count:
             q.delete()
+            def sync():
+                for gid in group_ids:
+                    permission_index.remove_group_services(gid, [service_id])
+            self._sync_index_on_commit(sync)
             if commit:
                 self.db.commit()
         return count
@@ -52,8 +78,10 @@ class ResourceGroupServiceMapRepository:
             mapping = ResourceGroupServiceMap(group_id=group_id, service_id=sid, created_at=now)
             self.db.add(mapping)
             created += 1
-        if created and commit:
-            self.db.commit()
+        if created:
+            self._sync_index_on_commit(lambda: permission_index.add_group_services(group_id, service_ids))
+            if commit:
+                self.db.commit()
         return created
 
     def unbind_service(self, group_id: str, service_id: str, commit: bool = True) -> int:
@@ -64,6 +92,7 @@ class ResourceGroupServiceMapRepository:
         count = q.count()
         if count:
             q.delete()
+            self._sync_index_on_commit(lambda: permission_index.remove_group_services(group_id, [service_id]))
             if commit:
                 self.db.commit()
         return count
@@ -113,6 +142,10 @@ class ResourceGroupServiceMapRepository:
         now = datetime.now()
         if count:
             q.update({ResourceGroupServiceMap.group_id: to_group_id, ResourceGroupServiceMap.created_at: now})
+            def sync():
+                permission_index.drop_group(from_group_id)
+                permission_index.drop_group(to_group_id)
+            self._sync_index_on_commit(sync)
             if commit:
                 self.db.commit()
         return count
@@ -122,6 +155,7 @@ class ResourceGroupServiceMapRepository:
         count = q.count()
         if count:
             q.delete()
+            self._sync_index_on_commit(lambda: permission_index.drop_group(group_id))
             if commit:
                 self.db.commit()
         return count
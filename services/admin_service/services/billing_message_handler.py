@@ -73,7 +73,7 @@ class BillingMessageHandler:
             
             # Update record status to processed
             self.call_log_repo.update_status(call_log_id, ProcessStatus.PROCESSED)
-            logger.info(f"Billing message processed successfully - User ID: {billing_message.user_id}, Tool: {billing_message.tool_name}")
+            logger.info(f"Billing message processed successfully - User ID: {billing_message.user_id}, Tool: {billing_message.tool_name}, Mock: {billing_message.mock}")
             return True
 
         except Exception as e:
@@ -110,6 +110,7 @@ class BillingMessageHandler:
                 call_start_time=call_start_time,
                 call_end_time=call_end_time,
                 apikey_id=message_data.get("apikey_id"),  # Support older version messages that don't have this field
+                mock=bool(message_data.get("mock", False)),
             )
         except (KeyError, ValueError, TypeError) as e:
             logger.error(f"Failed to parse message: {str(e)}, message content: {message_data}")
@@ -15,9 +15,15 @@ from services.common.models.temp_mcp_service import TempMcpService, ChargeType a
 from services.common.models.temp_mcp_tool_api import TempMcpToolApi, HttpMethod as TempHttpMethod
 from services.admin_service.services.openapi_helper import OpenApiForAI
 from services.common.redis import redis_client 
+from services.common.redis_keys import RedisKeys
+from services.common.utils.auth_invalidation import SERVICE, publish_auth_invalidation
+from services.common.utils.secure_config import decrypt_config, encrypt_config
 
 logger = logging.getLogger(__name__)
 
+# Stands in for the upstream client secret in responses
+AUTH_SECRET_MASK = "******"
+
 # Utility function: Convert tags string to array
 def parse_tags_to_array(tags_str: Optional[str]) -> List[str]:
     """
@@ -94,8 +100,28 @@ class McpManagerService:
             logger.warning(f"Failed to delete service price cache - Service ID: {service_id}: {str(e)}")
 
 
+    def _invalidate_service_cache(self, service_id: str, *slug_names: Optional[str]) -> None:
+        """
+        Drop cached service lookups (Redis by ID/slug), bump the tool list revision and
+        notify API processes to drop their identifier resolution entries
+        """
+        try:
+            self.redis.incr(RedisKeys.mcp_tools_revision_key(service_id))
+        except Exception as e:
+            logger.warning(f"Failed to bump tool list revision - Service ID: {service_id}: {str(e)}")
+        try:
+            self.redis.delete(RedisKeys.mcp_service_id_key(service_id))
+            for slug_name in slug_names:
+                if slug_name:
+                    self.redis.delete(RedisKeys.mcp_service_slug_key(slug_name))
+        except Exception as e:
+            logger.warning(f"Failed to delete service cache - Service ID: {service_id}: {str(e)}")
+        publish_auth_invalidation(SERVICE, service_id)
+
     def update_enabled(self, id: str, enabled: int) -> McpService:
-        return self.mcp_service_repository.update_enabled(id, enabled)
+        service = self.mcp_service_repository.update_enabled(id, enabled)
+        self._invalidate_service_cache(id, service.slug_name)
+        return service
 
     def delete(self, id: str) -> Optional[McpService]:
         service = self.mcp_service_repository.get_by_id(id)
@@ -111,7 +137,9 @@ class McpManagerService:
         ))
         if not service:
             raise ValueError("Failed to create drop service")
-        return self.mcp_service_repository.delete(id)
+        deleted = self.mcp_service_repository.delete(id)
+        self._invalidate_service_cache(id, service.slug_name)
+        return deleted
 
     def update(self, body: dict) -> bool:
         # Update mcp_service
@@ -126,6 +154,7 @@ class McpManagerService:
         existing_service = self.mcp_service_repository.get_by_id(service_id)
         if not existing_service:
             raise ValueError("Service not found")
+        old_slug_name = existing_service.slug_name
 
         # If it's an openapi type update, need to migrate data from temporary table first
         if update_type == "openapi":
@@ -134,7 +163,11 @@ class McpManagerService:
             if not temp_service:
                 raise ValueError("No temporary data found for OpenAPI update")
 
-            # 2. Delete existing API data
+            # 2. Delete existing API data, keeping per-tool upstream settings for re-imported tools
+            upstream_settings = {
+                api.name: (api.timeout_ms, api.hedge_enabled)
+                for api in self.mcp_tool_api_repository.get_by_service_id(service_id)
+            }
             self.mcp_tool_api_repository.delete_by_service_id(service_id)
 
             # 3. Update service information with temporary table data
@@ -168,6 +201,7 @@ class McpManagerService:
                 new_api.response_examples = temp_api.response_examples
                 new_api.response_headers = temp_api.response_headers
                 new_api.operation_examples = temp_api.operation_examples
+                new_api.timeout_ms, new_api.hedge_enabled = upstream_settings.get(temp_api.name, (None, 0))
                 new_api.enabled = True
                 # new_api.is_deleted = temp_api.is_deleted
 
@@ -200,6 +234,14 @@ class McpManagerService:
         
         if "base_url" in body and body["base_url"] is not None:
             existing_service.base_url = body["base_url"]
+        if "isolation_pool" in body:
+            existing_service.isolation_pool = (body["isolation_pool"] or "").strip() or None
+        if "mock_enabled" in body and body["mock_enabled"] is not None:
+            existing_service.mock_enabled = 1 if body["mock_enabled"] else 0
+        if "mock_billing_enabled" in body and body["mock_billing_enabled"] is not None:
+            existing_service.mock_billing_enabled = 1 if body["mock_billing_enabled"] else 0
+        if "auth_config" in body:
+            existing_service.auth_config = self._build_auth_config(body["auth_config"], existing_service.auth_config)
         if "charge_type" in body and body["charge_type"] is not None:
             charge_type_value = body["charge_type"]
             try:
@@ -284,16 +326,51 @@ class McpManagerService:
                     existing_api.operation_examples = tool_api_data["operation_examples"]
                 if "enabled" in tool_api_data and tool_api_data["enabled"] is not None:
                     existing_api.enabled = tool_api_data["enabled"]
+                if "timeout_ms" in tool_api_data:
+                    # 0 or null restores the default timeout
+                    existing_api.timeout_ms = tool_api_data["timeout_ms"] or None
+                if "hedge_enabled" in tool_api_data and tool_api_data["hedge_enabled"] is not None:
+                    existing_api.hedge_enabled = 1 if tool_api_data["hedge_enabled"] else 0
 
                 # Commit API changes
                 self.db.commit()
                 self.db.refresh(existing_api)
 
+        # After the tool changes are committed, so API processes reload the final list
+        self._invalidate_service_cache(service_id, old_slug_name, existing_service.slug_name)
         return True
 
     def get_by_id(self, id: str) -> Optional[McpService]:
         return self.mcp_service_repository.get_by_id(id)
 
+    @staticmethod
+    def _build_auth_config(auth_config: Optional[dict], stored: Optional[str]) -> Optional[str]:
+        """Validate and encrypt an upstream auth config; an empty value removes it"""
+        if not auth_config:
+            return None
+        if not isinstance(auth_config, dict) or auth_config.get("type") != "oauth2_client_credentials":
+            raise ValueError("Unsupported auth_config type, expected oauth2_client_credentials")
+        for field in ("token_url", "client_id"):
+            if not auth_config.get(field):
+                raise ValueError(f"auth_config.{field} is required")
+        auth_config = dict(auth_config)
+        # The masked secret returned by get_service_info keeps the stored one
+        if not auth_config.get("client_secret") or auth_config["client_secret"] == AUTH_SECRET_MASK:
+            auth_config["client_secret"] = (decrypt_config(stored) or {}).get("client_secret", "")
+        try:
+            return encrypt_config(auth_config)
+        except Exception as e:
+            raise ValueError(f"Failed to encrypt auth_config: {e}")
+
+    @staticmethod
+    def _mask_auth_config(stored: Optional[str]) -> Optional[dict]:
+        auth_config = decrypt_config(stored)
+        if not auth_config:
+            return None
+        if auth_config.get("client_secret"):
+            auth_config["client_secret"] = AUTH_SECRET_MASK
+        return auth_config
+
     def get_service_info(self, id: str) -> Optional[dict]:
         """Get service details including API list"""
         service = self.mcp_service_repository.get_by_id(id)
@@ -311,13 +388,18 @@ class McpManagerService:
             "long_description": service.long_description,
             "base_url": service.base_url,
             "headers":json.loads(service.headers) if service.headers else [],
+            "auth_config": self._mask_auth_config(service.auth_config),
+            "mock_enabled": service.mock_enabled,
+            "mock_billing_enabled": service.mock_billing_enabled,
+            "isolation_pool": service.isolation_pool,
             "charge_type": service.charge_type.value if service.charge_type else None,
             "price": str(float(service.price)) if service.price and service.charge_type == ChargeType.PER_CALL else "0.00",
             "input_token_price": str(float(service.input_token_price)) if service.input_token_price and service.charge_type == ChargeType.PER_TOKEN else "0.00",
             "output_token_price": str(float(service.output_token_price)) if service.output_token_price and service.charge_type == ChargeType.PER_TOKEN else "0.00",
             "enabled": service.enabled,
             "tags": parse_tags_to_array(service.tags),
-            "apis": [{"id": api.id, "name": api.name, "description": api.description,"url":api.path} for api in apis],
+            "apis": [{"id": api.id, "name": api.name, "description": api.description,"url":api.path,
+                      "timeout_ms": api.timeout_ms, "hedge_enabled": api.hedge_enabled} for api in apis],
         }
 
         return service_info
@@ -10,6 +10,8 @@ from services.admin_service.repositories.sys_config_repository import SysConfigR
 
 from services.common.models.mcp_service import ChargeType
 from services.common.redis import redis_client 
+from services.common.redis_keys import RedisKeys
+from services.common.utils.auth_invalidation import USER, publish_auth_invalidation
 
 
 class ResourceGroupService:
@@ -90,12 +92,14 @@ class ResourceGroupService:
                 self.db.commit()
                 return True
             
-            for user in users:
-                cache_key = f"xpack:user:{user.id}"
-                self.redis.set(cache_key, user, 600)
+            user_ids = [user.id for user in users]
+            self.db.commit()
+            # Only once committed, so API processes reloading on the message see the new group
+            for user_id in user_ids:
+                self.redis.delete(RedisKeys.user_key(user_id))
+                publish_auth_invalidation(USER, user_id)
             cache_key = f"xpack:resource_group:id:{gid}"
             self.redis.delete(cache_key)
-            self.db.commit()
             return True
         except Exception:
             self.db.rollback()
@@ -369,8 +373,7 @@ class ResourceGroupService:
     def get_unbind_services(self, gid: str) -> List[dict]:
         if gid == "deny-all" or gid == "allow-all":
             return []
-        sids = self.map_repo.list_service_ids(gid)
-        services = self.mcp_repo.get_all_not_include(ids=sids)
+        services = self.mcp_repo.get_all_unbound_to_group(gid)
         return [
             {
                 "id": s.id,
@@ -387,8 +390,7 @@ class ResourceGroupService:
 
     def get_unbind_groups(self, sid: str) -> List[dict]:
         """Get all groups not bind to service"""
-        gids = self.map_repo.list_group_ids(sid)
-        groups = self.group_repo.get_all_not_include(ids=gids)
+        groups = self.group_repo.get_all_unbound_to_service(sid)
         return [
             {
                 "id": g.id,
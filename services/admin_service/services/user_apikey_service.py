@@ -7,6 +7,7 @@ from datetime import datetime
 from services.admin_service.repositories.user_apikey_repository import UserApiKeyRepository
 from services.common.utils.cache_utils import CacheUtils
 from services.common.redis_keys import RedisKeys
+from services.common.utils.auth_invalidation import APIKEY, publish_auth_invalidation
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,13 @@ class UserApiKeyService:
         if not user_apikey or user_apikey.user_id != user_id:
             return None
         updated = self.user_apikey_repository.update(id, name, description, expire_at)
+        if expire_at is not None:
+            # Expiry changed: drop the Redis copy and the API service in-process copies
+            try:
+                CacheUtils.delete_cache(RedisKeys.user_apikey_key(user_apikey.apikey))
+            except Exception:
+                pass
+            publish_auth_invalidation(APIKEY, user_apikey.apikey)
         return updated
 
     def delete(self, id: str, user_id: str) -> Optional[UserApiKey]:
@@ -43,6 +51,7 @@ class UserApiKeyService:
             CacheUtils.delete_cache(RedisKeys.user_apikey_key(user_apikey.apikey))
         except Exception:
             pass
+        publish_auth_invalidation(APIKEY, user_apikey.apikey)
         return user_apikey
 
     def get_by_user_id(self, user_id: str) -> List[UserApiKey]:
@@ -7,6 +7,7 @@ from services.admin_service.repositories.user_repository import UserRepository
 from services.admin_service.repositories.user_wallet_repository import UserWalletRepository
 from services.common.redis_keys import RedisKeys
 from services.common.utils.cache import get_model_cache, set_model_cache, delete_cache
+from services.common.utils.auth_invalidation import USER, publish_auth_invalidation
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,7 +36,9 @@ class UserService:
 
     def delete(self, user_id: str) -> Optional[User]:
         """Delete user"""
-        return self.user_repository.delete(user_id)
+        user = self.user_repository.delete(user_id)
+        publish_auth_invalidation(USER, user_id)
+        return user
 
     def get_user_list(self, offset: int, limit: int, keyword: Optional[str] = None) -> Tuple[int, List[User]]:
         """Get user list"""
@@ -55,6 +58,8 @@ class UserService:
             user = self.user_repository.update_resource_group(user_id=user_id, group_id=group_id)
             cache_key = RedisKeys.user_key(user_id)
             set_model_cache(cache_key, user)
+            # Cached API key auth entries carry the user's group ID
+            publish_auth_invalidation(USER, user_id)
             return self.get_by_id(user_id)
         except Exception as e:
             logger.error(f"Failed to update user resource group for user_id {user_id}: {e}", exc_info=True)
@@ -9,42 +9,59 @@ from sqlalchemy import false
 from starlette.requests import Request
 from starlette.responses import Response
 import asyncio
+import anyio
 import time
 import hashlib
+import json
+import math
 import re
+from urllib.parse import parse_qs
+from uuid import UUID
 from mcp.server.sse import SseServerTransport
 from mcp.server.streamable_http import StreamableHTTPServerTransport
-from mcp.server.lowlevel import Server
 from services.api_service.services.mcp_server_factory import McpServerFactory
 from services.common.logging_config import get_logger
-from services.api_service.repositories.user_apikey_repository import UserApiKeyRepository
-from services.api_service.repositories.user_repository import UserRepository
-from services.api_service.repositories.resource_group_repository import ResourceGroupMapRepository
 
 from services.api_service.utils.connection_manager import connection_manager
+from services.api_service.utils.apikey_auth_cache import ApiKeyAuth, apikey_auth_cache
+from services.api_service.utils.permission_index import permission_index
+from services.api_service.utils.service_resolver import service_resolver
+from services.api_service.utils.rate_limiter import rate_limiter
 from services.common.database import get_db
 from services.common.config import Config
-from services.api_service.utils.mcp_event_store import RedisEventStore
+from services.api_service.utils.mcp_event_store import create_event_store
+from services.api_service.utils.session_expiry import SessionExpiryQueue
+from services.api_service.utils.http_session import HttpSession
+from services.common.exceptions import ServiceUnavailableException, TooManyRequestsException
+from services.common.tracing import traced
 
 logger = get_logger(__name__)
 
+# Path of StreamableHTTP requests as seen by the outer app (service ID or slug_name)
+_STREAMABLE_HTTP_PATH = re.compile(r"/mcp/([^/]+)/streamable-http/?$")
+
 
 class McpController:
     """MCP Streamable HTTP controller class - Handle SSE connections and message routing"""
 
     def __init__(self):
         self.sse = SseServerTransport("/messages/")
-        # StreamableHTTP session persistence: store transport and server task keyed by (service_id, user_id)
-        self._http_transports: dict[str, StreamableHTTPServerTransport] = {}
-        self._http_server_tasks: dict[str, asyncio.Task] = {}
-        self._http_servers: dict[str, Server] = {}
+        # StreamableHTTP session persistence: one compact record per (service_id, user_id, client fingerprint)
+        self._http_sessions: dict[str, HttpSession] = {}
+        # Request identity (path identifier, credential hash, client fingerprint) -> session key,
+        # so a request can be matched to its session without resolving the service or API key
+        self._session_aliases: dict[str, str] = {}
         self.server_factory = McpServerFactory()
-        # Session recycling: track idle time and run a background cleanup task
-        self._session_last_activity: dict[str, float] = {}
+        # Per-session memory accounting (estimates refreshed after each delegated request)
+        self._session_memory_total = 0
+        self._session_base_memory = Config.MCP_SESSION_BASE_MEMORY_BYTES
+        self._session_memory_limit = Config.MCP_SESSION_MEMORY_LIMIT_MB * 1024 * 1024
+        # Session recycling: idle deadlines kept in a min-heap, drained by a background task
         self._session_gc_task: Optional[asyncio.Task] = None
         self._session_gc_stop_event = asyncio.Event()
         self._session_idle_ttl = getattr(Config, "MCP_SESSION_IDLE_TTL_SECONDS", 900)
         self._session_cleanup_interval = getattr(Config, "MCP_SESSION_CLEANUP_INTERVAL_SECONDS", 60)
+        self._session_expiry = SessionExpiryQueue(self._session_idle_ttl)
 
     async def handle_sse_connection(self, request: Request):
         """Handle MCP Streamable HTTP SSE connection with resume capability."""
@@ -72,7 +89,10 @@ class McpController:
                 await self._send_error_response(request, 401, "Missing or invalid apikey parameter")
                 return
 
-            user_id, apikey_id = user_info
+            user_id, apikey_id = user_info.user_id, user_info.apikey_id
+
+            # Throttle per apikey / user / service before any server work
+            await self._enforce_rate_limit(user_id, apikey_id, service_id)
 
             # Get apikey for logging (extract first 10 characters for audit)
             apikey = request.query_params.get("apikey", "")
@@ -80,8 +100,8 @@ class McpController:
                 apikey = request.query_params.get("authkey","")
             apikey_for_log = apikey[:10] if apikey else None
 
-            # Create MCP server instance (pass user_id and apikey_id for billing and logging)
-            mcp_server = await self.server_factory.create_server(service_id, user_id, apikey_id)
+            # Get the shared MCP server of the service (user_id and apikey_id are bound per run)
+            mcp_server, init_options = await self.server_factory.get_server(service_id)
 
             # Register connection to manager
             connection_key = connection_manager.register_connection(service_id, user_id, client_ip)
@@ -90,17 +110,14 @@ class McpController:
             async with self.sse.connect_sse(request.scope, request.receive, request._send) as streams:
                 logger.info(f"SSE connection established - Service ID: {service_id}, User ID: {user_id}, Client: {client_ip}")
 
-                # Configure server initialization options
-                init_options = mcp_server.create_initialization_options()
-                init_options.server_name = f"mcp-service-{service_id}"
-                
                 # Add connection recovery hint info
                 logger.info(f"Server name set to: {init_options.server_name}")
                 logger.info(f"MCP server startup complete, waiting for client messages... (Connection ID: {connection_key})")
 
                 try:
                     # Run MCP server
-                    await mcp_server.run(streams[0], streams[1], init_options)
+                    with self.server_factory.bind_caller(user_id, apikey_id):
+                        await mcp_server.run(streams[0], streams[1], init_options)
                     logger.info(f"MCP server run completed - Service ID: {service_id}, User ID: {user_id}")
                 except Exception as e:
                     logger.error(f"Error occurred during MCP server operation: {str(e)}", exc_info=True)
@@ -110,6 +127,9 @@ class McpController:
 
             # SSE connection ended normally via context manager, no additional handling needed
 
+        except TooManyRequestsException as e:
+            logger.warning(f"Rate limited - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {e.message}")
+            await self._send_rate_limited_response(request._send, e)
         except ConnectionError as e:
             logger.warning(f"Connection error - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {str(e)}")
             await self._send_error_response(request, 503, "Connection error")
@@ -133,6 +153,36 @@ class McpController:
             'body': response_body,
         })
 
+    async def _enforce_rate_limit(self, user_id: str, apikey_id: Optional[str], service_id: str) -> None:
+        """Consume one request from the caller's rate limit buckets; raise TooManyRequestsException if exhausted."""
+        if not rate_limiter.enabled:
+            return
+        decision = await rate_limiter.check(apikey_id, user_id, service_id)
+        if not decision.allowed:
+            raise TooManyRequestsException(
+                f"Rate limit exceeded ({decision.scope})",
+                data={"scope": decision.scope, "retry_after": round(decision.retry_after, 3)},
+            )
+
+    async def _send_rate_limited_response(self, send, exc: TooManyRequestsException):
+        """Send 429 with a Retry-After header and a JSON-RPC error body MCP clients can surface"""
+        retry_after = (exc.data or {}).get("retry_after", 1)
+        response_body = json.dumps({
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {"code": -32000, "message": exc.message, "data": exc.data},
+        }).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': 429,
+            'headers': [
+                [b'content-type', b'application/json'],
+                [b'content-length', str(len(response_body)).encode()],
+                [b'retry-after', str(max(1, math.ceil(retry_after))).encode()],
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': response_body})
+
     async def handle_sse_connection_asgi(self, request: Request):
         """Return an ASGI app that handles MCP SSE connections.
 
@@ -180,10 +230,10 @@ class McpController:
                     await send({'type': 'http.response.body', 'body': response_body})
                     return
 
-                user_id, apikey_id = user_info
+                user_id, apikey_id = user_info.user_id, user_info.apikey_id
                 
                 # Check invoke permission
-                if not self._check_invoke_permission(user_id, service_id):
+                if not self._check_invoke_permission(user_info.group_id, service_id):
                     response_body = b"Invoke permission denied"
                     await send({
                         'type': 'http.response.start',
@@ -196,8 +246,11 @@ class McpController:
                     await send({'type': 'http.response.body', 'body': response_body})
                     return
 
-                # Create MCP server instance (pass user_id and apikey_id for billing and logging)
-                mcp_server = await self.server_factory.create_server(service_id, user_id, apikey_id)
+                # Throttle per apikey / user / service before any server work
+                await self._enforce_rate_limit(user_id, apikey_id, service_id)
+
+                # Get the shared MCP server of the service (user_id and apikey_id are bound per run)
+                mcp_server, init_options = await self.server_factory.get_server(service_id)
 
                 # Register connection to manager
                 connection_key = connection_manager.register_connection(service_id, user_id, client_ip)
@@ -207,16 +260,13 @@ class McpController:
                     async with self.sse.connect_sse(scope, receive, send) as streams:
                         logger.info(f"SSE connection established - Service ID: {service_id}, User ID: {user_id}, Client: {client_ip}")
 
-                        # Configure server initialization options
-                        init_options = mcp_server.create_initialization_options()
-                        init_options.server_name = f"mcp-service-{service_id}"
-
                         logger.info(f"Server name set to: {init_options.server_name}")
                         logger.info("MCP server startup complete, waiting for client messages... (ASGI endpoint)")
 
                         try:
                             # Run MCP server
-                            await mcp_server.run(streams[0], streams[1], init_options)
+                            with self.server_factory.bind_caller(user_id, apikey_id):
+                                await mcp_server.run(streams[0], streams[1], init_options)
                             logger.info(f"MCP server run completed - Service ID: {service_id}, User ID: {user_id}")
                         except asyncio.CancelledError:
                             # Client disconnected; treat as normal shutdown
@@ -227,6 +277,9 @@ class McpController:
                     # Unregister connection
                     connection_manager.unregister_connection(connection_key)
 
+            except TooManyRequestsException as e:
+                logger.warning(f"Rate limited - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {e.message}")
+                await self._send_rate_limited_response(send, e)
             except ConnectionError as e:
                 logger.warning(f"Connection error - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {str(e)}")
                 response_body = b"Connection error"
@@ -304,10 +357,55 @@ class McpController:
                     await send({'type': 'http.response.body', 'body': response_body})
                     return
 
+                # Stateless JSON-response mode (per service or per request header)
+                stateless = self._is_stateless_request(req, service_id)
+                if stateless and req.method != 'POST':
+                    logger.warning(f"Stateless mode only supports POST - Method: {req.method}")
+                    response_body = b"Method Not Allowed: stateless mode only supports POST"
+                    await send({
+                        'type': 'http.response.start',
+                        'status': 405,
+                        'headers': [
+                            [b'content-type', b'text/plain'],
+                            [b'content-length', str(len(response_body)).encode()],
+                            [b'allow', b'POST'],
+                        ],
+                    })
+                    await send({'type': 'http.response.body', 'body': response_body})
+                    return
+
                 # Validate Accept & Content-Type headers according to MCP Streamable HTTP rules
                 accept = (req.headers.get('accept') or '').lower()
                 content_type = (req.headers.get('content-type') or '').lower()
-                if req.method == 'GET':
+                if stateless:
+                    # JSON responses only; clients are not required to accept text/event-stream
+                    if 'application/json' not in accept:
+                        logger.warning("Stateless POST Accept must include application/json")
+                        response_body = b"Not Acceptable: require application/json"
+                        await send({
+                            'type': 'http.response.start',
+                            'status': 406,
+                            'headers': [
+                                [b'content-type', b'text/plain'],
+                                [b'content-length', str(len(response_body)).encode()],
+                            ],
+                        })
+                        await send({'type': 'http.response.body', 'body': response_body})
+                        return
+                    if 'application/json' not in content_type:
+                        logger.warning("Unsupported Media Type for POST; require application/json")
+                        response_body = b"Unsupported Media Type: require application/json"
+                        await send({
+                            'type': 'http.response.start',
+                            'status': 415,
+                            'headers': [
+                                [b'content-type', b'text/plain'],
+                                [b'content-length', str(len(response_body)).encode()],
+                            ],
+                        })
+                        await send({'type': 'http.response.body', 'body': response_body})
+                        return
+                elif req.method == 'GET':
                     if 'text/event-stream' not in accept:
                         logger.warning("Missing Accept: text/event-stream for GET SSE")
                         response_body = b"Not Acceptable: require text/event-stream"
@@ -365,8 +463,8 @@ class McpController:
                     })
                     await send({'type': 'http.response.body', 'body': response_body})
                     return
-                user_id, apikey_id = user_info
-                if not self._check_invoke_permission(user_id, service_id):
+                user_id, apikey_id = user_info.user_id, user_info.apikey_id
+                if not self._check_invoke_permission(user_info.group_id, service_id):
                     response_body = b"Invoke permission denied"
                     await send({
                         'type': 'http.response.start',
@@ -378,26 +476,33 @@ class McpController:
                     })
                     await send({'type': 'http.response.body', 'body': response_body})
                     return
-                raw_client_id = req.headers.get('x-client-instance-id') or req.headers.get('x-client-id')
-                client_instance_id = (re.sub(r'[^a-zA-Z0-9._-]', '', raw_client_id)[:32]) if raw_client_id else None
-                ua = user_agent or ""
-                ua_hash = hashlib.sha1(ua.encode('utf-8')).hexdigest()[:8]
-                client_fingerprint = client_instance_id or f"{client_ip}:{ua_hash}"
+
+                # Throttle per apikey / user / service before session creation
+                await self._enforce_rate_limit(user_id, apikey_id, service_id)
+
+                if stateless:
+                    # No session key, transport or server task is retained after the response
+                    await self._handle_stateless_request(scope, receive, send, service_id, user_id, apikey_id)
+                    return
+
+                client_fingerprint = self._client_fingerprint(req, client_ip)
                 session_key = f"{service_id}:{user_id}:{client_fingerprint}"
 
                 # Build connection key for lifecycle management
                 connection_key = f"{service_id}:{user_id}:{client_ip}"
 
                 try:
-                    # Get or create a persistent StreamableHTTP transport and MCP server
-                    transport = await self._ensure_http_session(session_key, service_id, user_id, apikey_id)
+                    # Get or create a persistent StreamableHTTP transport and start the shared MCP server
+                    session = await self._ensure_http_session(session_key, service_id, user_id, apikey_id)
+                    self._register_session_alias(session, self._session_alias(req, client_fingerprint))
+                    transport = session.transport
                     logger.debug(f"method: {req.method}, content_type: {content_type}")
                     # Note session activity
                     self._note_session_activity(session_key)
 
                     # Ensure transport is connected before delegating (avoid race on first request)
                     try:
-                        await self._wait_transport_ready(transport, timeout_seconds=2.0)
+                        await self._wait_transport_ready(session, timeout_seconds=2.0)
                     except TimeoutError:
                         logger.error("Transport not ready within timeout; refusing request")
                         response_body = b"Service Unavailable: transport not ready"
@@ -424,6 +529,8 @@ class McpController:
 
                     # Update activity after handling (avoid cleaning long-running processing)
                     self._note_session_activity(session_key)
+                    if self._http_sessions.get(session_key) is session:
+                        self._update_session_memory(session)
 
                     # If the session has terminated, clean up and unregister
                     if transport.is_terminated:
@@ -442,6 +549,22 @@ class McpController:
                     if req.method == "GET":
                         connection_manager.unregister_connection(connection_key)
 
+            except ServiceUnavailableException as e:
+                logger.warning(f"StreamableHTTP request rejected - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {e.message}")
+                response_body = f"Service Unavailable: {e.message}".encode('utf-8')
+                await send({
+                    'type': 'http.response.start',
+                    'status': 503,
+                    'headers': [
+                        [b'content-type', b'text/plain'],
+                        [b'content-length', str(len(response_body)).encode()],
+                        [b'retry-after', str(Config.MCP_SESSION_CLEANUP_INTERVAL_SECONDS).encode()],
+                    ],
+                })
+                await send({'type': 'http.response.body', 'body': response_body})
+            except TooManyRequestsException as e:
+                logger.warning(f"Rate limited - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {e.message}")
+                await self._send_rate_limited_response(send, e)
             except ConnectionError as e:
                 logger.warning(f"Connection error - Service ID: {service_id or 'unknown'}, Client: {client_ip}: {str(e)}")
                 response_body = b"Connection error"
@@ -469,26 +592,68 @@ class McpController:
 
         return asgi
 
-    async def _wait_transport_ready(self, transport: StreamableHTTPServerTransport, timeout_seconds: float = 2.0) -> None:
-        """Wait until StreamableHTTP transport is connected and streams are initialized.
+    async def _wait_transport_ready(self, session: HttpSession, timeout_seconds: float = 2.0) -> None:
+        """Wait until the session's transport is connected and streams are initialized.
 
-        The underlying transport sets internal streams in connect(); POST/GET handling
-        requires these to exist. We poll briefly to avoid race on first request.
+        The server task sets session.ready once transport.connect() has yielded, so a request
+        waits exactly as long as startup takes (no wait at all for established sessions).
         """
-        deadline = time.time() + timeout_seconds
-        # Access internal attributes defensively; break once read writer is present
-        while True:
-            # If terminated, break early
-            if transport.is_terminated:
-                raise TimeoutError("Transport terminated during wait")
-            # Heuristic: writer/reader set once connect() started
-            has_read_writer = getattr(transport, "_read_stream_writer", None) is not None
-            has_write_reader = getattr(transport, "_write_stream_reader", None) is not None
-            if has_read_writer and has_write_reader:
-                return
-            if time.time() > deadline:
+        if not session.ready.is_set():
+            try:
+                await asyncio.wait_for(session.ready.wait(), timeout=timeout_seconds)
+            except asyncio.TimeoutError:
                 raise TimeoutError("Transport not ready")
-            await asyncio.sleep(0.01)
+        if session.transport.is_terminated or not session.is_running():
+            raise TimeoutError("Transport terminated during wait")
+
+    def _is_stateless_request(self, req: Request, service_id: str) -> bool:
+        """Decide whether a StreamableHTTP request is served in stateless JSON-response mode.
+
+        Opt-in order:
+        - Request header `x-mcp-stateless` (true/1/yes enables, false/0/no disables)
+        - Service listed in MCP_STATELESS_SERVICE_IDS
+        - Global MCP_STATELESS_MODE default
+        """
+        header_value = (req.headers.get('x-mcp-stateless') or '').strip().lower()
+        if header_value in ('1', 'true', 'yes'):
+            return True
+        if header_value in ('0', 'false', 'no'):
+            return False
+        if service_id in Config.MCP_STATELESS_SERVICE_IDS:
+            return True
+        return Config.MCP_STATELESS_MODE
+
+    async def _handle_stateless_request(self, scope, receive, send, service_id: str, user_id: str, apikey_id: str) -> None:
+        """Serve a single POST with a throwaway transport and MCP server.
+
+        The transport returns one JSON response per request (no SSE stream, no event store),
+        and the shared server runs in stateless mode so no initialize handshake is required.
+        The transport is torn down before returning, so any worker can answer any request.
+        """
+        transport = StreamableHTTPServerTransport(
+            mcp_session_id=None,
+            is_json_response_enabled=True,
+            event_store=None,
+        )
+        mcp_server, init_options = await self.server_factory.get_server(service_id)
+
+        async def run_server(*, task_status=anyio.TASK_STATUS_IGNORED):
+            async with transport.connect() as (read_stream, write_stream):
+                task_status.started()
+                try:
+                    with self.server_factory.bind_caller(user_id, apikey_id):
+                        await mcp_server.run(read_stream, write_stream, init_options, stateless=True)
+                except Exception as e:
+                    logger.error(f"Stateless MCP server error: {e}", exc_info=True)
+
+        async with anyio.create_task_group() as tg:
+            await tg.start(run_server)
+            try:
+                await transport.handle_request(scope, receive, send)
+            finally:
+                # Closing the streams lets mcp_server.run() return and the task group exit
+                with anyio.CancelScope(shield=True):
+                    await transport.terminate()
 
     def _is_origin_allowed(self, origin: str, req: Request) -> bool:
         """Validate Origin header against request host to prevent DNS rebinding.
@@ -520,81 +685,81 @@ class McpController:
             logger.exception("Origin validation error")
             return False
 
-    async def _ensure_http_session(self, session_key: str, service_id: str, user_id: str, apikey_id: str) -> StreamableHTTPServerTransport:
-        """Ensure a persistent StreamableHTTP transport and MCP server exist for the session.
+    async def _ensure_http_session(self, session_key: str, service_id: str, user_id: str, apikey_id: str) -> HttpSession:
+        """Ensure a persistent StreamableHTTP transport and a running MCP server exist for the session.
 
-        - Create or reuse the transport
-        - If the server has not been started, start mcp_server.run() within transport.connect()
+        - Create or reuse the session record and its transport
+        - If the server task is not running, start the shared service server within transport.connect()
         """
-        if session_key in self._http_transports:
-            transport = self._http_transports[session_key]
-            # Start GC task if not started
-            self._ensure_session_gc_task()
-            # Note activity
-            self._note_session_activity(session_key)
-            # If the server task exists and is not finished, reuse it
-            task = self._http_server_tasks.get(session_key)
-            if task and not task.done():
-                return transport
-            # If no task or the task is finished, restart
-            mcp_server = self._http_servers.get(session_key)
-            if mcp_server is None:
-                mcp_server = await self.server_factory.create_server(service_id, user_id, apikey_id)
-                self._http_servers[session_key] = mcp_server
-            init_options = mcp_server.create_initialization_options()
-            init_options.server_name = f"mcp-service-{service_id}"
-
-            async def run_server():
-                async with transport.connect() as (read_stream, write_stream):
-                    try:
-                        await mcp_server.run(read_stream, write_stream, init_options)
-                    except asyncio.CancelledError:
-                        logger.info(f"MCP server task cancelled - Service: {service_id}, User: {user_id}")
-                    except Exception as e:
-                        logger.error(f"MCP server task error: {e}", exc_info=True)
-
-            task = asyncio.create_task(run_server())
-            self._http_server_tasks[session_key] = task
-            return transport
-
-        # Create transport and server
-        event_store = RedisEventStore(namespace=session_key, ttl_seconds=Config.MCP_SESSION_IDLE_TTL_SECONDS)
-        transport = StreamableHTTPServerTransport(
-            mcp_session_id=None,
-            is_json_response_enabled=False,
-            event_store=event_store,
-        )
-        mcp_server = await self.server_factory.create_server(service_id, user_id, apikey_id)
-        self._http_transports[session_key] = transport
-        self._http_servers[session_key] = mcp_server
-
-        init_options = mcp_server.create_initialization_options()
-        init_options.server_name = f"mcp-service-{service_id}"
-        logger.info(f"StreamableHTTP session created - Service: {service_id}, User: {user_id}")
+        session = self._http_sessions.get(session_key)
+        if session is None:
+            # Refuse new sessions once the estimated session memory reaches the node limit
+            if self._session_memory_limit and self._session_memory_total >= self._session_memory_limit:
+                raise ServiceUnavailableException(
+                    f"Session memory limit reached ({self._session_memory_total} / {self._session_memory_limit} bytes)"
+                )
+            # Create transport and session record
+            event_store = create_event_store(namespace=session_key, ttl_seconds=Config.MCP_SESSION_IDLE_TTL_SECONDS)
+            transport = StreamableHTTPServerTransport(
+                mcp_session_id=None,
+                is_json_response_enabled=False,
+                event_store=event_store,
+            )
+            session = HttpSession(
+                session_key=session_key,
+                service_id=service_id,
+                user_id=user_id,
+                apikey_id=apikey_id,
+                transport=transport,
+                event_store=event_store,
+            )
+            self._http_sessions[session_key] = session
+            logger.info(f"StreamableHTTP session created - Service: {service_id}, User: {user_id}")
 
         # Start GC task if not started and note activity
         self._ensure_session_gc_task()
         self._note_session_activity(session_key)
 
-        async def run_server():
-            async with transport.connect() as (read_stream, write_stream):
+        # If the server task exists and is not finished, reuse it; otherwise (re)start it
+        if not session.is_running():
+            mcp_server, init_options = await self.server_factory.get_server(service_id)
+            transport = session.transport
+            ready = asyncio.Event()
+            session.ready = ready
+
+            async def run_server():
                 try:
-                    await mcp_server.run(read_stream, write_stream, init_options)
-                except asyncio.CancelledError:
-                    logger.info(f"MCP server task cancelled - Service: {service_id}, User: {user_id}")
-                except Exception as e:
-                    logger.error(f"MCP server task error: {e}", exc_info=True)
+                    async with transport.connect() as (read_stream, write_stream):
+                        # Streams exist from here on; release requests waiting to be delegated
+                        ready.set()
+                        try:
+                            with self.server_factory.bind_caller(user_id, apikey_id):
+                                await mcp_server.run(read_stream, write_stream, init_options)
+                        except asyncio.CancelledError:
+                            logger.info(f"MCP server task cancelled - Service: {service_id}, User: {user_id}")
+                        except Exception as e:
+                            logger.error(f"MCP server task error: {e}", exc_info=True)
+                finally:
+                    # Wake waiters if startup failed; they re-check the task state
+                    ready.set()
 
-        task = asyncio.create_task(run_server())
-        self._http_server_tasks[session_key] = task
-        return transport
+            session.task = asyncio.create_task(run_server())
+            self._update_session_memory(session)
+        return session
 
     async def _cleanup_http_session(self, session_key: str) -> None:
         """Cleanup transport and server task for a terminated session."""
-        task = self._http_server_tasks.pop(session_key, None)
-        transport = self._http_transports.pop(session_key, None)
-        self._http_servers.pop(session_key, None)
-
+        session = self._http_sessions.pop(session_key, None)
+        self._session_expiry.discard(session_key)
+        if session is None:
+            return
+        for alias in session.aliases:
+            if self._session_aliases.get(alias) == session_key:
+                del self._session_aliases[alias]
+        self._session_memory_total -= session.memory_estimate
+
+        task = session.task
+        transport = session.transport
         if task and not task.done():
             try:
                 # Terminate transport to prompt server exit
@@ -604,82 +769,121 @@ class McpController:
             except Exception:
                 logger.exception("Error while waiting for server task to finish")
 
+    @staticmethod
+    def _client_fingerprint(req: Request, client_ip: str) -> str:
+        """Client instance header if sent, else client IP + User-Agent hash"""
+        raw_client_id = req.headers.get('x-client-instance-id') or req.headers.get('x-client-id')
+        client_instance_id = (re.sub(r'[^a-zA-Z0-9._-]', '', raw_client_id)[:32]) if raw_client_id else None
+        ua = req.headers.get("user-agent", "unknown")
+        ua_hash = hashlib.sha1(ua.encode('utf-8')).hexdigest()[:8]
+        return client_instance_id or f"{client_ip}:{ua_hash}"
+
+    @staticmethod
+    def _session_alias(req: Request, client_fingerprint: str) -> Optional[str]:
+        match = _STREAMABLE_HTTP_PATH.search(req.scope["path"])
+        credential = req.query_params.get("apikey") or req.query_params.get("authkey")
+        if not match or not credential:
+            return None
+        credential_hash = hashlib.sha1(credential.encode('utf-8')).hexdigest()
+        return f"{match.group(1)}:{credential_hash}:{client_fingerprint}"
+
+    def _register_session_alias(self, session: HttpSession, alias: Optional[str]) -> None:
+        if alias is not None and alias not in session.aliases:
+            session.aliases.add(alias)
+            self._session_aliases[alias] = session.session_key
+
+    def has_live_session(self, scope) -> bool:
+        """
+        Whether a request targets a running session of this process
+
+        Used for admission priority, before authentication: only in-memory lookups.
+        A StreamableHTTP request matches the session its identity was routed to
+        before; an SSE message must name a connected session.
+        """
+        path = scope["path"]
+        if path.startswith("/mcp/messages"):
+            session_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("session_id", [""])[0]
+            try:
+                return UUID(hex=session_id) in self.sse._read_stream_writers
+            except ValueError:
+                return False
+        if not _STREAMABLE_HTTP_PATH.search(path):
+            return False
+        req = Request(scope)
+        x_real_ip = req.headers.get("x-real-ip") or req.headers.get("x-forwarded-for")
+        client_ip = (x_real_ip.split(",")[0].strip() if x_real_ip else (req.client.host if req.client else "unknown"))
+        alias = self._session_alias(req, self._client_fingerprint(req, client_ip))
+        session_key = self._session_aliases.get(alias) if alias else None
+        session = self._http_sessions.get(session_key) if session_key else None
+        return session is not None and session.is_running()
+
+    def _update_session_memory(self, session: HttpSession) -> None:
+        """Refresh a session's memory estimate and the node-wide running total."""
+        previous = session.memory_estimate
+        current = session.estimate_memory(self._session_base_memory)
+        self._session_memory_total += current - previous
+
+    def get_session_totals(self) -> tuple[int, int]:
+        """Number of StreamableHTTP sessions and their estimated memory (as last measured)"""
+        return len(self._http_sessions), self._session_memory_total
+
+    def get_session_stats(self, top: int = 10) -> dict:
+        """Get StreamableHTTP session counts and memory estimates for monitoring.
+
+        Read-only: reports the estimates as last measured on the event loop, so it is
+        safe to call from a worker thread.
+
+        Args:
+            top: Number of largest sessions to include
+
+        Returns:
+            dict: Session statistics
+        """
+        sessions = list(self._http_sessions.values())
+        largest = sorted(sessions, key=lambda item: item.memory_estimate, reverse=True)[:top]
+        total = self._session_memory_total
+        return {
+            "active_sessions": len(sessions),
+            "estimated_memory_bytes": total,
+            "average_session_bytes": int(total / len(sessions)) if sessions else 0,
+            "memory_limit_bytes": self._session_memory_limit,
+            "largest_sessions": [
+                {
+                    "session_key": item.session_key,
+                    "service_id": item.service_id,
+                    "user_id": item.user_id,
+                    "estimated_bytes": item.memory_estimate,
+                    "created_at": item.created_at,
+                    "running": item.is_running(),
+                }
+                for item in largest
+            ],
+        }
+
     def _extract_service_id(self, request: Request) -> Optional[str]:
         """Extract service ID from request path, supporting both ID and slug_name."""
         service_identifier = request.path_params.get("service_id")
         if not service_identifier:
             return None
             
-        # Try to find service by service_identifier, supports both ID and slug_name modes
-        db = None
-        try:
-            from services.api_service.repositories.mcp_service_repository import McpServiceRepository
-            from services.common.database import get_db
-            
-            db = next(get_db())
-            service_repository = McpServiceRepository(db)
-            
-            # Try to find by ID first
-            service = service_repository.get_by_id(service_identifier)
-            if service:
-                logger.debug(f"Service found (by ID): {service.name} ({service.id})")
-                return service.id
-            
-            # If not found by ID, try by slug_name
-            service = service_repository.get_by_slug_name(service_identifier)
-            if service:
-                logger.debug(f"Service found (by slug_name): {service.name} ({service.id})")
-                return service.id
-                
+        # Resolve via the process-local cache (ID first, then slug_name; misses cached negatively)
+        service = service_resolver.resolve(service_identifier)
+        if not service:
             logger.warning(f"Service not found: {service_identifier}")
             return None
-            
-        except Exception as e:
-            logger.error(f"Error occurred while querying service: {str(e)}", exc_info=True)
-            return None
-        finally:
-            if db is not None:
-                db.close()
-    def _check_invoke_permission(self, user_id: str, service_id: str) -> bool:
-        db = None
-        try:
-            # Create database session
-            db = next(get_db())
-            user_repo = UserRepository(db)
-            # Query user info by apikey
-            user = user_repo.get_by_id(user_id)
-            if not user:
-                logger.warning(f"User not found in database: {user_id[:10]}...")
-                return False
-            logger.debug(f"Found user record - User ID: {user.id}, group id is: {user.group_id}")
-            if user.group_id == "allow-all":
-                return True
-            elif user.group_id == "deny-all":
-                return False
-            
-            resource_group_map_repo = ResourceGroupMapRepository(db)
-            resource_groups = resource_group_map_repo.get_by_id(user.group_id)
-            if not resource_groups:
-                logger.warning(f"Resource group not found for user: {user_id[:10]}...")
-                return False
-            
-            # Check if service_id is in resource_groups
-            if service_id not in resource_groups:
-                logger.warning(f"Service {service_id} not found in user's resource groups: {user_id[:10]}...")
-                return False
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error occurred while querying user apikey: {str(e)}", exc_info=True)
-            return False
-        finally:
-            if db is not None:
-                db.close()
+        return service.service_id
 
+    @traced("mcp.permission")
+    def _check_invoke_permission(self, group_id: Optional[str], service_id: str) -> bool:
+        """Check whether the caller's resource group may invoke the service (in-memory permission index)."""
+        if permission_index.is_allowed(group_id, service_id):
+            return True
+        logger.warning(f"Service {service_id} not permitted for resource group: {group_id}")
+        return False
 
-    def _extract_user_info(self, request: Request) -> Optional[tuple[str, str]]:
-        """Extract user ID and apikey ID from request by validating apikey parameter."""
+    @traced("mcp.auth")
+    def _extract_user_info(self, request: Request) -> Optional[ApiKeyAuth]:
+        """Extract user ID, apikey ID and resource group ID from request by validating apikey parameter."""
         # Get apikey from URL query parameters
         apikey = request.query_params.get("apikey")
         if not apikey:
@@ -690,42 +894,18 @@ class McpController:
 
         logger.debug(f"Validating apikey: {apikey[:10]}...")  # Only log first 10 characters for debugging
 
-        db = None
-        try:
-            # Create database session
-            db = next(get_db())
-            user_apikey_repo = UserApiKeyRepository(db)
-            
-            # Query user info by apikey
-            user_apikey = user_apikey_repo.get_by_apikey(apikey)
-            if not user_apikey:
-                logger.warning(f"Apikey not found in database: {apikey[:10]}...")
-                return None
-            
-            logger.debug(f"Found apikey record - User ID: {user_apikey.user_id}, API Key ID: {user_apikey.id}, expiry time: {user_apikey.expire_at}")
-            
-            # Check if apikey is expired
-            if user_apikey.expire_at:
-                # Ensure timezone consistency
-                if user_apikey.expire_at.tzinfo is None:
-                    expire_at_utc = user_apikey.expire_at.replace(tzinfo=timezone.utc)
-                else:
-                    expire_at_utc = user_apikey.expire_at
-                    
-                if expire_at_utc < datetime.now(timezone.utc):
-                    logger.warning(f"Apikey has expired: {apikey[:10]}..., expiry time: {user_apikey.expire_at}")
-                    return None
-            
-            
-            logger.info(f"Apikey validation successful - User ID: {user_apikey.user_id}, API Key ID: {user_apikey.id}")
-            return (user_apikey.user_id, user_apikey.id)
-            
-        except Exception as e:
-            logger.error(f"Error occurred while querying user apikey: {str(e)}", exc_info=True)
+        # Process-local cache first; misses go to Redis/MySQL and invalid keys are cached negatively
+        auth = apikey_auth_cache.get(apikey)
+        if auth is None:
+            logger.warning(f"Apikey not found: {apikey[:10]}...")
             return None
-        finally:
-            if db is not None:
-                db.close()
+
+        if auth.is_expired():
+            logger.warning(f"Apikey has expired: {apikey[:10]}..., expiry time: {datetime.fromtimestamp(auth.expire_at, timezone.utc)}")
+            return None
+
+        logger.info(f"Apikey validation successful - User ID: {auth.user_id}, API Key ID: {auth.apikey_id}")
+        return auth
 
     def get_sse_mount_handler(self):
         """Get SSE message handler for processing requests."""
@@ -746,31 +926,36 @@ class McpController:
             logger.info("Session GC task started")
 
     def _note_session_activity(self, session_key: str) -> None:
-        """Update last activity timestamp for a session."""
-        self._session_last_activity[session_key] = time.time()
+        """Record session activity; O(1), the expiry heap is rescheduled lazily."""
+        self._session_expiry.touch(session_key)
 
     async def _run_session_gc(self) -> None:
-        """Background task to recycle idle or terminated sessions."""
+        """Background task to recycle idle or terminated sessions.
+
+        Sleeps until the earliest idle deadline (bounded by the cleanup interval) and
+        only visits sessions whose deadline has passed.
+        """
         try:
             while not self._session_gc_stop_event.is_set():
-                await asyncio.sleep(self._session_cleanup_interval)
-                now = time.time()
-                stale_keys: list[str] = []
-                for key, transport in list(self._http_transports.items()):
-                    last = self._session_last_activity.get(key, 0)
-                    idle = (now - last) > self._session_idle_ttl
-                    task = self._http_server_tasks.get(key)
-                    active_task = task is not None and not task.done()
+                delay = self._session_cleanup_interval
+                next_deadline = self._session_expiry.next_deadline()
+                if next_deadline is not None:
+                    delay = min(delay, next_deadline - time.monotonic())
+                # Coalesce wakeups so near-simultaneous deadlines are handled in one pass
+                await asyncio.sleep(max(delay, 1.0))
+                for key in self._session_expiry.pop_expired():
+                    session = self._http_sessions.get(key)
+                    if session is None:
+                        continue
                     # Only TTL-clean when there is no active task, to avoid killing active SSE sessions
-                    if transport.is_terminated or (idle and not active_task):
-                        stale_keys.append(key)
-                for key in stale_keys:
+                    if session.is_running() and not session.transport.is_terminated:
+                        self._session_expiry.touch(key)
+                        continue
                     logger.info(f"Recycling session {key} (terminated or idle > {self._session_idle_ttl}s)")
                     try:
                         await self._cleanup_http_session(key)
                     except Exception:
                         logger.exception("Error during session cleanup")
-                    self._session_last_activity.pop(key, None)
         except asyncio.CancelledError:
             pass
         finally:
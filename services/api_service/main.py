@@ -10,6 +10,7 @@ from fastapi.responses import JSONResponse
 from starlette.routing import Route, Mount
 from starlette.applications import Starlette
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import time
 
@@ -17,23 +18,52 @@ from services.common.config import Config
 from services.common.logging_config import setup_logging, get_logger
 from services.api_service.controllers.mcp import McpController
 from services.api_service.utils.connection_manager import connection_manager
+from services.api_service.utils.apikey_auth_cache import apikey_auth_cache
+from services.api_service.utils.cpu_offload import cpu_offloader
+from services.api_service.utils.mock_upstream import mock_upstream
+from services.api_service.utils.bulkhead import bulkhead
+from services.api_service.utils.latency_histogram import upstream_latency
+from services.api_service.utils.permission_index import permission_index
+from services.api_service.utils.service_resolver import service_resolver
+from services.common.utils.auth_invalidation import GROUP, SERVICE
 from services.common.middleware.exception_middleware import ExceptionHandlingMiddleware
+from services.common.middleware.admission_middleware import AdmissionControlMiddleware, admission_controller
+from services.common import metrics
+from services.common.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 from services.common.utils.response_utils import ResponseUtils
 from services.common import error_msg
 
 # Setup logging for api service
 setup_logging("api_service")
 logger = get_logger(__name__)
+setup_tracing("api_service")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle management"""
     logger.info(f"MCP Streamable HTTP Service starting... Port: {Config.API_PORT}")
+    apikey_auth_cache.add_invalidation_handler(GROUP, permission_index.invalidate_group, permission_index.clear)
+    apikey_auth_cache.add_invalidation_handler(SERVICE, service_resolver.invalidate_service, service_resolver.clear)
+    apikey_auth_cache.add_invalidation_handler(SERVICE, mcp.server_factory.evict_server, mcp.server_factory.clear_servers)
+    apikey_auth_cache.start_invalidation_listener()
+    admission_controller.set_session_lookup(mcp.has_live_session)
+    admission_controller.start()
+    connection_manager.start()
+    metrics.gauge_refresher.add_callback(refresh_session_gauges)
+    metrics.gauge_refresher.start()
     
     yield
     
     logger.info("MCP Streamable HTTP Service shutting down...")
+    apikey_auth_cache.stop_invalidation_listener()
+    await admission_controller.stop()
+    await connection_manager.stop()
+    await metrics.gauge_refresher.stop()
+    metrics.mark_process_dead()
+    shutdown_tracing()
+    cpu_offloader.shutdown()
+    await bulkhead.aclose()
 
 
 # Create FastAPI application
@@ -42,7 +72,9 @@ app = FastAPI(
     description="XPack MCP Streamable HTTP service",
     version="1.0.0",
     openapi_url="/openapi.json",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Request spans come from TracingMiddleware, which also covers the mounted MCP routes
+    telemetry={"tracing": False},
 )
 
 # Add custom exception handlers for unified response format
@@ -97,6 +129,9 @@ async def validation_exception_handler(request, exc):
 # Add global exception handling middleware (must be first for proper error handling)
 app.add_middleware(ExceptionHandlingMiddleware)
 
+# Shed new work early when saturated (inside CORS so 503s still carry CORS headers)
+app.add_middleware(AdmissionControlMiddleware)
+
 # Add CORS middleware for MCP client cross-origin and reconnection support
 app.add_middleware(
     CORSMiddleware,
@@ -107,9 +142,25 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# Request spans (auth and permission checks, tool calls continue the request's trace)
+if Config.TRACING_EXPORTERS:
+    app.add_middleware(TracingMiddleware)
+
+# Request latency by route (outermost, so shed and failed requests are counted too)
+if Config.METRICS_ENABLED:
+    app.add_middleware(metrics.HttpMetricsMiddleware)
+
 # Create MCP controller instance
 mcp = McpController()
 
+
+def refresh_session_gauges():
+    """Session and connection gauges of this worker"""
+    active_sessions, memory_bytes = mcp.get_session_totals()
+    metrics.MCP_SESSIONS.set(active_sessions)
+    metrics.MCP_SESSION_MEMORY_BYTES.set(memory_bytes)
+    metrics.MCP_CONNECTIONS.set(len(connection_manager.connections))
+
 # Health check endpoints
 @app.get("/")
 def read_root():
@@ -137,29 +188,10 @@ def mcp_service_status(service_id: str):
     actual_service_id = None
     service_name = "unknown"
     
-    try:
-        from services.api_service.repositories.mcp_service_repository import McpServiceRepository
-        from services.common.database import get_db
-        
-        db = next(get_db())
-        service_repository = McpServiceRepository(db)
-        
-        # Try to find by ID first
-        service = service_repository.get_by_id(service_id)
-        if service:
-            actual_service_id = service.id
-            service_name = service.name
-        else:
-            # If not found by ID, try by slug_name
-            service = service_repository.get_by_slug_name(service_id)
-            if service:
-                actual_service_id = service.id
-                service_name = service.name
-                
-        db.close()
-        
-    except Exception as e:
-        logger.error(f"Error occurred while querying service status: {str(e)}")
+    service = service_resolver.resolve(service_id)
+    if service:
+        actual_service_id = service.service_id
+        service_name = service.name
     
     if not actual_service_id:
         return {
@@ -169,7 +201,7 @@ def mcp_service_status(service_id: str):
         }
     
     # Get connection statistics for this service
-    service_connections = connection_manager.get_service_connections(actual_service_id)
+    active_connections = connection_manager.count_service_connections(actual_service_id)
     
     return {
         "service_id": actual_service_id,
@@ -179,21 +211,40 @@ def mcp_service_status(service_id: str):
         "protocol": "streamable-http",
         "endpoint": f"/mcp/{service_id}",
         "message": "Service is ready for connections",
-        "active_connections": len(service_connections),
+        "active_connections": active_connections,
         "reconnect_supported": True
     }
 
 @app.get("/mcp/connections/stats")
-def mcp_connections_stats():
+async def mcp_connections_stats(page: int = 1, page_size: int = 20):
     """Get MCP connection statistics for monitoring and debugging"""
-    # Cleanup stale connections
-    connection_manager.cleanup_stale_connections()
-    
+    # Runs on the event loop, which owns the connection and session state (stale
+    # connections are cleaned up by the heartbeat); only the Redis aggregation is offloaded
+    try:
+        cluster = await asyncio.to_thread(connection_manager.get_cluster_stats, page, page_size)
+    except Exception as e:
+        logger.warning(f"Failed to aggregate cluster connection stats: {e}")
+        cluster = None
+
     return {
         "timestamp": time.time(),
-        "stats": connection_manager.get_stats()
+        "stats": connection_manager.get_stats(),
+        "cluster": cluster,
+        "sessions": mcp.get_session_stats(),
+        "auth_cache": apikey_auth_cache.get_stats(),
+        "admission": admission_controller.get_stats(),
+        "upstream": upstream_latency.get_stats(),
+        "cpu_offload": cpu_offloader.get_stats(),
+        "mock_upstream": mock_upstream.get_stats(),
+        "bulkhead": bulkhead.get_stats()
     }
 
+if Config.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        """Prometheus metrics of all workers of this service"""
+        return metrics.metrics_response()
+
 # Create MCP Streamable HTTP routes
 # Use Starlette sub-app to handle MCP protocol's underlying SSE connections
 mcp_routes = [
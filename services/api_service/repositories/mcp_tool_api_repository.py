@@ -1,7 +1,8 @@
 """Repository for MCP tool APIs in API service: list and get operations."""
 from sqlalchemy.orm import Session
 from services.common.models.mcp_tool_api import McpToolApi
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, List, Tuple
 
 
 class McpToolApiRepository:
@@ -19,6 +20,17 @@ class McpToolApiRepository:
             self.db.query(McpToolApi).filter(McpToolApi.service_id == service_id, McpToolApi.enabled == 1, McpToolApi.is_deleted == 0).all()
         )
 
+    def get_versions_by_service_id(self, service_id: str) -> List[Tuple[str, Optional[datetime]]]:
+        """
+        Get (id, updated_at) of the enabled and non-deleted APIs of a service
+        Cheap query used to detect tool list changes without loading the schemas
+        """
+        return (
+            self.db.query(McpToolApi.id, McpToolApi.updated_at)
+            .filter(McpToolApi.service_id == service_id, McpToolApi.enabled == 1, McpToolApi.is_deleted == 0)
+            .all()
+        )
+
     def get_by_id(self, api_id: str) -> Optional[McpToolApi]:
         """
         Get single API by API ID
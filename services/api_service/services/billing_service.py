@@ -4,19 +4,25 @@ Billing service - Handle user API call billing logic
 
 import json
 import os
+import time
 import uuid
 import asyncio
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Tuple, Optional
+from typing import Dict, List, Optional, Tuple
 from contextlib import asynccontextmanager
 
+from opentelemetry.trace import SpanKind
+
+from services.common.config import Config
 from services.common.redis import redis_client
 from services.common.rabbitmq import rabbitmq_client
 from services.common.models.billing import BillingMessage, PreDeductResult, ApiCallLogInfo
 from services.common.models.mcp_service import ChargeType
 from services.common.models.user_wallet import UserWallet
 from services.common.database import get_db
+from services.common.metrics import PRE_DEDUCT_SECONDS
+from services.common.tracing import inject_headers, traced
 from services.api_service.repositories.mcp_service_repository import McpServiceRepository
 from services.api_service.repositories.user_wallet_repository import UserWalletRepository
 from services.common.logging_config import get_logger
@@ -36,7 +42,13 @@ class BillingService:
     def __init__(self):
         self.redis = redis_client
         self.rabbitmq = rabbitmq_client
+        self.batch_window_seconds = Config.BILLING_BATCH_WINDOW_MS / 1000.0
+        # Reservations waiting for the next batch, per user
+        self._reservations: Dict[str, List[Tuple[Decimal, asyncio.Future]]] = {}
+        # Task applying a user's batches, kept while reservations keep arriving
+        self._flushing: Dict[str, asyncio.Task] = {}
 
+    @traced("billing.pre_deduct")
     async def check_and_pre_deduct(self, user_id: str, service_id: str, tool_name: str) -> PreDeductResult:
         """
         Check balance and perform pre-deduction
@@ -49,6 +61,7 @@ class BillingService:
         Returns:
             PreDeductResult: Pre-deduction result
         """
+        started = time.perf_counter()
         try:
             # Get service price information
             price, input_token_price, output_token_price, charge_type = await self._get_service_price(service_id)
@@ -56,6 +69,7 @@ class BillingService:
             match charge_type:
                 case ChargeType.FREE:
                     logger.info(f"Free service, skip billing check - User ID: {user_id}, Service ID: {service_id}")
+                    PRE_DEDUCT_SECONDS.labels("free").observe(time.perf_counter() - started)
                     return PreDeductResult(
                         success=True,
                         message="Free service",
@@ -71,40 +85,38 @@ class BillingService:
                     estimated_output_cost = (Decimal(500) / Decimal("1000000")) * output_token_price
                     service_price = estimated_input_cost + estimated_output_cost
 
-            async with self._acquire_billing_lock(user_id):
-                # Get user balance
-                user_balance = await self._get_user_wallet_balance(user_id)
-
-                # Check if balance is sufficient
-                if user_balance < service_price:
-                    logger.warning(f"User balance insufficient - User ID: {user_id}, Balance: {user_balance}, Required: {service_price}")
-                    return PreDeductResult(
-                        success=False,
-                        message=f"Insufficient balance, current balance: {user_balance}, required: {service_price}",
-                        service_price=service_price,
-                        user_balance=user_balance,
-                        input_token_price=input_token_price,
-                        output_token_price=output_token_price,
-                        charge_type=charge_type.value
-                    )
-
-                # Pre-deduct amount in Redis
-                new_balance = user_balance - service_price
-                await self._update_wallet_cache(user_id, new_balance)
+            # Reserved together with the user's other concurrent calls
+            reserved, user_balance = await self._reserve(user_id, service_price)
 
-                logger.info(f"Pre-deduction successful - User ID: {user_id}, Deduction: {service_price}, Balance: {user_balance} -> {new_balance}")
+            # Check if balance is sufficient
+            if not reserved:
+                logger.warning(f"User balance insufficient - User ID: {user_id}, Balance: {user_balance}, Required: {service_price}")
+                PRE_DEDUCT_SECONDS.labels("insufficient").observe(time.perf_counter() - started)
                 return PreDeductResult(
-                    success=True,
-                    message="Pre-deduction successful",
+                    success=False,
+                    message=f"Insufficient balance, current balance: {user_balance}, required: {service_price}",
                     service_price=service_price,
-                    user_balance=new_balance,
+                    user_balance=user_balance,
                     input_token_price=input_token_price,
                     output_token_price=output_token_price,
                     charge_type=charge_type.value
                 )
 
+            logger.info(f"Pre-deduction successful - User ID: {user_id}, Deduction: {service_price}, Balance: {user_balance}")
+            PRE_DEDUCT_SECONDS.labels("reserved").observe(time.perf_counter() - started)
+            return PreDeductResult(
+                success=True,
+                message="Pre-deduction successful",
+                service_price=service_price,
+                user_balance=user_balance,
+                input_token_price=input_token_price,
+                output_token_price=output_token_price,
+                charge_type=charge_type.value
+            )
+
         except Exception as e:
             logger.error(f"Pre-deduction check failed - User ID: {user_id}, Service ID: {service_id}: {str(e)}", exc_info=True)
+            PRE_DEDUCT_SECONDS.labels("error").observe(time.perf_counter() - started)
             return PreDeductResult(
                 success=False,
                 message=f"System error: {str(e)}",
@@ -115,6 +127,93 @@ class BillingService:
                 charge_type=ChargeType.FREE.value
             )
 
+    async def _reserve(self, user_id: str, amount: Decimal) -> Tuple[bool, Decimal]:
+        """
+        Reserve an amount from the user's balance
+
+        Reservations of a user arriving close together (calls running concurrently)
+        are applied as one batch: one lock, one balance read and one write.
+
+        Returns:
+            Tuple[bool, Decimal]: Whether the amount was reserved, and the balance after
+            the reservation (or the balance that was insufficient)
+        """
+        future = asyncio.get_running_loop().create_future()
+        pending = self._reservations.setdefault(user_id, [])
+        pending.append((amount, future))
+        if len(pending) == 1 and user_id not in self._flushing:
+            self._flushing[user_id] = asyncio.create_task(self._flush_reservations(user_id))
+        return await future
+
+    async def _flush_reservations(self, user_id: str) -> None:
+        """Apply the user's pending reservations batch by batch until none are left"""
+        try:
+            while True:
+                # Let calls started in the same tick (or window) join the batch
+                await asyncio.sleep(self.batch_window_seconds)
+                batch = self._reservations.pop(user_id, None)
+                if not batch:
+                    break
+                # Callers cancelled while waiting (client gone, deadline) reserve nothing
+                batch = [(amount, future) for amount, future in batch if not future.done()]
+                if not batch:
+                    continue
+                try:
+                    results = await self._reserve_batch(user_id, [amount for amount, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                refund = Decimal("0")
+                for (amount, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                    elif result[0]:
+                        # Cancelled while the batch was applied: give the amount back
+                        refund += amount
+                if refund:
+                    await self._refund(user_id, refund)
+        finally:
+            self._flushing.pop(user_id, None)
+
+    async def _reserve_batch(self, user_id: str, amounts: List[Decimal]) -> List[Tuple[bool, Decimal]]:
+        """
+        Reserve a batch of amounts atomically, in arrival order
+
+        A call whose amount no longer fits the remaining balance is rejected; later
+        (smaller) ones may still fit.
+        """
+        async with self._acquire_billing_lock(user_id):
+            user_balance = await self._get_user_wallet_balance(user_id)
+            balance = user_balance
+            results = []
+            for amount in amounts:
+                if balance < amount:
+                    results.append((False, balance))
+                else:
+                    balance -= amount
+                    results.append((True, balance))
+
+            # Pre-deduct the batch total in Redis
+            if balance != user_balance:
+                await self._update_wallet_cache(user_id, balance)
+            if len(amounts) > 1:
+                logger.info(f"Batched pre-deduction - User ID: {user_id}, Calls: {len(amounts)}, Balance: {user_balance} -> {balance}")
+            return results
+
+    async def _refund(self, user_id: str, amount: Decimal) -> None:
+        """Return a reserved amount nobody will be billed for to the cached balance"""
+        try:
+            async with self._acquire_billing_lock(user_id):
+                balance = await self._get_user_wallet_balance(user_id)
+                await self._update_wallet_cache(user_id, balance + amount)
+            logger.info(f"Refunded cancelled pre-deductions - User ID: {user_id}, Amount: {amount}")
+        except Exception as e:
+            # The cached balance is resynchronized from the wallet when it expires
+            logger.warning(f"Failed to refund cancelled pre-deductions - User ID: {user_id}: {e}")
+
+    @traced("billing.publish", SpanKind.PRODUCER)
     async def send_billing_message(self, call_log: ApiCallLogInfo, call_success: bool, call_end_time: datetime) -> None:
         """
         Send billing message to RabbitMQ
@@ -139,6 +238,7 @@ class BillingService:
                 call_start_time=call_log.call_start_time,
                 call_end_time=call_end_time,
                 apikey_id=call_log.apikey_id,
+                mock=call_log.mock,
             )
 
             # Serialize message
@@ -157,11 +257,12 @@ class BillingService:
                     "call_start_time": message.call_start_time.isoformat(),
                     "call_end_time": message.call_end_time.isoformat() if message.call_end_time else None,
                     "apikey_id": message.apikey_id,
+                    "mock": message.mock,
                 }
             )
 
-            # Send to RabbitMQ
-            self.rabbitmq.publish(self.BILLING_QUEUE_NAME, message_json)
+            # Send to RabbitMQ; the trace context travels in the message headers to the consumer
+            self.rabbitmq.publish(self.BILLING_QUEUE_NAME, message_json, headers=inject_headers())
             logger.info(f"Billing message sent successfully - User ID: {call_log.user_id}, Tool: {call_log.tool_name}")
 
         except Exception as e:
@@ -2,24 +2,70 @@
 MCP Server Factory - Create and configure MCP server instances
 """
 
+import base64
+import bisect
 import uuid
 import json
+import time
+import asyncio
+import weakref
+from contextlib import contextmanager, nullcontext
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from mcp.server.lowlevel import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.server.models import InitializationOptions
 import mcp.types as types
+from mcp.shared.exceptions import McpError
+from opentelemetry.context import Context
 from services.common.database import get_db
 from services.api_service.repositories.mcp_tool_api_repository import McpToolApiRepository
 from services.api_service.repositories.mcp_service_repository import McpServiceRepository
 from services.api_service.services.mcp_service import McpService
 from services.api_service.services.mcp_tool_service import McpToolService
 from services.api_service.services.billing_service import billing_service
-from services.common.models.billing import ApiCallLogInfo
+from services.api_service.utils.cpu_offload import cpu_offloader
+from services.api_service.utils.idempotency import idempotency_store, BUSY, CONFLICT, REPLAY
+from services.api_service.utils.large_result_store import large_result_store, RESULT_URI_TEMPLATE
+from services.api_service.utils.tool_search import MAX_SEARCH_LIMIT, SEARCH_TOOL_NAME, ToolSearchIndex, search_tool_definition
+from services.api_service.utils.upstream_response import count_words
+from services.api_service.utils.mock_upstream import mock_upstream
+from services.common.models.billing import ApiCallLogInfo, PreDeductResult
+from services.common.models.mcp_service import ChargeType
+from services.common.config import Config
 from services.common.logging_config import get_logger
+from services.common.metrics import TOOL_CALL_SECONDS
+from services.common.tracing import SCOPE_CONTEXT_KEY, extract_context, tracer
+from services.common.middleware.admission_middleware import admission_controller
 
 logger = get_logger(__name__)
 
+# Tool list versions kept per service for paginated listings in progress
+_TOOL_SNAPSHOTS_PER_SERVICE = 2
+
+
+@dataclass(frozen=True)
+class McpCaller:
+    """Authenticated caller of an MCP session (user and API key used for billing)"""
+    user_id: str
+    apikey_id: Optional[str] = None
+    # Caps the tool calls of the session running concurrently
+    call_slots: Optional[asyncio.Semaphore] = field(default=None, compare=False)
+
+
+class ToolSnapshot(NamedTuple):
+    """Tools of one tool list version, sorted by name, with their search index (None when not searchable)"""
+    tools: List[types.Tool]
+    index: Optional[ToolSearchIndex] = None
+
+
+# Caller bound to the running MCP session; inherited by the handler tasks spawned by Server.run()
+_current_caller: ContextVar[Optional[McpCaller]] = ContextVar("mcp_current_caller", default=None)
+
 
 class McpServerFactory:
     """MCP server factory class"""
@@ -27,49 +73,236 @@ class McpServerFactory:
     def __init__(self):
         self.tool_service = McpToolService()
         self.billing_service = billing_service
+        # One shared server (and its initialization options) per service
+        self._servers: Dict[str, Tuple[Server, InitializationOptions]] = {}
+        # Converted tool lists (and search indexes) per service, by tool list version
+        self._tool_snapshots: Dict[str, "OrderedDict[str, ToolSnapshot]"] = {}
+        # Every live server per service, including evicted ones still running sessions
+        self._live_servers: Dict[str, "weakref.WeakSet[Server]"] = {}
+
+    @staticmethod
+    @contextmanager
+    def bind_caller(user_id: str, apikey_id: Optional[str] = None):
+        """
+        Bind the caller for MCP requests handled inside this context
+
+        Wrap Server.run() with it so the shared server's handlers can resolve
+        the user and API key of the session they are serving.
+
+        Args:
+            user_id: User ID
+            apikey_id: API key ID for billing records (optional)
+        """
+        max_calls = Config.MCP_SESSION_MAX_CONCURRENT_CALLS
+        call_slots = asyncio.Semaphore(max_calls) if max_calls > 0 else None
+        token = _current_caller.set(McpCaller(user_id=user_id, apikey_id=apikey_id, call_slots=call_slots))
+        try:
+            yield
+        finally:
+            _current_caller.reset(token)
+
+    async def get_server(self, service_id: str) -> Tuple[Server, InitializationOptions]:
+        """
+        Get the shared MCP server for a service, creating it on first use
+
+        The server holds no per-user state; handlers read the caller bound by
+        bind_caller(), so one instance serves every session of the service.
+
+        Args:
+            service_id: Service ID
 
-    async def create_server(self, service_id: str, user_id: Optional[str] = None, apikey_id: Optional[str] = None) -> Server:
+        Returns:
+            Tuple[Server, InitializationOptions]: Shared server and its initialization options
+        """
+        entry = self._servers.get(service_id)
+        if entry is None:
+            server = await self.create_server(service_id)
+            init_options = server.create_initialization_options()
+            init_options.server_name = f"mcp-service-{service_id}"
+            entry = (server, init_options)
+            self._servers[service_id] = entry
+        return entry
+
+    def evict_server(self, service_id: str) -> None:
+        """
+        Drop the shared server of a service (service updated or deleted)
+
+        Sessions already running keep their instance; the next session creates
+        a new one from the current service configuration; their tool definitions
+        are reloaded on the next call.
+        """
+        self._servers.pop(service_id, None)
+        self._clear_tool_caches(service_id)
+
+    def clear_servers(self) -> None:
+        self._servers.clear()
+        for service_id in list(self._live_servers):
+            self._clear_tool_caches(service_id)
+
+    def _clear_tool_caches(self, service_id: str) -> None:
+        """
+        Drop the tool definitions the SDK cached on the service's servers
+
+        The SDK validates tool calls against the definitions of the last listing and
+        only clears them when list_tools returns a plain list; paginated listings
+        return ListToolsResult, so a changed tool list must clear them here.
+        """
+        for server in list(self._live_servers.get(service_id, ())):
+            server._tool_cache.clear()
+
+    async def create_server(self, service_id: str) -> Server:
         """
         Create MCP server for specified service_id
 
         Args:
             service_id: Service ID
-            user_id: User ID (for billing, optional)
-            apikey_id: API key ID for billing records (optional)
 
         Returns:
             Server: Configured MCP server instance
         """
-        logger.info(f"Creating MCP server instance - Service ID: {service_id}, User ID: {user_id}, API Key ID: {apikey_id}...")
+        logger.info(f"Creating MCP server instance - Service ID: {service_id}")
 
         app = Server(f"mcp-service-{service_id}")
+        self._live_servers.setdefault(service_id, weakref.WeakSet()).add(app)
 
         # Register tools list handler
         @app.list_tools()
-        async def list_tools() -> List[types.Tool]:
-            """Return available tools list for this service"""
-            return await self._handle_list_tools(service_id)
+        async def list_tools(request: types.ListToolsRequest) -> types.ListToolsResult:
+            """Return available tools list for this service (a page of it for large services)"""
+            # The SDK passes no request when it reloads its tool cache for a call: list everything
+            if request is None:
+                return types.ListToolsResult(tools=await self._handle_list_tools(service_id))
+            cursor = request.params.cursor if request.params else None
+            return await self._handle_list_tools_page(service_id, cursor)
 
         # Register resources list handler (optional, return empty when not configured)
         @app.list_resources()
         async def list_resources() -> List[types.Resource]:
             return []
 
+        # Large tool results stored server-side, paged with resources/read
+        @app.list_resource_templates()
+        async def list_resource_templates() -> List[types.ResourceTemplate]:
+            if not large_result_store.enabled:
+                return []
+            return [types.ResourceTemplate(
+                uriTemplate=RESULT_URI_TEMPLATE,
+                name="tool-result-chunk",
+                description="Chunk of a tool result too large to return inline",
+                mimeType="text/plain",
+            )]
+
+        @app.read_resource()
+        async def read_resource(uri) -> List[ReadResourceContents]:
+            caller = _current_caller.get()
+            if caller is None or not caller.user_id:
+                raise ValueError("Missing user authentication")
+            return await large_result_store.read(str(uri), caller.user_id, service_id)
+
         # Register tool call handler
         @app.call_tool()
-        async def call_tool(name: str, arguments: dict) -> tuple[List[types.Content], dict]:
+        async def call_tool(name: str, arguments: dict) -> tuple[List[types.Content], dict] | types.CallToolResult:
             """Execute specified tool"""
-            # user_id must exist, otherwise we shouldn't reach here
-            if not user_id:
+            # caller must be bound, otherwise we shouldn't reach here
+            caller = _current_caller.get()
+            if caller is None or not caller.user_id:
                 error_msg = "Missing user authentication"
                 logger.error(error_msg)
                 return [types.TextContent(type="text", text=error_msg)], {}
-            
-            return await self._handle_call_tool_with_billing(service_id, name, arguments, user_id, apikey_id)
+
+            if name == SEARCH_TOOL_NAME:
+                result = await self._handle_search_tools(service_id, arguments)
+                if result is not None:
+                    return result
+
+            deadline = self._request_deadline(app)
+            idempotency_key = self._request_idempotency_key(app)
+            # The session's server task runs outside the HTTP request: continue its trace explicitly
+            with tracer.start_as_current_span(
+                "mcp.tools/call", context=self._request_trace_context(app),
+                attributes={"mcp.service_id": service_id, "mcp.tool": name, "user.id": caller.user_id},
+            ):
+                # Server.run() handles each request in its own task; calls of a session run
+                # concurrently up to the cap, and their pre-deductions are reserved in batches
+                async with caller.call_slots or nullcontext():
+                    with admission_controller.track_inflight():
+                        result, response_data = await self._handle_call_tool_with_billing(
+                            service_id, name, arguments, caller.user_id, caller.apikey_id, deadline, idempotency_key
+                        )
+
+                # Billing saw the full result; the client gets a summary and pages the rest.
+                # Tools declaring an outputSchema must return structuredContent, so their
+                # results are always returned inline
+                if large_result_store.should_offload(result) and not self._has_output_schema(service_id, name):
+                    summary = await large_result_store.offload(caller.user_id, service_id, result)
+                    if summary is not None:
+                        return summary
+                return result, response_data
 
         logger.info("MCP server instance created successfully")
         return app
 
+    @staticmethod
+    def _request_idempotency_key(app: Server) -> Optional[str]:
+        """
+        Idempotency key of the current tools/call, from `_meta.idempotencyKey` or the
+        Idempotency-Key header of the HTTP request carrying it
+        """
+        try:
+            ctx = app.request_context
+        except LookupError:
+            return None
+        key = None
+        if ctx.meta is not None and ctx.meta.model_extra:
+            key = ctx.meta.model_extra.get("idempotencyKey")
+        if not key and ctx.request is not None and hasattr(ctx.request, "headers"):
+            key = ctx.request.headers.get("idempotency-key")
+        if not isinstance(key, str) or not key.strip():
+            return None
+        return key.strip()[:255]
+
+    @staticmethod
+    def _request_trace_context(app: Server) -> Optional[Context]:
+        """
+        Trace context of the current request: the span of the HTTP request carrying it,
+        else a traceparent sent by the client in `_meta` or the HTTP headers
+        """
+        try:
+            ctx = app.request_context
+        except LookupError:
+            return None
+        request = ctx.request
+        scope = getattr(request, "scope", None)
+        if scope is not None and SCOPE_CONTEXT_KEY in scope:
+            return scope[SCOPE_CONTEXT_KEY]
+        if ctx.meta is not None and ctx.meta.model_extra and ctx.meta.model_extra.get("traceparent"):
+            return extract_context(ctx.meta.model_extra)
+        if request is not None and hasattr(request, "headers"):
+            return extract_context(dict(request.headers))
+        return None
+
+    @staticmethod
+    def _request_deadline(app: Server) -> Optional[float]:
+        """
+        Deadline propagated by the client as its remaining budget in `_meta.timeoutMs`
+
+        Returns:
+            Optional[float]: Deadline as a time.monotonic() value, None if not provided
+        """
+        try:
+            meta = app.request_context.meta
+        except LookupError:
+            return None
+        if meta is None or not meta.model_extra:
+            return None
+        try:
+            timeout_ms = float(meta.model_extra.get("timeoutMs"))
+        except (TypeError, ValueError):
+            return None
+        if timeout_ms <= 0:
+            return None
+        return time.monotonic() + timeout_ms / 1000.0
+
     async def _handle_list_tools(self, service_id: str) -> List[types.Tool]:
         """
         Handle tools list query
@@ -81,20 +314,143 @@ class McpServerFactory:
             List[types.Tool]: Tools list
         """
         logger.info(f"Received tools list query request - Service ID: {service_id}")
+        _, snapshot = await self._get_tools_snapshot(service_id)
+        if snapshot.index is not None:
+            return [search_tool_definition()] + snapshot.tools
+        return snapshot.tools
+
+    async def _handle_list_tools_page(self, service_id: str, cursor: Optional[str]) -> types.ListToolsResult:
+        """
+        Handle a paginated tools list query
+
+        Cursors carry the tool list version and the last tool name of the page. While
+        that version is still cached, following pages come from the same snapshot, so
+        a listing in progress is not affected by tool updates; otherwise the listing
+        continues after that name in the current list.
+
+        Args:
+            service_id: Service ID
+            cursor: Cursor from the previous page's nextCursor (None for the first page)
+
+        Returns:
+            types.ListToolsResult: Page of tools and the cursor of the next page
+        """
+        logger.info(f"Received tools list query request - Service ID: {service_id}, Cursor: {cursor}")
+        version, snapshot = await self._get_tools_snapshot(service_id)
+        start = 0
+        if cursor:
+            cursor_version, after = self._decode_tools_cursor(cursor)
+            previous = self._tool_snapshots.get(service_id, {}).get(cursor_version)
+            if previous is not None:
+                version, snapshot = cursor_version, previous
+            start = bisect.bisect_right(snapshot.tools, after, key=lambda tool: tool.name)
+        tools = snapshot.tools
+
+        page_size = Config.MCP_TOOLS_PAGE_SIZE
+        if page_size <= 0:
+            page = tools[start:]
+        else:
+            page = tools[start:start + page_size]
+        next_cursor = None
+        if page_size > 0 and start + page_size < len(tools):
+            next_cursor = self._encode_tools_cursor(version, page[-1].name)
+        # The search meta-tool leads the first page
+        if start == 0 and snapshot.index is not None:
+            page = [search_tool_definition()] + page
+        return types.ListToolsResult(tools=page, nextCursor=next_cursor)
+
+    async def _handle_search_tools(self, service_id: str, arguments: dict) -> Optional[types.CallToolResult]:
+        """
+        Rank the service's tools against a query (the search meta-tool; not billed)
 
+        Returns:
+            Optional[types.CallToolResult]: Matching tools with their schemas, None if the
+            service has no search index (the name is then handled as a regular tool)
+        """
+        _, snapshot = await self._get_tools_snapshot(service_id)
+        if snapshot.index is None:
+            return None
+        query = str(arguments.get("query") or "")
+        limit = min(max(int(arguments.get("limit") or 10), 1), MAX_SEARCH_LIMIT)
+        matches = snapshot.index.search(query, limit)
+        logger.info(f"Tool search - Service ID: {service_id}, Query: {query[:100]}, Results: {len(matches)}")
+
+        found = []
+        for tool, score in matches:
+            entry = {"name": tool.name, "description": tool.description, "score": round(score, 3), "inputSchema": tool.inputSchema}
+            if tool.outputSchema:
+                entry["outputSchema"] = tool.outputSchema
+            found.append(entry)
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=json.dumps(found, ensure_ascii=False))],
+            structuredContent={"tools": found},
+        )
+
+    def _is_listed_tool(self, service_id: str, name: str) -> bool:
+        """Whether the latest loaded tool list of the service has the tool (True if none is loaded yet)"""
+        snapshots = self._tool_snapshots.get(service_id)
+        if not snapshots:
+            return True
+        return self._find_tool(service_id, name) is not None
+
+    def _has_output_schema(self, service_id: str, name: str) -> bool:
+        """Whether the tool declares an outputSchema (assumed if the tool list is not loaded)"""
+        if not self._tool_snapshots.get(service_id):
+            return True
+        tool = self._find_tool(service_id, name)
+        return tool is None or tool.outputSchema is not None
+
+    def _find_tool(self, service_id: str, name: str) -> Optional[types.Tool]:
+        """Tool of the latest loaded tool list of the service"""
+        snapshots = self._tool_snapshots.get(service_id)
+        if not snapshots:
+            return None
+        tools = next(reversed(snapshots.values())).tools
+        index = bisect.bisect_left(tools, name, key=lambda tool: tool.name)
+        if index < len(tools) and tools[index].name == name:
+            return tools[index]
+        return None
+
+    async def _get_tools_snapshot(self, service_id: str) -> Tuple[str, "ToolSnapshot"]:
+        """
+        Get the current tool list version and its tools, sorted by name
+
+        The version is checked on every call (ids and update times only); the tools
+        are converted (and the search index built) again only when it changed.
+        """
         db = next(get_db())
         try:
-            # Create service instance
             mcp_service = self._create_mcp_service(db)
-
-            # Get tools list
-            tools = mcp_service.get_tools_by_service_id(service_id)
-            logger.info(f"Found {len(tools)} tools")
+            version = mcp_service.get_tools_version(service_id)
+            snapshots = self._tool_snapshots.setdefault(service_id, OrderedDict())
+            snapshot = snapshots.get(version)
+            if snapshot is not None:
+                return version, snapshot
+            if snapshots:
+                self._clear_tool_caches(service_id)
+
+            # Get tools list; schema parsing/inference scales with the stored schemas and examples
+            tool_apis = mcp_service.get_tool_apis(service_id)
+            schema_size = sum(len(api.response_schema or "") + len(api.response_examples or "") for api in tool_apis)
+            tools = await cpu_offloader.run("tool_schemas", schema_size, mcp_service.convert_apis_to_tools, tool_apis)
+            tools.sort(key=lambda tool: tool.name)
+            logger.info(f"Found {len(tools)} tools - Version: {version}")
 
             for tool in tools:
                 logger.debug(f"Tool: {tool.name} - {tool.description}")
 
-            return tools
+            # Services with many tools get the search meta-tool (unless a tool already has its name)
+            index = None
+            min_tools = Config.MCP_TOOL_SEARCH_MIN_TOOLS
+            if 0 < min_tools <= len(tools) and not any(tool.name == SEARCH_TOOL_NAME for tool in tools):
+                text_size = sum(len(tool.description or "") for tool in tools)
+                index = await cpu_offloader.run("tool_search_index", text_size, ToolSearchIndex, tools)
+
+            # Keep the previous version too, for listings that started before the update
+            snapshot = snapshots[version] = ToolSnapshot(tools, index)
+            while len(snapshots) > _TOOL_SNAPSHOTS_PER_SERVICE:
+                snapshots.popitem(last=False)
+            return version, snapshot
 
         except Exception as e:
             logger.error(f"Failed to get tools list: {str(e)}", exc_info=True)
@@ -102,27 +458,109 @@ class McpServerFactory:
         finally:
             db.close()
 
-    async def _handle_call_tool_with_billing(self, service_id: str, name: str, arguments: dict, user_id: str, apikey_id: Optional[str] = None) -> tuple[List[types.Content], dict]:
+    @staticmethod
+    def _encode_tools_cursor(version: str, after: str) -> str:
+        payload = json.dumps({"v": version, "a": after}, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii")
+
+    @staticmethod
+    def _decode_tools_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return str(payload["v"]), str(payload["a"])
+        except Exception:
+            raise McpError(types.ErrorData(code=types.INVALID_PARAMS, message="Invalid cursor")) from None
+
+    async def _handle_call_tool_with_billing(self, service_id: str, name: str, arguments: dict, user_id: str, apikey_id: Optional[str] = None, deadline: Optional[float] = None, idempotency_key: Optional[str] = None) -> tuple[List[types.Content], dict]:
         """
         Handle tool call with billing logic
 
+        With an idempotency key, a retry of a successful call replays the stored
+        result without contacting the upstream or charging again, and concurrent
+        retries wait for the first call.
+
         Args:
             service_id: Service ID
             name: Tool name
             arguments: Tool arguments
             user_id: User ID
             apikey_id: API key ID for billing records
+            deadline: Caller deadline (time.monotonic() based) for the upstream call
+            idempotency_key: Client supplied idempotency key (optional)
 
         Returns:
             List[types.Content]: Execution result
         """
+        claim = None
+        if idempotency_key:
+            fingerprint = idempotency_store.fingerprint(service_id, name, arguments)
+            try:
+                claim = await idempotency_store.claim(apikey_id or user_id, idempotency_key, fingerprint)
+            except Exception as e:
+                logger.warning(f"Idempotency check failed, executing without it: {e}")
+            if claim is not None and claim.outcome == REPLAY:
+                logger.info(f"Replaying idempotent tool call result - User ID: {user_id}, Tool: {name}")
+                return claim.result
+            if claim is not None and claim.outcome == CONFLICT:
+                return [types.TextContent(type="text", text="Idempotency key was already used for a different tool call")], {}
+            if claim is not None and claim.outcome == BUSY:
+                return [types.TextContent(type="text", text="A call with this idempotency key is still in progress, retry later")], {}
+
+        started = time.perf_counter()
+        # Client supplied names only become labels when they are listed tools
+        tool_label = name if self._is_listed_tool(service_id, name) else "unknown"
+        try:
+            async with idempotency_store.keep_alive(claim) if claim is not None else nullcontext():
+                result, response_data, call_success = await self._execute_call_tool_with_billing(service_id, name, arguments, user_id, apikey_id, deadline)
+        except BaseException:
+            TOOL_CALL_SECONDS.labels(service_id, tool_label, "exception").observe(time.perf_counter() - started)
+            if claim is not None:
+                await idempotency_store.release(claim)
+            raise
+        TOOL_CALL_SECONDS.labels(service_id, tool_label, "success" if call_success else "error").observe(time.perf_counter() - started)
+        if claim is not None:
+            if call_success:
+                await idempotency_store.complete(claim, fingerprint, result, response_data)
+            else:
+                await idempotency_store.release(claim)
+        return result, response_data
+
+    async def _execute_call_tool_with_billing(self, service_id: str, name: str, arguments: dict, user_id: str, apikey_id: Optional[str] = None, deadline: Optional[float] = None) -> tuple[List[types.Content], dict, bool]:
+        """
+        Pre-deduct, execute the tool and send the billing message
+
+        Returns:
+            tuple[List[types.Content], dict, bool]: Execution result, structured result, success
+        """
         call_start_time = datetime.now(timezone.utc)
 
         logger.info(f"Received tool call request with billing - User ID: {user_id}, Service ID: {service_id}, Tool name: {name}")
         logger.debug(f"Tool arguments: {arguments}")
 
-        # 1. Pre-deduction check
-        pre_deduct_result = await self.billing_service.check_and_pre_deduct(user_id, service_id, name)
+        # Service call parameters decide between the upstream and the mock upstream
+        db = next(get_db())
+        try:
+            call_params = self._create_mcp_service(db).get_service_call_params(service_id)
+        except Exception as e:
+            logger.error(f"Failed to load service call params - Service ID: {service_id}: {str(e)}", exc_info=True)
+            return [types.TextContent(type="text", text=f"Tool execution failed: {str(e)}")], {}, False
+        finally:
+            db.close()
+        mock = mock_upstream.is_enabled(call_params)
+
+        # 1. Pre-deduction check (mock calls are free unless the service opts into charging them)
+        if mock and not mock_upstream.is_charged(call_params):
+            pre_deduct_result = PreDeductResult(
+                success=True,
+                message="Mock upstream",
+                service_price=Decimal("0"),
+                user_balance=Decimal("0"),
+                input_token_price=Decimal("0"),
+                output_token_price=Decimal("0"),
+                charge_type=ChargeType.FREE.value,
+            )
+        else:
+            pre_deduct_result = await self.billing_service.check_and_pre_deduct(user_id, service_id, name)
         if not pre_deduct_result.success:
             logger.warning(f"Pre-deduction failed: {pre_deduct_result.message}")
             error_msg = f"Billing check failed: {pre_deduct_result.message}"
@@ -145,7 +583,7 @@ class McpServerFactory:
 
             # If tool API id not found, skip sending billing message to avoid FK errors
             if not api_id_for_log:
-                return [types.TextContent(type="text", text=error_msg)], {}
+                return [types.TextContent(type="text", text=error_msg)], {}, False
 
             call_log = ApiCallLogInfo(
                 user_id=user_id,
@@ -160,10 +598,11 @@ class McpServerFactory:
                 output_token=Decimal("0"),
                 charge_type=pre_deduct_result.charge_type,
                 apikey_id=apikey_id,
+                mock=mock,
             )
             await self.billing_service.send_billing_message(call_log, False, datetime.now(timezone.utc))
 
-            return [types.TextContent(type="text", text=error_msg)],{}
+            return [types.TextContent(type="text", text=error_msg)],{},False
 
         logger.info(f"Pre-deduction successful - User ID: {user_id}, Deduction amount: {pre_deduct_result.service_price}")
         amount = pre_deduct_result.service_price
@@ -196,19 +635,24 @@ class McpServerFactory:
             logger.error(error_msg)
             # Close DB and return error without sending billing message to avoid FK violation
             db.close()
-            return [types.TextContent(type="text", text=error_msg)],{}
+            return [types.TextContent(type="text", text=error_msg)],{},False
 
         try:
             logger.info(f"Found tool configuration: {tool_config.name}")
 
-            # Get service authentication info
-            call_params = mcp_service.get_service_call_params(service_id)
             logger.debug(f"Call params: {call_params}")
+            # Return the DB connection before waiting on the upstream, so slow upstreams
+            # cannot drain the pool shared with every other service
+            db.close()
 
             # Execute tool
-            result,response_data,call_success = await self.tool_service.execute_tool(tool_config, arguments, call_params)
+            result,response_data,call_success = await self.tool_service.execute_tool(tool_config, arguments, call_params, deadline)
             if call_success:
-                validation_ok, validation_msg = self._validate_output_schema(tool_config, response_data)
+                result_size = sum(len(content.text) for content in result if isinstance(content, types.TextContent))
+                with tracer.start_as_current_span("tool.output_validation", attributes={"result.size": result_size}):
+                    validation_ok, validation_msg = await cpu_offloader.run(
+                        "output_validation", result_size, self._validate_output_schema, tool_config, response_data
+                    )
                 
                 if not validation_ok:
                     call_success = False
@@ -219,11 +663,9 @@ class McpServerFactory:
                     logger.info(f"Tool call successful - User ID: {user_id}, Tool: {name}")
             
             if pre_deduct_result.charge_type == "per_token" and result and call_success:
-                output_text = ""
-                for content in result:
-                    if isinstance(content, types.TextContent):
-                        output_text += content.text
-                estimated_output_tokens = len(output_text.split()) * 1.3  # Rough estimation: 1.3 tokens per word
+                # Count words in place instead of concatenating/splitting large results
+                output_words = sum(count_words(content.text) for content in result if isinstance(content, types.TextContent))
+                estimated_output_tokens = output_words * 1.3  # Rough estimation: 1.3 tokens per word
                 output_token = estimated_output_tokens
                 # Calculate output token amount (prices are per million tokens)
                 output_token_amount = (Decimal(str(estimated_output_tokens)) / Decimal("1000000")) * pre_deduct_result.output_token_price
@@ -256,13 +698,14 @@ class McpServerFactory:
                 call_start_time=call_start_time,
                 call_end_time=call_end_time,
                 apikey_id=apikey_id,
+                mock=mock,
             )
 
             await self.billing_service.send_billing_message(call_log, call_success, call_end_time)
         logger.info(f"Billing message sent - User ID: {user_id}, Tool: {name}, Success: {call_success}")
 
         # Ensure return type is correct
-        return result,response_data
+        return result,response_data,call_success
 
     def _validate_output_schema(self, tool_config, response_data: dict) -> tuple[bool, str]:
         try:
@@ -1,4 +1,5 @@
 import json
+import hashlib
 import ast
 import mcp.types as types
 from typing import List, Optional
@@ -9,6 +10,8 @@ from services.common.models.mcp_service import McpService as McpServiceModel
 from services.api_service.repositories.mcp_tool_api_repository import McpToolApiRepository
 from services.api_service.repositories.mcp_service_repository import McpServiceRepository
 from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
 
 
 class McpService:
@@ -98,9 +101,57 @@ class McpService:
             List[types.Tool]: MCP tools list
         """
         # Get tool configuration from database
-        tool_apis = self.tool_api_repository.get_by_service_id(service_id)
+        tool_apis = self.get_tool_apis(service_id)
+        return self.convert_apis_to_tools(tool_apis)
+
+    def get_tool_apis(self, service_id: str) -> List[McpToolApi]:
+        """
+        Get tool API configurations of the service
         
-        # Convert to MCP tool format
+        Args:
+            service_id: Service ID
+            
+        Returns:
+            List[McpToolApi]: Tool API configurations
+        """
+        return self.tool_api_repository.get_by_service_id(service_id)
+
+    def get_tools_version(self, service_id: str) -> str:
+        """
+        Get a version string of the service's tool list
+
+        Changes whenever a tool is added, removed, enabled/disabled or updated. Update
+        times have one-second resolution, so the revision counter the admin service
+        increments on every update is part of the version too.
+
+        Args:
+            service_id: Service ID
+
+        Returns:
+            str: Tool list version
+        """
+        rows = sorted(self.tool_api_repository.get_versions_by_service_id(service_id))
+        digest = hashlib.sha256()
+        try:
+            revision = redis_client.client.get(RedisKeys.mcp_tools_revision_key(service_id)) or ""
+        except Exception as e:
+            self.logger.warning(f"Failed to get tool list revision - Service ID: {service_id}: {str(e)}")
+            revision = ""
+        digest.update(f"{revision};".encode("utf-8"))
+        for api_id, updated_at in rows:
+            digest.update(f"{api_id}:{updated_at.isoformat() if updated_at else ''};".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def convert_apis_to_tools(self, tool_apis: List[McpToolApi]) -> List[types.Tool]:
+        """
+        Convert tool API configurations to MCP tools (pure CPU work, safe to run in a worker thread)
+        
+        Args:
+            tool_apis: Tool API configurations
+            
+        Returns:
+            List[types.Tool]: MCP tools list
+        """
         tools = []
         for tool_api in tool_apis:
             tool = self._convert_api_to_tool(tool_api)
@@ -280,7 +331,11 @@ class McpService:
                     headers[item["name"]] = item["value"]
         return {
             "base_url": service.base_url or "",
-            "headers": headers
+            "headers": headers,
+            "auth_config": service.auth_config,
+            "mock_enabled": getattr(service, "mock_enabled", 0),
+            "mock_billing_enabled": getattr(service, "mock_billing_enabled", 0),
+            "isolation_pool": getattr(service, "isolation_pool", None),
         }
 
     def _build_output_schema(self,tool_api:McpToolApi) -> Optional[dict]:
@@ -1,12 +1,23 @@
 """
 MCP tool service - Business logic for executing MCP tool calls
 """
-import json
-from typing import List, Dict, Any
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional
+import httpx
 import mcp.types as types
 from mcp.shared._httpx_utils import create_mcp_http_client
+from opentelemetry.trace import SpanKind
 from services.api_service.utils.http_client import HttpRequestBuilder
+from services.api_service.utils.latency_histogram import upstream_latency
+from services.api_service.utils.upstream_auth import upstream_auth
+from services.api_service.utils.mock_upstream import MOCK_META_KEY, mock_upstream
+from services.api_service.utils.bulkhead import bulkhead
+from services.api_service.utils import upstream_response
+from services.common.config import Config
 from services.common.logging_config import get_logger
+from services.common.tracing import tracer
 
 logger = get_logger(__name__)
 
@@ -17,7 +28,7 @@ class McpToolService:
     def __init__(self):
         self.http_builder = HttpRequestBuilder()
     
-    async def execute_tool(self, tool_config, arguments: dict, call_params: dict) -> tuple[List[types.Content],dict,bool]:
+    async def execute_tool(self, tool_config, arguments: dict, call_params: dict, deadline: Optional[float] = None) -> tuple[List[types.Content],dict,bool]:
         """
         Execute tool call
         
@@ -25,6 +36,7 @@ class McpToolService:
             tool_config: Tool configuration
             arguments: Tool parameters
             auth_info: Service authentication information
+            deadline: Caller deadline (time.monotonic() based), capped by the tool timeout
             
         Returns:
             List[types.Content]: Execution result
@@ -32,29 +44,71 @@ class McpToolService:
         try:
             logger.info(f"Starting tool execution: {tool_config.name}")
             
-            # Build HTTP request
-            request_info = self.http_builder.build_request(tool_config, arguments, call_params)
-            
-            # Send HTTP request
-            response_text = await self._send_http_request(request_info)
+            # The tool timeout bounds the call; a tighter caller deadline wins
+            timeout_ms = getattr(tool_config, "timeout_ms", None) or Config.UPSTREAM_DEFAULT_TIMEOUT_MS
+            tool_deadline = time.monotonic() + timeout_ms / 1000.0
+            if deadline is None or deadline > tool_deadline:
+                deadline = tool_deadline
+
+            if bulkhead.enabled:
+                # Calls of the service's isolation pool share its slots and connections;
+                # waiting for a slot counts against the deadline
+                pool = bulkhead.pool_for(call_params.get("isolation_pool"))
+                async with pool.slot(min(bulkhead.max_wait_seconds, deadline - time.monotonic())):
+                    response_text = await self._call_upstream(tool_config, arguments, call_params, deadline, pool.client)
+            else:
+                response_text = await self._call_upstream(tool_config, arguments, call_params, deadline)
+            # Parsed once; validation, token counting and the MCP result share it
             if response_text:
-                response_data = json.loads(response_text)
+                response_data = upstream_response.loads(response_text)
             else:
                 response_data = {}
             logger.info("Tool execution completed successfully")
-            return [types.TextContent(type="text", text=response_text)],response_data,True
+            meta = {MOCK_META_KEY: True} if mock_upstream.is_enabled(call_params) else None
+            return [types.TextContent(type="text", text=response_text, _meta=meta)],response_data,True
             
         except Exception as e:
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 401:
+                # Token revoked before its expiry: the next call fetches a new one
+                upstream_auth.invalidate(tool_config.service_id, call_params.get("auth_config"))
             error_msg = f"Tool execution failed: {str(e)}"
             logger.error(f"Tool execution failed: {error_msg}", exc_info=True)
             return [types.TextContent(type="text", text=error_msg)],{},False
     
-    async def _send_http_request(self, request_info: Dict[str, Any]) -> str:
+    async def _call_upstream(self, tool_config, arguments: dict, call_params: dict, deadline: float, client: Optional[httpx.AsyncClient] = None) -> str:
+        """
+        Get the upstream (or mock) response text of a tool call
+
+        Args:
+            client: Shared client of the service's isolation pool, a client per call if omitted
+        """
+        if mock_upstream.is_enabled(call_params):
+            # Response examples instead of the upstream (no upstream credentials needed)
+            self.http_builder.build_request(tool_config, arguments, call_params)
+            return await mock_upstream.respond(tool_config, deadline)
+
+        # Upstream token (cached; only fetched when missing or expired)
+        auth_headers = await upstream_auth.get_auth_headers(tool_config.service_id, call_params.get("auth_config"))
+        if auth_headers:
+            call_params = {**call_params, "auth_headers": auth_headers}
+
+        # Build HTTP request
+        request_info = self.http_builder.build_request(tool_config, arguments, call_params)
+
+        # Send HTTP request
+        hedge = bool(getattr(tool_config, "hedge_enabled", 0)) and Config.UPSTREAM_HEDGE_ENABLED
+        return await self._send_http_request(request_info, deadline, tool_config.id, hedge, client)
+
+    async def _send_http_request(self, request_info: Dict[str, Any], deadline: float, tool_id: Optional[str] = None, hedge: bool = False, client: Optional[httpx.AsyncClient] = None) -> str:
         """
         Send HTTP request
         
         Args:
             request_info: Request information dictionary
+            deadline: Time (time.monotonic() based) by which the response must be received
+            tool_id: Tool ID keying the latency histogram
+            hedge: Hedge GET requests slower than the tool's latency quantile
+            client: Shared HTTP client to send with, a client per call if omitted
             
         Returns:
             str: Response text
@@ -68,23 +122,84 @@ class McpToolService:
         logger.info(f"Sending HTTP request: {method} {url}")
         logger.debug(f"Query parameters: {query_params}")
         # logger.debug(f"Request body: {request_body}")
-        
-        async with create_mcp_http_client(headers=headers) as client:
-            if method == "GET":
-                response = await client.get(url, params=query_params)
-            elif method == "POST":
-                response = await client.post(url, params=query_params, json=request_body)
-            elif method == "PUT":
-                response = await client.put(url, params=query_params, json=request_body)
-            elif method == "DELETE":
-                response = await client.delete(url, params=query_params)
-            elif method == "PATCH":
-                response = await client.patch(url, params=query_params, json=request_body)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            logger.info(f"HTTP response status code: {response.status_code}")
-            response.raise_for_status()
-            response_text = response.text
-            logger.debug(f"Response length: {len(response_text)}")
-            return response_text
+
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            raise TimeoutError("Deadline exceeded before sending the upstream request")
+        # Only idempotent GETs are hedged, and only when the hedge can still finish in time
+        hedge_delay = upstream_latency.hedge_delay(tool_id) if hedge and tool_id and method == "GET" else None
+        if hedge_delay is not None and hedge_delay >= timeout:
+            hedge_delay = None
+
+        if method in ("GET", "DELETE"):
+            request_body = None
+        elif method not in ("POST", "PUT", "PATCH"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        started = time.monotonic()
+        # Query parameters stay out of the span, they may carry upstream credentials
+        with tracer.start_as_current_span(
+            "upstream.http", kind=SpanKind.CLIENT,
+            attributes={"http.request.method": method, "url.full": url, "upstream.hedged": hedge_delay is not None},
+        ) as span:
+            try:
+                async with nullcontext(client) if client is not None else create_mcp_http_client() as client:
+                    async with asyncio.timeout(timeout):
+                        request = client.build_request(
+                            method, url, params=query_params, json=request_body, headers=headers, timeout=httpx.Timeout(timeout)
+                        )
+                        # Streamed so the body is only read after the status and size checks
+                        if hedge_delay is None:
+                            response = await client.send(request, stream=True)
+                        else:
+                            response = await self._hedged_send(client, request, hedge_delay)
+                        try:
+                            if tool_id:
+                                upstream_latency.record(tool_id, time.monotonic() - started)
+                            logger.info(f"HTTP response status code: {response.status_code}")
+                            span.set_attribute("http.response.status_code", response.status_code)
+                            response.raise_for_status()
+                            body = await upstream_response.read_bounded(response, Config.UPSTREAM_MAX_RESPONSE_BYTES)
+                        finally:
+                            await response.aclose()
+            except (TimeoutError, httpx.TimeoutException):
+                raise TimeoutError(f"Upstream request timed out after {timeout * 1000:.0f} ms") from None
+            span.set_attribute("http.response.body.size", len(body))
+
+        logger.debug(f"Response length: {len(body)}")
+        return upstream_response.decode_text(response, body)
+
+    @staticmethod
+    async def _hedged_send(client: httpx.AsyncClient, request: httpx.Request, delay: float) -> httpx.Response:
+        """
+        Send a (GET) request with a backup sent after `delay`; the first successful
+        response wins and the other request is cancelled or closed
+        """
+        primary = asyncio.create_task(client.send(request, stream=True))
+        tasks = [primary]
+        winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                winner = primary
+                return primary.result()
+
+            logger.info(f"Hedging slow GET after {delay * 1000:.0f} ms: {request.url}")
+            upstream_latency.hedges_sent += 1
+            tasks.append(asyncio.create_task(client.send(request, stream=True)))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # A failed request only loses if the other one can still answer
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    if task.exception() is None or not pending:
+                        if task is not primary and task.exception() is None:
+                            upstream_latency.hedges_won += 1
+                        winner = task
+                        return task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif task is not winner and not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
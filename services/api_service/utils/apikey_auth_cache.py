@@ -0,0 +1,248 @@
+"""
+API key auth cache - Process-local TTL/LRU cache in front of the Redis/MySQL API key lookup
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from services.api_service.repositories.user_apikey_repository import UserApiKeyRepository
+from services.api_service.repositories.user_repository import UserRepository
+from services.common.config import Config
+from services.common.database import get_db
+from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+from services.common.utils import auth_invalidation
+
+logger = get_logger(__name__)
+
+
+class ApiKeyAuth(NamedTuple):
+    """Compact auth result for a valid API key"""
+    user_id: str
+    apikey_id: str
+    # Expiry as a UTC epoch timestamp, None if the key never expires
+    expire_at: Optional[float]
+    group_id: Optional[str]
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return self.expire_at is not None and self.expire_at < (now if now is not None else time.time())
+
+
+class ApiKeyAuthCache:
+    """
+    Two-tier API key auth cache
+
+    The first tier is a process-local LRU of apikey -> (ApiKeyAuth | None, cached_until);
+    misses fall through to UserApiKeyRepository (Redis, then MySQL). Unknown or revoked
+    keys are cached negatively for a shorter TTL so invalid keys do not reach MySQL on
+    every request. Entries are dropped immediately on admin changes via the Redis
+    auth invalidation channel (see services.common.utils.auth_invalidation).
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = Config.APIKEY_AUTH_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: int = Config.APIKEY_AUTH_NEGATIVE_TTL_SECONDS,
+        max_entries: int = Config.APIKEY_AUTH_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[ApiKeyAuth], float]]" = OrderedDict()
+        # user_id -> API keys cached for that user (for user-level invalidation)
+        self._user_keys: Dict[str, Set[str]] = {}
+        # Guards the maps above; the invalidation listener runs in its own thread
+        self._lock = threading.Lock()
+        self._listener_thread: Optional[threading.Thread] = None
+        self._listener_stop = threading.Event()
+        # Extra invalidation kinds handled by other process-local caches: kind -> handlers(value)
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._reset_handlers: List[Callable[[], None]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, apikey: str) -> Optional[ApiKeyAuth]:
+        """
+        Resolve an API key
+
+        Args:
+            apikey: API key from the request
+
+        Returns:
+            Optional[ApiKeyAuth]: Auth info for an existing, not deleted key (expiry is
+            not checked here, see ApiKeyAuth.is_expired), None otherwise
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(apikey)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(apikey)
+                self.hits += 1
+                return entry[0]
+        self.misses += 1
+
+        found, auth = self._load(apikey)
+        if found:
+            ttl = self.ttl_seconds if auth is not None else self.negative_ttl_seconds
+            self._put(apikey, auth, now + ttl)
+        return auth
+
+    def invalidate_apikey(self, apikey: str) -> None:
+        """Drop a cached API key"""
+        with self._lock:
+            entry = self._entries.pop(apikey, None)
+            if entry is not None and entry[0] is not None:
+                self._unindex(entry[0].user_id, apikey)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop all cached API keys of a user (e.g. after a resource group change)"""
+        with self._lock:
+            for apikey in self._user_keys.pop(user_id, set()):
+                self._entries.pop(apikey, None)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _put(self, apikey: str, auth: Optional[ApiKeyAuth], cached_until: float) -> None:
+        with self._lock:
+            previous = self._entries.pop(apikey, None)
+            if previous is not None and previous[0] is not None:
+                self._unindex(previous[0].user_id, apikey)
+            self._entries[apikey] = (auth, cached_until)
+            if auth is not None:
+                self._user_keys.setdefault(auth.user_id, set()).add(apikey)
+            while len(self._entries) > self.max_entries:
+                evicted_key, (evicted, _) = self._entries.popitem(last=False)
+                if evicted is not None:
+                    self._unindex(evicted.user_id, evicted_key)
+
+    def _unindex(self, user_id: str, apikey: str) -> None:
+        keys = self._user_keys.get(user_id)
+        if keys is not None:
+            keys.discard(apikey)
+            if not keys:
+                del self._user_keys[user_id]
+
+    def _load(self, apikey: str) -> Tuple[bool, Optional[ApiKeyAuth]]:
+        """
+        Load an API key from Redis/MySQL
+
+        Returns:
+            Tuple[bool, Optional[ApiKeyAuth]]: (lookup completed, auth); lookup errors
+            return (False, None) so they are not cached negatively
+        """
+        db = None
+        try:
+            db = next(get_db())
+            user_apikey = UserApiKeyRepository(db).get_by_apikey(apikey)
+            if not user_apikey or getattr(user_apikey, "is_deleted", 0):
+                return True, None
+
+            expire_at = None
+            if user_apikey.expire_at:
+                # Database time has no timezone info, assume UTC
+                if user_apikey.expire_at.tzinfo is None:
+                    expire_at = user_apikey.expire_at.replace(tzinfo=timezone.utc).timestamp()
+                else:
+                    expire_at = user_apikey.expire_at.timestamp()
+
+            user = UserRepository(db).get_by_id(user_apikey.user_id)
+            group_id = user.group_id if user else None
+            return True, ApiKeyAuth(user_apikey.user_id, user_apikey.id, expire_at, group_id)
+        except Exception as e:
+            logger.error(f"Error occurred while loading apikey: {str(e)}", exc_info=True)
+            return False, None
+        finally:
+            if db is not None:
+                db.close()
+
+    def add_invalidation_handler(
+        self, kind: str, handler: Callable[[str], None], reset: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Route another invalidation kind to a process-local cache (several caches may
+        register the same kind)
+
+        Args:
+            kind: Message kind (see services.common.utils.auth_invalidation)
+            handler: Called with the message value
+            reset: Called when the listener (re)subscribes and may have missed messages
+        """
+        self._handlers.setdefault(kind, []).append(handler)
+        if reset is not None:
+            self._reset_handlers.append(reset)
+
+    def start_invalidation_listener(self) -> None:
+        """Subscribe to the auth invalidation channel in a daemon thread"""
+        if self._listener_thread is not None and self._listener_thread.is_alive():
+            return
+        self._listener_stop.clear()
+        self._listener_thread = threading.Thread(
+            target=self._listen, name="apikey-auth-invalidation", daemon=True
+        )
+        self._listener_thread.start()
+
+    def stop_invalidation_listener(self) -> None:
+        self._listener_stop.set()
+        if self._listener_thread is not None:
+            self._listener_thread.join(timeout=5)
+            self._listener_thread = None
+
+    def _listen(self) -> None:
+        channel = RedisKeys.auth_invalidation_channel()
+        while not self._listener_stop.is_set():
+            pubsub = None
+            try:
+                pubsub = redis_client.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(channel)
+                # Messages may have been missed while (re)connecting
+                self.clear()
+                for reset in self._reset_handlers:
+                    reset()
+                while not self._listener_stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._apply_invalidation(message.get("data") or "")
+            except Exception as e:
+                logger.warning(f"Auth invalidation listener error, reconnecting: {e}")
+                self._listener_stop.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _apply_invalidation(self, data: str) -> None:
+        kind, _, value = data.partition(":")
+        if kind == auth_invalidation.APIKEY:
+            self.invalidate_apikey(value)
+        elif kind == auth_invalidation.USER:
+            self.invalidate_user(value)
+        elif kind in self._handlers:
+            for handler in self._handlers[kind]:
+                handler(value)
+        else:
+            logger.warning(f"Unknown auth invalidation message: {kind}")
+
+
+# Global instance
+apikey_auth_cache = ApiKeyAuthCache()
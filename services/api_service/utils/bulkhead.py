@@ -0,0 +1,158 @@
+"""
+Bulkhead - Isolation pools bounding the concurrent upstream calls and connections of groups of services
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_POOL = "default"
+
+
+class BulkheadFullError(Exception):
+    """No slot of the service's isolation pool freed up in time"""
+
+    def __init__(self, pool: str):
+        super().__init__(f"Service is at its concurrency limit (pool '{pool}'), retry later")
+        self.pool = pool
+
+
+class IsolationPool:
+    """
+    Concurrency slots and a dedicated upstream connection pool shared by a group of services
+
+    A call waits a bounded time for a slot and is rejected after that, so a slow
+    upstream queues up (and fails fast) in its own pool instead of holding the
+    worker's connections, DB sessions and memory used by the other services.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_connections: int):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_connections = max_connections
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, timeout: float):
+        """Hold one of the pool's call slots, waiting at most `timeout` seconds for it"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(max(timeout, 0)):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(self.name) from None
+        finally:
+            self.waiting -= 1
+        self.wait_seconds += time.monotonic() - started
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Upstream HTTP client of the pool (keep-alive connections reused by its services)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_connections": self.max_connections,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+class BulkheadManager:
+    """
+    Isolation pools of an API worker
+
+    Services are assigned to a pool by name (mcp_service.isolation_pool); services
+    without one share the default pool. Limits of named pools come from
+    BULKHEAD_POOLS ("name:max_concurrent:max_connections", comma separated), other
+    pools use the default limits.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = Config.BULKHEAD_ENABLED,
+        pool_limits: str = Config.BULKHEAD_POOLS,
+        default_max_concurrent: int = Config.BULKHEAD_DEFAULT_MAX_CONCURRENT,
+        default_max_connections: int = Config.BULKHEAD_DEFAULT_MAX_CONNECTIONS,
+        max_wait_ms: float = Config.BULKHEAD_MAX_WAIT_MS,
+    ):
+        self.enabled = enabled
+        self.default_limits = (default_max_concurrent, default_max_connections)
+        self.max_wait_seconds = max_wait_ms / 1000.0
+        self._limits = self._parse_limits(pool_limits)
+        self._pools: Dict[str, IsolationPool] = {}
+
+    def _parse_limits(self, value: str) -> Dict[str, Tuple[int, int]]:
+        limits = {}
+        for item in value.split(","):
+            if not item.strip():
+                continue
+            parts = [part.strip() for part in item.split(":")]
+            try:
+                max_concurrent = int(parts[1]) if len(parts) > 1 else self.default_limits[0]
+                max_connections = int(parts[2]) if len(parts) > 2 else max_concurrent
+            except ValueError:
+                logger.warning(f"Ignoring invalid bulkhead pool definition: {item}")
+                continue
+            limits[parts[0]] = (max(1, max_concurrent), max(1, max_connections))
+        return limits
+
+    def pool_for(self, pool_name: Optional[str]) -> IsolationPool:
+        """Pool of a service (created on first use)"""
+        name = pool_name or DEFAULT_POOL
+        pool = self._pools.get(name)
+        if pool is None:
+            max_concurrent, max_connections = self._limits.get(name, self.default_limits)
+            pool = self._pools[name] = IsolationPool(name, max_concurrent, max_connections)
+            logger.info(f"Created isolation pool {name} - Max concurrent: {max_concurrent}, Max connections: {max_connections}")
+        return pool
+
+    async def aclose(self) -> None:
+        for pool in self._pools.values():
+            await pool.aclose()
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pools": {name: pool.get_stats() for name, pool in self._pools.items()},
+        }
+
+
+# Global instance
+bulkhead = BulkheadManager()
@@ -1,13 +1,22 @@
 """
 Connection management utility - Help MCP clients manage connection state and reconnection
 """
+import asyncio
+import os
+import socket
 import time
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Set
 from dataclasses import dataclass
+from services.common.config import Config
 from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
 
 logger = get_logger(__name__)
 
+_SERVICE_FIELD_PREFIX = "svc:"
+
 
 @dataclass
 class ConnectionInfo:
@@ -23,34 +32,49 @@ class ConnectionInfo:
 class ConnectionManager:
     """
     MCP connection manager
-    
+
     Track active connections, help diagnose connection issues and support reconnection logic
+
+    Connections are indexed by service and user, so lookups and counts do not scan
+    every connection, and kept in last-activity order so stale ones are found from
+    the front. Each worker publishes its counters to Redis (a hash and a user
+    HyperLogLog per worker, expiring when the worker stops heartbeating); cluster
+    stats add up the live workers' hashes.
     """
-    
-    def __init__(self):
-        self.connections: Dict[str, ConnectionInfo] = {}
-        
+
+    def __init__(self, heartbeat_seconds: int = Config.CONNECTION_STATS_HEARTBEAT_SECONDS):
+        # Least recently active first
+        self.connections: "OrderedDict[str, ConnectionInfo]" = OrderedDict()
+        self._by_service: Dict[str, Set[str]] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_seconds = max(1, heartbeat_seconds)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._cluster_cache: Optional[dict] = None
+        self._cluster_cache_at = 0.0
+
     def register_connection(self, service_id: str, user_id: str, client_ip: str) -> str:
         """
         Register new connection
-        
+
         Args:
             service_id: Service ID
-            user_id: User ID  
+            user_id: User ID
             client_ip: Client IP
-            
+
         Returns:
             str: Connection identifier
         """
         connection_key = f"{service_id}:{user_id}:{client_ip}"
         current_time = time.time()
-        
+
         if connection_key in self.connections:
             # Update existing connection
             conn_info = self.connections[connection_key]
             conn_info.connected_at = current_time
             conn_info.last_activity = current_time
             conn_info.connection_count += 1
+            self.connections.move_to_end(connection_key)
             logger.info(f"Updated connection record - {connection_key}, connection count: {conn_info.connection_count}")
         else:
             # Create new connection record
@@ -61,105 +85,228 @@ class ConnectionManager:
                 connected_at=current_time,
                 last_activity=current_time
             )
+            self._by_service.setdefault(service_id, set()).add(connection_key)
+            self._by_user.setdefault(user_id, set()).add(connection_key)
             logger.info(f"Registered new connection - {connection_key}")
-            
+
         return connection_key
-        
+
     def update_activity(self, connection_key: str) -> None:
         """
         Update connection activity time
-        
+
         Args:
             connection_key: Connection identifier
         """
-        if connection_key in self.connections:
-            self.connections[connection_key].last_activity = time.time()
-            
+        conn_info = self.connections.get(connection_key)
+        if conn_info is not None:
+            conn_info.last_activity = time.time()
+            self.connections.move_to_end(connection_key)
+
     def unregister_connection(self, connection_key: str) -> None:
         """
         Unregister connection
-        
+
         Args:
             connection_key: Connection identifier
         """
-        if connection_key in self.connections:
-            conn_info = self.connections.pop(connection_key)
+        conn_info = self._remove(connection_key)
+        if conn_info is not None:
             duration = time.time() - conn_info.connected_at
             logger.info(f"Unregistered connection - {connection_key}, duration: {duration:.2f}s")
-            
+
+    def _remove(self, connection_key: str) -> Optional[ConnectionInfo]:
+        conn_info = self.connections.pop(connection_key, None)
+        if conn_info is None:
+            return None
+        for index, value in ((self._by_service, conn_info.service_id), (self._by_user, conn_info.user_id)):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(connection_key)
+                if not keys:
+                    del index[value]
+        return conn_info
+
     def get_connection_info(self, connection_key: str) -> Optional[ConnectionInfo]:
         """
         Get connection information
-        
+
         Args:
             connection_key: Connection identifier
-            
+
         Returns:
             Optional[ConnectionInfo]: Connection information
         """
         return self.connections.get(connection_key)
-        
+
     def get_service_connections(self, service_id: str) -> Dict[str, ConnectionInfo]:
         """
         Get all connections for specified service
-        
+
         Args:
             service_id: Service ID
-            
+
         Returns:
             Dict[str, ConnectionInfo]: Connection information dictionary
         """
-        return {
-            key: info for key, info in self.connections.items() 
-            if info.service_id == service_id
-        }
-        
+        return {key: self.connections[key] for key in self._by_service.get(service_id, ())}
+
+    def count_service_connections(self, service_id: str) -> int:
+        """Number of connections of a service in this worker"""
+        return len(self._by_service.get(service_id, ()))
+
+    def get_user_connections(self, user_id: str) -> Dict[str, ConnectionInfo]:
+        """Get all connections of a user in this worker"""
+        return {key: self.connections[key] for key in self._by_user.get(user_id, ())}
+
     def cleanup_stale_connections(self, timeout_seconds: int = 300) -> None:
         """
         Cleanup stale connection records
-        
+
         Args:
             timeout_seconds: Timeout in seconds
         """
-        current_time = time.time()
-        stale_keys = [
-            key for key, info in self.connections.items()
-            if current_time - info.last_activity > timeout_seconds
-        ]
-        
-        for key in stale_keys:
+        threshold = time.time() - timeout_seconds
+        # Ordered by last activity: stop at the first active connection
+        while self.connections:
+            key, info = next(iter(self.connections.items()))
+            if info.last_activity >= threshold:
+                break
             logger.info(f"Cleanup stale connection - {key}")
-            self.connections.pop(key, None)
-            
+            self._remove(key)
+
     def get_stats(self) -> Dict:
         """
-        Get connection statistics
-        
+        Get connection statistics of this worker
+
         Returns:
             Dict: Statistics information
         """
-        total_connections = len(self.connections)
-        services = set(info.service_id for info in self.connections.values())
-        users = set(info.user_id for info in self.connections.values())
-        
         return {
-            "total_connections": total_connections,
+            "worker_id": self.worker_id,
+            "total_connections": len(self.connections),
+            "unique_services": len(self._by_service),
+            "unique_users": len(self._by_user),
+        }
+
+    def start(self) -> None:
+        """Start publishing this worker's counters (call from the running loop)"""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+        try:
+            await asyncio.to_thread(self._withdraw)
+        except Exception as e:
+            logger.warning(f"Failed to remove connection stats of worker {self.worker_id}: {e}")
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            try:
+                self.cleanup_stale_connections()
+                snapshot = self._snapshot()
+                await asyncio.to_thread(self._publish, *snapshot)
+            except Exception as e:
+                logger.warning(f"Failed to publish connection stats: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def _snapshot(self) -> tuple:
+        counters = {
+            "connections": len(self.connections),
+            "services": len(self._by_service),
+            "users": len(self._by_user),
+        }
+        for service_id, keys in self._by_service.items():
+            counters[f"{_SERVICE_FIELD_PREFIX}{service_id}"] = len(keys)
+        return counters, list(self._by_user)
+
+    def _publish(self, counters: dict, user_ids: list) -> None:
+        ttl = self.heartbeat_seconds * 3
+        worker_key = RedisKeys.mcp_conn_worker_key(self.worker_id)
+        users_key = RedisKeys.mcp_conn_worker_users_key(self.worker_id)
+        pipe = redis_client.client.pipeline(transaction=True)
+        pipe.delete(worker_key, users_key)
+        pipe.hset(worker_key, mapping=counters)
+        pipe.expire(worker_key, ttl)
+        if user_ids:
+            pipe.pfadd(users_key, *user_ids)
+            pipe.expire(users_key, ttl)
+        pipe.zadd(RedisKeys.mcp_conn_workers_key(), {self.worker_id: time.time()})
+        pipe.execute()
+
+    def _withdraw(self) -> None:
+        pipe = redis_client.client.pipeline(transaction=True)
+        pipe.delete(RedisKeys.mcp_conn_worker_key(self.worker_id), RedisKeys.mcp_conn_worker_users_key(self.worker_id))
+        pipe.zrem(RedisKeys.mcp_conn_workers_key(), self.worker_id)
+        pipe.execute()
+
+    def get_cluster_stats(self, page: int = 1, page_size: int = 20) -> Dict:
+        """
+        Connection statistics of all live API workers, with a page of per-service counts
+
+        The aggregate is cached for half a heartbeat interval, so the cost does not
+        depend on the number of connections or on how often the endpoint is polled.
+
+        Args:
+            page: Page of the per-service breakdown (services by connections, descending)
+            page_size: Services per page
+        """
+        now = time.time()
+        if self._cluster_cache is None or now - self._cluster_cache_at > self.heartbeat_seconds / 2:
+            self._cluster_cache = self._aggregate(now)
+            self._cluster_cache_at = now
+        cluster = self._cluster_cache
+
+        page = max(1, page)
+        page_size = min(max(1, page_size), 200)
+        start = (page - 1) * page_size
+        services = cluster["services"]
+        return {
+            "workers": cluster["workers"],
+            "total_connections": cluster["total_connections"],
             "unique_services": len(services),
-            "unique_users": len(users),
-            "services": list(services),
-            "connection_details": [
-                {
-                    "key": key,
-                    "service_id": info.service_id,
-                    "user_id": info.user_id,
-                    "client_ip": info.client_ip,
-                    "connected_at": info.connected_at,
-                    "last_activity": info.last_activity,
-                    "duration": time.time() - info.connected_at,
-                    "connection_count": info.connection_count
-                }
-                for key, info in self.connections.items()
-            ]
+            "unique_users": cluster["unique_users"],
+            "services": [
+                {"service_id": service_id, "connections": count}
+                for service_id, count in services[start:start + page_size]
+            ],
+            "page": page,
+            "page_size": page_size,
+        }
+
+    def _aggregate(self, now: float) -> dict:
+        client = redis_client.client
+        workers_key = RedisKeys.mcp_conn_workers_key()
+        client.zremrangebyscore(workers_key, 0, now - self.heartbeat_seconds * 3)
+        workers = client.zrange(workers_key, 0, -1)
+
+        pipe = client.pipeline(transaction=False)
+        for worker_id in workers:
+            pipe.hgetall(RedisKeys.mcp_conn_worker_key(worker_id))
+        hashes = pipe.execute() if workers else []
+        # PFCOUNT over several keys counts the union: users connected to several workers count once
+        unique_users = client.pfcount(*[RedisKeys.mcp_conn_worker_users_key(w) for w in workers]) if workers else 0
+
+        total = 0
+        per_service: Dict[str, int] = {}
+        for counters in hashes:
+            total += int(counters.get("connections", 0))
+            for field, value in counters.items():
+                if field.startswith(_SERVICE_FIELD_PREFIX):
+                    service_id = field[len(_SERVICE_FIELD_PREFIX):]
+                    per_service[service_id] = per_service.get(service_id, 0) + int(value)
+        return {
+            "workers": len(workers),
+            "total_connections": total,
+            "unique_users": unique_users,
+            "services": sorted(per_service.items(), key=lambda item: (-item[1], item[0])),
         }
 
 
@@ -0,0 +1,103 @@
+"""
+CPU offload - Size-aware dispatch of CPU-heavy Python steps (schema building, output validation) off the event loop
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class _KindStats:
+    __slots__ = ("inline", "offloaded", "inline_seconds", "offloaded_seconds")
+
+    def __init__(self):
+        self.inline = 0
+        self.offloaded = 0
+        self.inline_seconds = 0.0
+        # Time spent in workers: event loop time that would have been blocked otherwise
+        self.offloaded_seconds = 0.0
+
+
+class CpuOffloader:
+    """
+    Runs a step inline when its payload is small and in a worker thread above a threshold
+
+    Small payloads stay inline since a thread hop costs more than the work. Large ones
+    go to a thread pool: the GIL is still shared, but the loop gets the interpreter back
+    every switch interval (5 ms by default) instead of stalling for the whole step.
+    Only pure Python steps benefit; C calls that hold the GIL (json decoding) do not,
+    and a process pool would pay the decoding cost again unpickling the result.
+    """
+
+    def __init__(
+        self,
+        threshold_bytes: int = Config.CPU_OFFLOAD_THRESHOLD_BYTES,
+        max_workers: int = Config.CPU_OFFLOAD_MAX_WORKERS,
+    ):
+        self.threshold_bytes = threshold_bytes
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats: Dict[str, _KindStats] = {}
+
+    async def run(self, kind: str, size: int, func: Callable[..., Any], *args) -> Any:
+        """
+        Run func(*args) inline or in the worker pool depending on the payload size
+
+        Args:
+            kind: Step name for metrics (e.g. "json_decode")
+            size: Payload size in bytes/characters
+            func: Function to run; must not touch the event loop
+        """
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats[kind] = _KindStats()
+
+        if self.threshold_bytes <= 0 or size < self.threshold_bytes:
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                stats.inline += 1
+                stats.inline_seconds += time.perf_counter() - started
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu-offload")
+        result, elapsed = await asyncio.get_running_loop().run_in_executor(self._executor, _timed, func, args)
+        stats.offloaded += 1
+        stats.offloaded_seconds += elapsed
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "threshold_bytes": self.threshold_bytes,
+            "kinds": {
+                kind: {
+                    "inline": stats.inline,
+                    "offloaded": stats.offloaded,
+                    "inline_ms": round(stats.inline_seconds * 1000, 2),
+                    "loop_ms_saved": round(stats.offloaded_seconds * 1000, 2),
+                }
+                for kind, stats in self._stats.items()
+            },
+        }
+
+
+def _timed(func: Callable[..., Any], args: tuple) -> tuple:
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+# Global instance
+cpu_offloader = CpuOffloader()
@@ -3,11 +3,15 @@ HTTP client utility - Build and handle HTTP requests
 """
 import json
 import ast
+import re
 from typing import Dict, Any, Optional
 from services.common.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Header names whose values are credentials
+_SENSITIVE_HEADER = re.compile(r"auth|token|key|secret|cookie|session", re.IGNORECASE)
+
 
 class HttpRequestBuilder:
     """HTTP request builder"""
@@ -94,7 +98,7 @@ class HttpRequestBuilder:
         url = self._build_url(tool_config, arguments, call_params.get("base_url", ""))
         
         # Build headers
-        headers = self._build_headers(tool_config, arguments, call_params.get("headers", {}))
+        headers = self._build_headers(tool_config, arguments, call_params.get("headers", {}), call_params.get("auth_headers"))
         
         # Build query parameters
         query_params = self._build_query_params(tool_config, arguments)
@@ -176,14 +180,15 @@ class HttpRequestBuilder:
         
         return url
     
-    def _build_headers(self, tool_config, arguments: dict, headers: dict) -> Dict[str, str]:
+    def _build_headers(self, tool_config, arguments: dict, headers: dict, auth_headers: Optional[dict] = None) -> Dict[str, str]:
         """
         Build request headers
         
         Args:
             tool_config: Tool configuration
             arguments: Tool parameters
-            auth_info: Service authentication information
+            headers: Service headers
+            auth_headers: Upstream authentication headers (already resolved)
             
         Returns:
             Dict[str, str]: Request headers dictionary
@@ -192,33 +197,34 @@ class HttpRequestBuilder:
         # headers = {"User-Agent": "MCP Tool Server (XPack)"}
         headers["User-Agent"] = "MCP Tool Server (XPack)"
         # Add authentication headers
-        # self._add_auth_headers(headers, auth_info)
+        if auth_headers:
+            self._add_auth_headers(headers, auth_headers)
         
         # Add custom headers
         self._add_custom_headers(tool_config, arguments, headers)
         
-        logger.debug(f"Final request headers: {headers}")
+        # Credentials (upstream auth, service headers like API keys) are logged by name only
+        masked = {name.lower() for name in (auth_headers or {})}
+        safe_headers = {
+            name: "***" if name.lower() in masked or _SENSITIVE_HEADER.search(name) else value
+            for name, value in headers.items()
+        }
+        logger.debug(f"Final request headers: {safe_headers}")
         return headers
     
-    # def _add_auth_headers(self, headers: Dict[str, str], auth_info: dict) -> None:
-    #     """
-    #     Add authentication headers
-        
-    #     Args:
-    #         headers: Request headers dictionary
-    #         auth_info: Authentication information
-    #     """
-    #     auth_method = auth_info.get("auth_method", "free")
-    #     logger.debug(f"Authentication method: {auth_method}")
-        
-    #     if auth_method != "free":
-    #         auth_header = auth_info.get("auth_header")
-    #         auth_token = auth_info.get("auth_token")
-    #         if auth_header and auth_token:
-    #             headers[auth_header] = auth_token
-    #             # Hide token details, only show first few characters
-    #             token_display = auth_token[:8] + "..." if len(auth_token) > 8 else "***"
-    #             logger.debug(f"Added auth header: {auth_header} = {token_display}")
+    def _add_auth_headers(self, headers: Dict[str, str], auth_headers: Dict[str, str]) -> None:
+        """
+        Add authentication headers
+        
+        Args:
+            headers: Request headers dictionary
+            auth_headers: Authentication headers
+        """
+        for auth_header, auth_token in auth_headers.items():
+            headers[auth_header] = auth_token
+            # Hide token details, only show first few characters
+            token_display = auth_token[:8] + "..." if len(auth_token) > 8 else "***"
+            logger.debug(f"Added auth header: {auth_header} = {token_display}")
     
     def _add_custom_headers(self, tool_config, arguments: dict, headers: Dict[str, str]) -> None:
         """
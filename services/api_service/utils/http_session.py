@@ -0,0 +1,75 @@
+"""
+StreamableHTTP session record - Compact per-session state and memory accounting
+"""
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional, Set
+from mcp.server.streamable_http import EventStore, StreamableHTTPServerTransport
+
+
+def _stream_buffer_size(stream: Any) -> int:
+    """Approximate bytes held by an anyio memory object stream buffer (shallow per item)."""
+    state = getattr(stream, "_state", None)
+    buffer = getattr(state, "buffer", None)
+    if buffer is None:
+        return 0
+    return sys.getsizeof(buffer) + sum(sys.getsizeof(item) for item in buffer)
+
+
+@dataclass(slots=True)
+class HttpSession:
+    """
+    Persistent StreamableHTTP session
+
+    The MCP server itself is shared per service (see McpServerFactory.get_server);
+    a session only owns its transport, the task running the server and its event store.
+    """
+    session_key: str
+    service_id: str
+    user_id: str
+    apikey_id: Optional[str]
+    transport: StreamableHTTPServerTransport
+    event_store: Optional[EventStore] = None
+    task: Optional[asyncio.Task] = None
+    # Set once transport.connect() has yielded (or the server task exited before that)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    created_at: float = field(default_factory=time.time)
+    memory_estimate: int = 0
+    # Request identities routed to this session (see McpController.has_live_session)
+    aliases: Set[str] = field(default_factory=set)
+
+    def is_running(self) -> bool:
+        """Whether the server task is alive"""
+        return self.task is not None and not self.task.done()
+
+    def estimate_memory(self, base_bytes: int = 0) -> int:
+        """
+        Estimate the bytes retained by this session
+
+        Adds shallow sizes of the record, transport, task and event store, plus messages
+        buffered in the transport streams, to a measured baseline for the objects that
+        are not reachable from here (server session, task group, stream state).
+
+        Args:
+            base_bytes: Baseline bytes per running session
+
+        Returns:
+            int: Estimated bytes (also stored in memory_estimate)
+        """
+        size = base_bytes + sys.getsizeof(self)
+        transport = self.transport
+        size += sys.getsizeof(transport) + sys.getsizeof(transport.__dict__)
+        size += _stream_buffer_size(getattr(transport, "_read_stream_writer", None))
+        size += _stream_buffer_size(getattr(transport, "_write_stream_reader", None))
+        request_streams = getattr(transport, "_request_streams", None) or {}
+        size += sys.getsizeof(request_streams)
+        for send_stream, receive_stream in list(request_streams.values()):
+            size += _stream_buffer_size(receive_stream)
+        if self.task is not None:
+            size += sys.getsizeof(self.task) + sys.getsizeof(self.task.get_coro())
+        if self.event_store is not None:
+            size += sys.getsizeof(self.event_store) + sys.getsizeof(self.event_store.__dict__)
+        self.memory_estimate = size
+        return size
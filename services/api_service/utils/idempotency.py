@@ -0,0 +1,214 @@
+"""
+Idempotency - Replay stored tools/call results to retries carrying the same idempotency key
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager, suppress
+from typing import List, NamedTuple, Optional, Tuple
+
+import mcp.types as types
+from pydantic import TypeAdapter
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+
+logger = get_logger(__name__)
+
+# Claim outcomes
+ACQUIRED = "acquired"    # first call: execute, then complete() or release()
+REPLAY = "replay"        # a stored result is returned
+CONFLICT = "conflict"    # key reused for a different tool call
+BUSY = "busy"            # first call still running after the wait timeout
+
+_content_adapter = TypeAdapter(List[types.ContentBlock])
+
+# Delete the in-flight marker only if it is still ours
+_RELEASE_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and cjson.decode(value)['token'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Extend the in-flight marker only while it is still ours (a stored result has no token)
+_REFRESH_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and cjson.decode(value)['token'] == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Replace the in-flight marker with the result only while it is still ours
+_COMPLETE_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and cjson.decode(value)['token'] == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+class IdempotencyClaim(NamedTuple):
+    outcome: str
+    key: Optional[str] = None
+    token: Optional[str] = None
+    # Stored (content, structured content) for REPLAY
+    result: Optional[Tuple[List[types.ContentBlock], dict]] = None
+
+
+class IdempotencyStore:
+    """
+    Redis-backed idempotency keys for tool calls, scoped by API key (or user)
+
+    The first call stores an in-flight marker (SET NX) holding a fingerprint of the
+    call; concurrent retries poll until the result is stored. Only successful
+    results are stored, so a retry after a failure executes the call again.
+
+    The marker's TTL only bounds how long a crashed process holds the key: while
+    the first call runs, keep_alive() extends it, however long the call takes.
+    """
+
+    def __init__(
+        self,
+        result_ttl_seconds: int = Config.IDEMPOTENCY_RESULT_TTL_SECONDS,
+        inflight_ttl_seconds: int = Config.IDEMPOTENCY_INFLIGHT_TTL_SECONDS,
+        wait_seconds: float = Config.IDEMPOTENCY_WAIT_SECONDS,
+        max_result_bytes: int = Config.IDEMPOTENCY_MAX_RESULT_BYTES,
+    ):
+        self.result_ttl_seconds = result_ttl_seconds
+        self.inflight_ttl_seconds = inflight_ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.max_result_bytes = max_result_bytes
+        self._release_script = None
+        self._refresh_script = None
+        self._complete_script = None
+
+    @staticmethod
+    def fingerprint(service_id: str, tool_name: str, arguments: dict) -> str:
+        payload = json.dumps([service_id, tool_name, arguments], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def claim(self, scope: str, idempotency_key: str, fingerprint: str) -> IdempotencyClaim:
+        """
+        Claim an idempotency key, waiting for a concurrent first call to finish
+
+        Args:
+            scope: API key ID (or user ID) owning the key
+            idempotency_key: Client supplied key
+            fingerprint: Fingerprint of the call (see fingerprint())
+
+        Returns:
+            IdempotencyClaim: Outcome, with the stored result for REPLAY
+        """
+        digest = hashlib.sha256(idempotency_key.encode("utf-8")).hexdigest()
+        key = RedisKeys.idempotency_key(scope, digest)
+        token = uuid.uuid4().hex
+        marker = json.dumps({"state": "inflight", "token": token, "fp": fingerprint})
+        deadline = time.monotonic() + self.wait_seconds
+        delay = 0.05
+        while True:
+            acquired, value = await asyncio.to_thread(self._try_acquire, key, marker)
+            if acquired:
+                return IdempotencyClaim(ACQUIRED, key, token)
+            if value is not None:
+                entry = json.loads(value)
+                if entry.get("fp") != fingerprint:
+                    return IdempotencyClaim(CONFLICT)
+                if entry.get("state") == "done":
+                    content = _content_adapter.validate_python(entry["content"])
+                    return IdempotencyClaim(REPLAY, key, result=(content, entry.get("data") or {}))
+            if time.monotonic() >= deadline:
+                return IdempotencyClaim(BUSY)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def complete(self, claim: IdempotencyClaim, fingerprint: str, content: List[types.ContentBlock], data: dict) -> None:
+        """
+        Store a successful result for replay (too large results are not stored)
+
+        Only replaces the claim's own marker: if it expired and a retry claimed the
+        key meanwhile, the retry's marker is kept.
+        """
+        value = json.dumps({
+            "state": "done",
+            "fp": fingerprint,
+            "content": _content_adapter.dump_python(content, mode="json", by_alias=True),
+            "data": data,
+        }, default=str)
+        if self.max_result_bytes > 0 and len(value) > self.max_result_bytes:
+            logger.info(f"Idempotent result too large to store ({len(value)} bytes), retries will execute again")
+            await self.release(claim)
+            return
+        try:
+            stored = await asyncio.to_thread(self._complete, claim.key, claim.token, value)
+        except Exception as e:
+            logger.warning(f"Failed to store idempotent result: {e}")
+            return
+        if not stored:
+            # Expired and claimed by a retry meanwhile: leave its marker alone
+            logger.warning("Idempotency key was lost before the result was stored")
+
+    async def release(self, claim: IdempotencyClaim) -> None:
+        """Drop the in-flight marker so a retry executes the call again"""
+        try:
+            await asyncio.to_thread(self._release, claim.key, claim.token)
+        except Exception as e:
+            logger.warning(f"Failed to release idempotency key: {e}")
+
+    @asynccontextmanager
+    async def keep_alive(self, claim: IdempotencyClaim):
+        """Keep the in-flight marker of an acquired claim from expiring while the call runs"""
+        task = asyncio.create_task(self._refresh_loop(claim))
+        try:
+            yield
+        finally:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _refresh_loop(self, claim: IdempotencyClaim) -> None:
+        interval = max(self.inflight_ttl_seconds / 3, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                refreshed = await asyncio.to_thread(self._refresh, claim.key, claim.token)
+            except Exception as e:
+                logger.warning(f"Failed to refresh idempotency key: {e}")
+                continue
+            if not refreshed:
+                # Expired or replaced meanwhile: a retry may already be executing the call
+                logger.warning("Idempotency key was lost while the call was running")
+                return
+
+    def _try_acquire(self, key: str, marker: str) -> Tuple[bool, Optional[str]]:
+        if redis_client.client.set(key, marker, nx=True, ex=self.inflight_ttl_seconds):
+            return True, None
+        return False, redis_client.client.get(key)
+
+    def _release(self, key: str, token: str) -> None:
+        if self._release_script is None:
+            self._release_script = redis_client.client.register_script(_RELEASE_SCRIPT)
+        self._release_script(keys=[key], args=[token])
+
+    def _complete(self, key: str, token: str, value: str) -> bool:
+        if self._complete_script is None:
+            self._complete_script = redis_client.client.register_script(_COMPLETE_SCRIPT)
+        return bool(self._complete_script(keys=[key], args=[token, value, self.result_ttl_seconds]))
+
+    def _refresh(self, key: str, token: str) -> bool:
+        if self._refresh_script is None:
+            self._refresh_script = redis_client.client.register_script(_REFRESH_SCRIPT)
+        return bool(self._refresh_script(keys=[key], args=[token, self.inflight_ttl_seconds]))
+
+
+# Global instance
+idempotency_store = IdempotencyStore()
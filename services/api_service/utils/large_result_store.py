@@ -0,0 +1,167 @@
+"""
+Large result store - Chunked server-side storage of oversized tool results, read back via MCP resources
+"""
+
+import asyncio
+import uuid
+from typing import List, NamedTuple, Optional
+
+import mcp.types as types
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+
+logger = get_logger(__name__)
+
+RESULT_URI_PREFIX = "xpack://results/"
+RESULT_URI_TEMPLATE = RESULT_URI_PREFIX + "{result_id}/{chunk}"
+# Leading part of the result shown inline with the resource link
+_PREVIEW_CHARS = 1000
+
+
+class ResultChunk(NamedTuple):
+    text: str
+    index: int
+    chunks: int
+    mime_type: str
+
+
+class LargeResultStore:
+    """
+    Stores tool results above a size threshold in Redis (chunk list + metadata hash,
+    both with a TTL) and replaces them with a summary and a resource link
+
+    Clients page through `xpack://results/{result_id}/{chunk}` with resources/read;
+    each chunk's _meta carries the URI of the next one. Chunks are only served to the
+    user who made the call, through the same service.
+
+    The summary has no structuredContent, so only results of tools without an
+    outputSchema are offloaded (clients reject a result missing the structured
+    content its tool declares); the caller checks this.
+    """
+
+    def __init__(
+        self,
+        threshold_chars: int = Config.MCP_LARGE_RESULT_THRESHOLD_CHARS,
+        chunk_chars: int = Config.MCP_LARGE_RESULT_CHUNK_CHARS,
+        ttl_seconds: int = Config.MCP_LARGE_RESULT_TTL_SECONDS,
+    ):
+        self.threshold_chars = threshold_chars
+        self.chunk_chars = max(1024, chunk_chars)
+        self.ttl_seconds = ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_chars > 0
+
+    @staticmethod
+    def chunk_uri(result_id: str, index: int) -> str:
+        return f"{RESULT_URI_PREFIX}{result_id}/{index}"
+
+    def should_offload(self, contents: List[types.Content]) -> bool:
+        if not self.enabled:
+            return False
+        size = 0
+        for content in contents:
+            if not isinstance(content, types.TextContent):
+                return False
+            size += len(content.text)
+        return size > self.threshold_chars
+
+    async def offload(self, user_id: str, service_id: str, contents: List[types.Content]) -> Optional[types.CallToolResult]:
+        """
+        Store a large result and build the summary returned in its place
+
+        Args:
+            user_id: Caller allowed to read the result
+            service_id: Service the result belongs to
+            contents: Text contents of the tool result
+
+        Returns:
+            Optional[types.CallToolResult]: Summary result, None if storing failed
+            (the caller then returns the result inline)
+        """
+        text = "".join(content.text for content in contents)
+        result_id = uuid.uuid4().hex
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        try:
+            await asyncio.to_thread(self._store, result_id, user_id, service_id, chunks)
+        except Exception as e:
+            logger.warning(f"Failed to store large tool result, returning it inline: {e}")
+            return None
+
+        first_uri = self.chunk_uri(result_id, 0)
+        logger.info(f"Stored large tool result - Result ID: {result_id}, Size: {len(text)}, Chunks: {len(chunks)}")
+        summary = (
+            f"The result is too large to return inline ({len(text)} characters in {len(chunks)} chunks). "
+            f"Read it with resources/read starting at {first_uri}; each chunk's _meta.nextUri points to the "
+            f"next one. It is available for {self.ttl_seconds} seconds.\n\nPreview:\n{text[:_PREVIEW_CHARS]}"
+        )
+        # Structured content is omitted on purpose: it would carry the full result again
+        # (hence tools with an outputSchema are never offloaded)
+        return types.CallToolResult(
+            content=[
+                types.TextContent(type="text", text=summary),
+                types.ResourceLink(
+                    type="resource_link",
+                    uri=first_uri,
+                    name=f"result-{result_id}",
+                    mimeType="text/plain",
+                    size=len(text),
+                ),
+            ],
+        )
+
+    async def read(self, uri: str, user_id: str, service_id: str) -> List[ReadResourceContents]:
+        """
+        Read one chunk of a stored result
+
+        Raises:
+            ValueError: If the URI is invalid or the result is unknown, expired or not the caller's
+        """
+        result_id, _, index = uri[len(RESULT_URI_PREFIX):].partition("/")
+        if not uri.startswith(RESULT_URI_PREFIX) or not result_id or not index.isdigit():
+            raise ValueError(f"Unknown resource: {uri}")
+
+        chunk = await asyncio.to_thread(self._load, result_id, int(index), user_id, service_id)
+        if chunk is None:
+            raise ValueError(f"Resource not found or expired: {uri}")
+
+        meta = {"chunk": chunk.index, "chunks": chunk.chunks}
+        if chunk.index + 1 < chunk.chunks:
+            meta["nextUri"] = self.chunk_uri(result_id, chunk.index + 1)
+        return [ReadResourceContents(content=chunk.text, mime_type=chunk.mime_type, meta=meta)]
+
+    def _store(self, result_id: str, user_id: str, service_id: str, chunks: List[str]) -> None:
+        meta_key = RedisKeys.tool_result_meta_key(result_id)
+        chunks_key = RedisKeys.tool_result_chunks_key(result_id)
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.rpush(chunks_key, *chunks)
+        pipe.expire(chunks_key, self.ttl_seconds)
+        pipe.hset(meta_key, mapping={
+            "user_id": user_id,
+            "service_id": service_id,
+            "chunks": len(chunks),
+            "mime_type": "text/plain",
+        })
+        pipe.expire(meta_key, self.ttl_seconds)
+        pipe.execute()
+
+    def _load(self, result_id: str, index: int, user_id: str, service_id: str) -> Optional[ResultChunk]:
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.hgetall(RedisKeys.tool_result_meta_key(result_id))
+        pipe.lindex(RedisKeys.tool_result_chunks_key(result_id), index)
+        meta, text = pipe.execute()
+        if not meta or text is None:
+            return None
+        if meta.get("user_id") != user_id or meta.get("service_id") != service_id:
+            logger.warning(f"Denied large tool result read - Result ID: {result_id}, User ID: {user_id}")
+            return None
+        return ResultChunk(text, index, int(meta.get("chunks", 0)), meta.get("mime_type") or "text/plain")
+
+
+# Global instance
+large_result_store = LargeResultStore()
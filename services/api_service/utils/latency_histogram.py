@@ -0,0 +1,115 @@
+"""
+Latency histogram - Rolling per-tool upstream latency histograms driving hedged requests
+"""
+
+import math
+import time
+from typing import Dict, List, Optional
+
+from services.common.config import Config
+
+# Log-scale buckets: bucket i holds latencies up to _GROWTH ** i ms (~12% relative error),
+# the last one everything above ~10 minutes
+_GROWTH = 1.25
+_BUCKETS = 61
+_LOG_GROWTH = math.log(_GROWTH)
+# The window is split in slices; the oldest slice is recycled as time moves on
+_SLICES = 6
+
+
+class LatencyHistogram:
+    """Rolling latency histogram over the last `window_seconds`"""
+
+    def __init__(self, window_seconds: float):
+        self.slice_seconds = max(window_seconds, _SLICES) / _SLICES
+        self._counts: List[List[int]] = [[0] * _BUCKETS for _ in range(_SLICES)]
+        # Absolute slice number each ring entry currently holds
+        self._slice_ids: List[int] = [-1] * _SLICES
+
+    def record(self, seconds: float, now: Optional[float] = None) -> None:
+        slice_id = int((now if now is not None else time.monotonic()) / self.slice_seconds)
+        index = slice_id % _SLICES
+        if self._slice_ids[index] != slice_id:
+            self._counts[index] = [0] * _BUCKETS
+            self._slice_ids[index] = slice_id
+        ms = seconds * 1000.0
+        bucket = 0 if ms <= 1.0 else min(_BUCKETS - 1, math.ceil(math.log(ms) / _LOG_GROWTH))
+        self._counts[index][bucket] += 1
+
+    def _merged(self, now: Optional[float]) -> List[int]:
+        oldest = int((now if now is not None else time.monotonic()) / self.slice_seconds) - _SLICES + 1
+        merged = [0] * _BUCKETS
+        for index, slice_id in enumerate(self._slice_ids):
+            if slice_id >= oldest:
+                for bucket, count in enumerate(self._counts[index]):
+                    merged[bucket] += count
+        return merged
+
+    def count(self, now: Optional[float] = None) -> int:
+        return sum(self._merged(now))
+
+    def quantile(self, q: float, min_samples: int = 1, now: Optional[float] = None) -> Optional[float]:
+        """
+        Latency quantile in seconds (bucket upper bound)
+
+        Returns:
+            Optional[float]: Quantile, None if the window holds fewer than min_samples
+        """
+        merged = self._merged(now)
+        total = sum(merged)
+        if total < max(1, min_samples):
+            return None
+        rank = math.ceil(q * total)
+        seen = 0
+        for bucket, count in enumerate(merged):
+            seen += count
+            if seen >= rank:
+                return (_GROWTH ** bucket) / 1000.0
+        return (_GROWTH ** (_BUCKETS - 1)) / 1000.0
+
+
+class UpstreamLatencyTracker:
+    """
+    Per-tool latency histograms and hedging decisions
+
+    Only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, window_seconds: int = Config.UPSTREAM_LATENCY_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def record(self, tool_id: str, seconds: float) -> None:
+        histogram = self._histograms.get(tool_id)
+        if histogram is None:
+            histogram = self._histograms[tool_id] = LatencyHistogram(self.window_seconds)
+        histogram.record(seconds)
+
+    def hedge_delay(self, tool_id: str) -> Optional[float]:
+        """
+        Delay after which a second request should be sent for a tool
+
+        Returns:
+            Optional[float]: Configured latency quantile in seconds, None while the
+            tool has too few recent samples to hedge
+        """
+        histogram = self._histograms.get(tool_id)
+        if histogram is None:
+            return None
+        delay = histogram.quantile(Config.UPSTREAM_HEDGE_QUANTILE, Config.UPSTREAM_HEDGE_MIN_SAMPLES)
+        if delay is None:
+            return None
+        return max(delay, Config.UPSTREAM_HEDGE_MIN_DELAY_MS / 1000.0)
+
+    def get_stats(self) -> dict:
+        return {
+            "tools": len(self._histograms),
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+        }
+
+
+# Global instance
+upstream_latency = UpstreamLatencyTracker()
@@ -1,6 +1,10 @@
 import json
 import asyncio
-from typing import List, cast
+import zlib
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, cast
+
+import redis
 
 from mcp.server.streamable_http import (
     EventStore,
@@ -10,7 +14,12 @@ from mcp.server.streamable_http import (
     EventCallback,
 )
 from mcp.types import JSONRPCMessage
-from services.common.redis import redis_client
+from services.common.config import Config
+from services.common.logging_config import get_logger
+from services.common.metrics import EVENT_STORE_BYTES, EVENT_STORE_EVENTS
+from services.common.redis import TimedRedis, redis_client
+
+logger = get_logger(__name__)
 
 
 class RedisEventStore(EventStore):
@@ -19,16 +28,6 @@ class RedisEventStore(EventStore):
         self.ttl_seconds = ttl_seconds
 
     # Synchronous helpers; wrap at call sites to avoid blocking
-    def _rpush(self, key: str, value: str) -> int:
-        return cast(int, redis_client.client.rpush(key, value))
-
-    def _expire(self, key: str, seconds: int) -> None:
-        try:
-            redis_client.client.expire(key, int(seconds))
-        except Exception:
-            # Ignore expiration errors
-            pass
-
     def _llen(self, key: str) -> int:
         return cast(int, redis_client.client.llen(key))
 
@@ -43,15 +42,24 @@ class RedisEventStore(EventStore):
     def _event_id(self, stream_id: StreamId, seq: int) -> EventId:
         return f"{stream_id}:{seq}"
 
+    def _rpush_with_expire(self, key: str, value: str) -> int:
+        # RPUSH and EXPIRE in a single round trip
+        pipe = redis_client.client.pipeline(transaction=False)
+        pipe.rpush(key, value)
+        pipe.expire(key, int(self.ttl_seconds))
+        length, _ = pipe.execute()
+        return cast(int, length)
+
     async def store_event(self, stream_id: StreamId, message: JSONRPCMessage) -> EventId:
         key = self._key(stream_id)
-        payload = json.dumps(
-            message.model_dump(by_alias=True, exclude_none=True) if message is not None else {}
+        payload = (
+            message.model_dump_json(by_alias=True, exclude_none=True) if message is not None else "{}"
         )
         # Append to Redis list via thread wrapper to avoid blocking
-        seq: int = await asyncio.to_thread(self._rpush, key, payload)
+        seq: int = await asyncio.to_thread(self._rpush_with_expire, key, payload)
+        EVENT_STORE_EVENTS.labels("list").inc()
+        EVENT_STORE_BYTES.labels("list").inc(len(payload))
         # rpush returns new length; sequence index is length-1
-        await asyncio.to_thread(self._expire, key, self.ttl_seconds)
         return self._event_id(stream_id, seq - 1)
 
     async def replay_events_after(
@@ -90,4 +98,204 @@ class RedisEventStore(EventStore):
             except Exception:
                 # Skip malformed entries
                 continue
-        return stream_id
\ No newline at end of file
+        return stream_id
+
+
+# Binary-safe client for the stream store (the shared client decodes responses to str)
+_binary_client: Optional[redis.Redis] = None
+
+
+def _get_binary_client() -> redis.Redis:
+    global _binary_client
+    if _binary_client is None:
+        _binary_client = TimedRedis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            password=Config.REDIS_PASSWORD,
+            db=Config.REDIS_DB,
+            decode_responses=False,
+            socket_connect_timeout=5,
+            socket_timeout=5,
+            retry_on_timeout=True,
+            health_check_interval=30,
+        )
+    return _binary_client
+
+
+class RedisStreamEventStore(EventStore):
+    """
+    Event store backed by Redis Streams
+
+    - One pipelined round trip per event (XADD with exact MAXLEN + EXPIRE; exact, so
+      the byte accounting below matches what the stream holds)
+    - Replay pages through XRANGE starting at the last event ID
+    - Payloads are stored in a single field with a one-byte codec prefix: b"j" for
+      raw JSON, b"z" for zlib-compressed JSON (payloads >= compress_min_bytes)
+    - Optional per-session byte cap: the oldest entries across the session's streams
+      are trimmed (XTRIM MINID) in the same pipeline once the cap is exceeded; a single
+      event larger than the cap is not stored (sent live, but not resumable)
+    """
+
+    FIELD = b"m"
+    CODEC_JSON = b"j"
+    CODEC_ZLIB = b"z"
+    REPLAY_BATCH_SIZE = 200
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_seconds: int = 900,
+        maxlen: Optional[int] = None,
+        compress_min_bytes: Optional[int] = None,
+        max_session_bytes: Optional[int] = None,
+    ):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.maxlen = maxlen if maxlen is not None else Config.MCP_EVENT_STREAM_MAXLEN
+        self.compress_min_bytes = compress_min_bytes if compress_min_bytes is not None else Config.MCP_EVENT_COMPRESS_MIN_BYTES
+        self.max_session_bytes = max_session_bytes if max_session_bytes is not None else Config.MCP_EVENT_SESSION_MAX_BYTES
+        # Byte accounting for the session cap: stream_id -> [(entry_id, size)], oldest first
+        self._entries: Dict[StreamId, Deque[Tuple[bytes, int]]] = {}
+        self._total_bytes = 0
+
+    def _key(self, stream_id: StreamId) -> str:
+        return f"xpack:mcp:stream:{self.namespace}:{stream_id}"
+
+    def _encode(self, message: Optional[JSONRPCMessage]) -> bytes:
+        if message is None:
+            # Priming events carry no message and are skipped on replay
+            return self.CODEC_JSON
+        raw = message.model_dump_json(by_alias=True, exclude_none=True).encode("utf-8")
+        if self.compress_min_bytes and len(raw) >= self.compress_min_bytes:
+            return self.CODEC_ZLIB + zlib.compress(raw, 1)
+        return self.CODEC_JSON + raw
+
+    def _decode(self, value: bytes) -> Optional[bytes]:
+        codec, body = value[:1], value[1:]
+        if not body:
+            return None
+        if codec == self.CODEC_ZLIB:
+            return zlib.decompress(body)
+        return body
+
+    def _account(self, stream_id: StreamId, entry_id: bytes, size: int) -> List[Tuple[str, bytes]]:
+        """Record a stored entry; return (key, min_id) trims needed to honour the session byte cap."""
+        entries = self._entries.setdefault(stream_id, deque(maxlen=self.maxlen or None))
+        if entries.maxlen is not None and len(entries) == entries.maxlen:
+            # Redis trims this entry via MAXLEN
+            self._total_bytes -= entries[0][1]
+        entries.append((entry_id, size))
+        self._total_bytes += size
+        if not self.max_session_bytes or self._total_bytes <= self.max_session_bytes:
+            return []
+        trims: Dict[StreamId, bytes] = {}
+        while self._total_bytes > self.max_session_bytes:
+            # Evict the globally oldest entry (stream IDs are "<ms>-<seq>")
+            oldest_stream = min(
+                (sid for sid, items in self._entries.items() if items),
+                key=lambda sid: tuple(int(part) for part in self._entries[sid][0][0].split(b"-")),
+            )
+            items = self._entries[oldest_stream]
+            _, evicted_size = items.popleft()
+            self._total_bytes -= evicted_size
+            if items:
+                trims[oldest_stream] = items[0][0]
+            else:
+                # Every entry of the stream was evicted: drop the stream
+                trims[oldest_stream] = b"+"
+        return [(self._key(sid), min_id) for sid, min_id in trims.items()]
+
+    def _append(self, key: str, value: bytes) -> bytes:
+        pipe = _get_binary_client().pipeline(transaction=False)
+        if self.maxlen:
+            pipe.xadd(key, {self.FIELD: value}, maxlen=self.maxlen, approximate=False)
+        else:
+            pipe.xadd(key, {self.FIELD: value})
+        pipe.expire(key, int(self.ttl_seconds))
+        entry_id, _ = pipe.execute()
+        return cast(bytes, entry_id)
+
+    def _trim(self, trims: List[Tuple[str, bytes]]) -> None:
+        pipe = _get_binary_client().pipeline(transaction=False)
+        for key, min_id in trims:
+            if min_id == b"+":
+                pipe.delete(key)
+            else:
+                pipe.xtrim(key, minid=min_id, approximate=False)
+        pipe.execute()
+
+    def _xrange(self, key: str, start: bytes, count: int) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        return cast(List[Tuple[bytes, Dict[bytes, bytes]]], _get_binary_client().xrange(key, min=start, max=b"+", count=count))
+
+    async def store_event(self, stream_id: StreamId, message: Optional[JSONRPCMessage]) -> EventId:
+        key = self._key(stream_id)
+        value = self._encode(message)
+        if self.max_session_bytes and len(value) > self.max_session_bytes:
+            # Storing it would evict the whole session, itself included. An empty ID makes
+            # the transport send the event without an SSE id, so it is never replayed
+            logger.warning(f"Event of {len(value)} bytes exceeds the session cap, not stored - Stream: {stream_id}")
+            return ""
+        entry_id: bytes = await asyncio.to_thread(self._append, key, value)
+        EVENT_STORE_EVENTS.labels("stream").inc()
+        EVENT_STORE_BYTES.labels("stream").inc(len(value))
+        trims = self._account(stream_id, entry_id, len(value))
+        if trims:
+            try:
+                await asyncio.to_thread(self._trim, trims)
+            except Exception:
+                # Trimming is best effort; MAXLEN and TTL still bound the streams
+                pass
+        return f"{stream_id}:{entry_id.decode()}"
+
+    async def replay_events_after(
+        self,
+        last_event_id: EventId,
+        send_callback: EventCallback,
+    ) -> StreamId | None:
+        # Parse last_event_id of format "<stream_id>:<stream entry id>"
+        try:
+            stream_id, entry_id_str = last_event_id.rsplit(":", 1)
+            last_entry_id = entry_id_str.encode()
+        except Exception:
+            return None
+
+        key = self._key(stream_id)
+        start = last_entry_id
+        while True:
+            try:
+                entries = await asyncio.to_thread(self._xrange, key, start, self.REPLAY_BATCH_SIZE)
+            except Exception:
+                # Redis unavailable or key type mismatch; cannot replay
+                return stream_id
+            # XRANGE is inclusive; skip the entry the client already has
+            entries = [entry for entry in entries if entry[0] != start]
+            if not entries:
+                return stream_id
+            for entry_id, fields in entries:
+                try:
+                    raw = self._decode(fields.get(self.FIELD, b""))
+                    if raw is None:
+                        continue
+                    # Parse and validate in one pydantic-core pass (no intermediate dict)
+                    msg = JSONRPCMessage.model_validate_json(raw)
+                    await send_callback(EventMessage(message=msg, event_id=f"{stream_id}:{entry_id.decode()}"))
+                except Exception:
+                    # Skip malformed entries
+                    continue
+            start = entries[-1][0]
+
+
+def create_event_store(namespace: str, ttl_seconds: int = 900) -> EventStore:
+    """
+    Create the configured MCP event store for a session
+
+    Args:
+        namespace: Session namespace
+        ttl_seconds: Event retention in seconds
+
+    Returns:
+        EventStore: Redis Streams store when MCP_EVENT_STORE_BACKEND=stream, else Redis list store
+    """
+    if Config.MCP_EVENT_STORE_BACKEND == "stream":
+        return RedisStreamEventStore(namespace=namespace, ttl_seconds=ttl_seconds)
+    return RedisEventStore(namespace=namespace, ttl_seconds=ttl_seconds)
@@ -0,0 +1,122 @@
+"""
+Mock upstream - Serve stored response examples instead of calling upstream APIs (load tests, trying tools offline)
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# z-score of the 99th percentile of the standard normal distribution
+_Z_P99 = 2.3263
+
+# _meta key marking content served by the mock upstream
+MOCK_META_KEY = "xpack/mock"
+
+
+class MockUpstreamError(Exception):
+    """Simulated upstream failure"""
+
+
+class MockUpstream:
+    """
+    Answers tool calls with the tool's `response_examples` after a simulated latency
+
+    The rest of the call (output validation, result handling, call logs) runs
+    unchanged, so the whole pipeline can be exercised without the upstream. When
+    the examples are a list, one entry is picked per call, matching how the output
+    schema is inferred from them. Mock results carry MOCK_META_KEY in their _meta
+    and are not charged unless billing is opted into (see is_charged()).
+    """
+
+    def __init__(
+        self,
+        global_enabled: bool = Config.MCP_MOCK_UPSTREAM,
+        global_billing: bool = Config.MCP_MOCK_BILLING,
+        latency_median_ms: float = Config.MCP_MOCK_LATENCY_MEDIAN_MS,
+        latency_p99_ms: float = Config.MCP_MOCK_LATENCY_P99_MS,
+        error_rate: float = Config.MCP_MOCK_ERROR_RATE,
+    ):
+        self.global_enabled = global_enabled
+        self.global_billing = global_billing
+        self.latency_median_ms = max(0.0, latency_median_ms)
+        # Log-normal sigma putting the p99 at the configured value
+        if self.latency_median_ms > 0 and latency_p99_ms > self.latency_median_ms:
+            self.latency_sigma = math.log(latency_p99_ms / self.latency_median_ms) / _Z_P99
+        else:
+            self.latency_sigma = 0.0
+        self.error_rate = min(max(error_rate, 0.0), 1.0)
+        self.calls = 0
+        self.errors = 0
+        if global_enabled:
+            logger.warning("Mock upstream mode is enabled for all services, upstream APIs will not be called")
+
+    def is_enabled(self, call_params: dict) -> bool:
+        return self.global_enabled or bool(call_params.get("mock_enabled"))
+
+    def is_charged(self, call_params: dict) -> bool:
+        """Whether mock calls are charged at the service price (explicit opt-in)"""
+        return self.global_billing or bool(call_params.get("mock_billing_enabled"))
+
+    def sample_latency(self) -> float:
+        """Simulated latency in seconds"""
+        if self.latency_median_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_median_ms / 1000.0
+        return random.lognormvariate(math.log(self.latency_median_ms), self.latency_sigma) / 1000.0
+
+    async def respond(self, tool_config, deadline: float) -> str:
+        """
+        Simulated upstream response text for a tool
+
+        Args:
+            tool_config: Tool configuration
+            deadline: Time (time.monotonic() based) by which the response must be received
+
+        Raises:
+            TimeoutError: If the simulated latency runs past the deadline
+            MockUpstreamError: For the configured share of failed calls
+        """
+        self.calls += 1
+        latency = self.sample_latency()
+        remaining = deadline - time.monotonic()
+        if latency >= remaining:
+            await asyncio.sleep(max(remaining, 0))
+            raise TimeoutError(f"Mock upstream latency exceeded the deadline ({latency * 1000:.0f} ms)")
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            self.errors += 1
+            raise MockUpstreamError("Simulated upstream error (HTTP 500)")
+
+        return self._example_text(tool_config)
+
+    @staticmethod
+    def _example_text(tool_config) -> str:
+        raw = getattr(tool_config, "response_examples", None)
+        if not raw or not raw.strip():
+            logger.debug(f"Tool {tool_config.name} has no response examples, mocking an empty object")
+            return "{}"
+        examples = json.loads(raw)
+        example = random.choice(examples) if isinstance(examples, list) and examples else examples
+        return json.dumps(example, ensure_ascii=False)
+
+    def get_stats(self) -> dict:
+        return {
+            "global_enabled": self.global_enabled,
+            "global_billing": self.global_billing,
+            "calls": self.calls,
+            "errors": self.errors,
+        }
+
+
+# Global instance
+mock_upstream = MockUpstream()
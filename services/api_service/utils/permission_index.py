@@ -0,0 +1,122 @@
+"""
+Permission index - Process-local group -> service ID sets for invoke permission checks
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from services.api_service.repositories.resource_group_repository import ResourceGroupMapRepository
+from services.common.config import Config
+from services.common.database import get_db
+from services.common.logging_config import get_logger
+from services.common.utils import permission_index as shared_index
+
+logger = get_logger(__name__)
+
+ALLOW_ALL = "allow-all"
+DENY_ALL = "deny-all"
+
+
+class PermissionIndex:
+    """
+    Group x service permission index
+
+    Each group maps to a frozenset of interned service IDs, so a check is a dict
+    lookup plus a set membership test. Sets are loaded from the shared Redis index
+    (services.common.utils.permission_index), which is rebuilt from MySQL when
+    missing. Local copies are dropped on GROUP invalidation messages and expire
+    after a TTL as a safety net; a copy loaded while an invalidation arrived is
+    returned but not cached.
+    """
+
+    def __init__(self, ttl_seconds: int = Config.PERMISSION_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._groups: Dict[str, Tuple[FrozenSet[str], float]] = {}
+        # Bumped by every invalidation; loads that overlap one are not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def is_allowed(self, group_id: Optional[str], service_id: str) -> bool:
+        """
+        Check whether a group may invoke a service
+
+        Args:
+            group_id: User's resource group ID
+            service_id: Service ID
+
+        Returns:
+            bool: True if allowed
+        """
+        if group_id == ALLOW_ALL:
+            return True
+        if not group_id or group_id == DENY_ALL:
+            return False
+        services = self.get_group_services(group_id)
+        return services is not None and service_id in services
+
+    def get_group_services(self, group_id: str) -> Optional[FrozenSet[str]]:
+        """
+        Get the service IDs bound to a group
+
+        Returns:
+            Optional[FrozenSet[str]]: Service IDs, None if they could not be loaded
+        """
+        now = time.monotonic()
+        entry = self._groups.get(group_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        generation = self._generation
+        services = self._load(group_id)
+        if services is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._groups[group_id] = (services, now + self.ttl_seconds)
+        return services
+
+    def invalidate_group(self, group_id: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._groups.pop(group_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._groups.clear()
+
+    def _load(self, group_id: str) -> Optional[FrozenSet[str]]:
+        try:
+            service_ids = shared_index.load_group_services(group_id)
+        except Exception as e:
+            logger.warning(f"Failed to read permission index from Redis for group {group_id}: {e}")
+            service_ids = None
+
+        if service_ids is None:
+            try:
+                version = shared_index.get_group_version(group_id)
+            except Exception as e:
+                logger.warning(f"Failed to read permission index version for group {group_id}: {e}")
+                version = None
+            db = None
+            try:
+                db = next(get_db())
+                service_ids = ResourceGroupMapRepository(db).get_by_id(group_id, force_update=True)
+            except Exception as e:
+                logger.error(f"Error occurred while loading resource group services: {str(e)}", exc_info=True)
+                return None
+            finally:
+                if db is not None:
+                    db.close()
+            try:
+                if version is not None and not shared_index.store_group_services(group_id, service_ids, version):
+                    logger.info(f"Group {group_id} changed while loading, permission index not stored")
+            except Exception as e:
+                logger.warning(f"Failed to store permission index for group {group_id}: {e}")
+
+        return frozenset(sys.intern(sid) for sid in service_ids)
+
+
+# Global instance
+permission_index = PermissionIndex()
@@ -0,0 +1,203 @@
+"""
+Rate limiter - Per apikey / user / service token buckets (Redis Lua, with a local pre-check)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+
+logger = get_logger(__name__)
+
+
+class RateLimitRule(NamedTuple):
+    """Token bucket: refills `rate` tokens per second up to `burst`"""
+    scope: str
+    rate: float
+    burst: float
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    # Scope of the bucket that rejected the request, None if allowed
+    scope: Optional[str] = None
+    retry_after: float = 0.0
+
+
+# Checks every bucket first and consumes one token from each only if all of them
+# allow the request, so a rejected call never drains the other buckets.
+# Uses the Redis clock so buckets stay consistent across API processes.
+_TOKEN_BUCKET_SCRIPT = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+local tokens = {}
+local wait = 0
+local blocked = 0
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', KEYS[i], 't', 'ts')
+    local t = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if t == nil or ts == nil then
+        t = burst
+        ts = now
+    end
+    t = math.min(burst, t + math.max(0, now - ts) * rate)
+    tokens[i] = t
+    if t < 1 then
+        local w = (1 - t) / rate
+        if w > wait then
+            wait = w
+            blocked = i
+        end
+    end
+end
+if blocked > 0 then
+    return {0, blocked, tostring(wait)}
+end
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', KEYS[i], 't', tostring(tokens[i] - 1), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(burst / rate) + 1)
+end
+return {1, 0, '0'}
+"""
+
+
+class _LocalBuckets:
+    """
+    Process-local approximate token buckets (LRU-bounded)
+
+    Uses the same rate and burst as the cluster-wide buckets; since one process
+    only sees part of the traffic, an empty local bucket means the shared bucket
+    is empty too, so such requests are rejected without a Redis round trip.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: List[Tuple[RateLimitRule, str]], now: float) -> Tuple[Optional[int], float]:
+        """
+        Consume one token from every bucket if all of them have one (like the Lua script)
+
+        Returns:
+            Tuple[Optional[int], float]: (None, 0) if the tokens were taken, otherwise the
+            position of the bucket with the longest wait and the seconds until it refills
+        """
+        with self._lock:
+            states = []
+            blocked, wait = None, 0.0
+            for position, (rule, key) in enumerate(buckets):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = [rule.burst, now]
+                    self._buckets[key] = bucket
+                    if len(self._buckets) > self.max_entries:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(key)
+                    bucket[0] = min(rule.burst, bucket[0] + (now - bucket[1]) * rule.rate)
+                    bucket[1] = now
+                states.append(bucket)
+                if bucket[0] < 1 and (1 - bucket[0]) / rule.rate > wait:
+                    blocked, wait = position, (1 - bucket[0]) / rule.rate
+            if blocked is not None:
+                return blocked, wait
+            for bucket in states:
+                bucket[0] -= 1
+            return None, 0.0
+
+    def refund(self, buckets: List[Tuple[RateLimitRule, str]]) -> None:
+        """Give back the tokens of a request rejected by the shared buckets"""
+        with self._lock:
+            for rule, key in buckets:
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket[0] = min(rule.burst, bucket[0] + 1)
+
+
+class RateLimiter:
+    """
+    Configurable rate limits per apikey, per user and per service
+
+    A request must pass every configured bucket. The local pre-check rejects floods
+    in-process; everything else is decided atomically by a Lua token bucket in Redis.
+    If Redis is unavailable the limiter fails open and relies on the local buckets.
+    """
+
+    def __init__(self):
+        self.rules = {
+            "apikey": RateLimitRule("apikey", Config.RATE_LIMIT_APIKEY_RPS, Config.RATE_LIMIT_APIKEY_BURST),
+            "user": RateLimitRule("user", Config.RATE_LIMIT_USER_RPS, Config.RATE_LIMIT_USER_BURST),
+            "service": RateLimitRule("service", Config.RATE_LIMIT_SERVICE_RPS, Config.RATE_LIMIT_SERVICE_BURST),
+        }
+        self._local = _LocalBuckets(Config.RATE_LIMIT_LOCAL_MAX_ENTRIES)
+        self._script = None
+
+    @property
+    def enabled(self) -> bool:
+        return any(rule.rate > 0 for rule in self.rules.values())
+
+    def _buckets(self, apikey_id: Optional[str], user_id: str, service_id: str) -> List[Tuple[RateLimitRule, str]]:
+        identifiers = {"apikey": apikey_id, "user": user_id, "service": service_id}
+        buckets = []
+        for scope, rule in self.rules.items():
+            identifier = identifiers[scope]
+            if rule.rate > 0 and identifier:
+                # Burst defaults to one second worth of requests
+                burst = rule.burst if rule.burst >= 1 else max(rule.rate, 1.0)
+                buckets.append((RateLimitRule(scope, rule.rate, burst), RedisKeys.rate_limit_key(scope, identifier)))
+        return buckets
+
+    async def check(self, apikey_id: Optional[str], user_id: str, service_id: str) -> RateLimitDecision:
+        """
+        Consume one request from the caller's buckets
+
+        Args:
+            apikey_id: API key ID
+            user_id: User ID
+            service_id: Service ID
+
+        Returns:
+            RateLimitDecision: Whether the request may proceed, with a retry hint if not
+        """
+        buckets = self._buckets(apikey_id, user_id, service_id)
+        if not buckets:
+            return RateLimitDecision(True)
+
+        blocked, wait = self._local.take(buckets, time.monotonic())
+        if blocked is not None:
+            return RateLimitDecision(False, buckets[blocked][0].scope, wait)
+
+        try:
+            allowed, blocked, wait = await asyncio.to_thread(self._check_shared, buckets)
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return RateLimitDecision(True)
+        if allowed:
+            return RateLimitDecision(True)
+        self._local.refund(buckets)
+        return RateLimitDecision(False, buckets[blocked - 1][0].scope, wait)
+
+    def _check_shared(self, buckets: List[Tuple[RateLimitRule, str]]) -> Tuple[bool, int, float]:
+        if self._script is None:
+            self._script = redis_client.client.register_script(_TOKEN_BUCKET_SCRIPT)
+        args: List[float] = []
+        for rule, _ in buckets:
+            args.extend((rule.rate, rule.burst))
+        allowed, blocked, wait = self._script(keys=[key for _, key in buckets], args=args)
+        return bool(int(allowed)), int(blocked), float(wait)
+
+
+# Global instance
+rate_limiter = RateLimiter()
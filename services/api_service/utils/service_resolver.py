@@ -0,0 +1,125 @@
+"""
+Service resolver - Process-local identifier (ID or slug_name) -> enabled service cache
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from services.api_service.repositories.mcp_service_repository import McpServiceRepository
+from services.common.config import Config
+from services.common.database import get_db
+from services.common.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResolvedService(NamedTuple):
+    """Canonical service for an identifier"""
+    service_id: str
+    name: str
+
+
+class ServiceResolver:
+    """
+    Identifier -> canonical service ID map shared by the MCP routes and the status endpoint
+
+    Misses go through McpServiceRepository (by ID, then by slug_name). Unknown or
+    disabled identifiers are cached negatively for a shorter TTL so bots and typos do
+    not cost two MySQL queries per request. Entries are dropped on SERVICE
+    invalidation messages published by the admin service on enable/disable/rename/delete.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = Config.SERVICE_RESOLVER_TTL_SECONDS,
+        negative_ttl_seconds: int = Config.SERVICE_RESOLVER_NEGATIVE_TTL_SECONDS,
+        max_entries: int = Config.SERVICE_RESOLVER_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[ResolvedService], float]]" = OrderedDict()
+        # Guards the map; invalidations arrive on the listener thread
+        self._lock = threading.Lock()
+
+    def resolve(self, identifier: str) -> Optional[ResolvedService]:
+        """
+        Resolve a service ID or slug_name to an enabled service
+
+        Args:
+            identifier: Service ID or slug_name from the request path
+
+        Returns:
+            Optional[ResolvedService]: Resolved service, None if not found or disabled
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(identifier)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(identifier)
+                return entry[0]
+
+        found, service = self._load(identifier)
+        if found:
+            ttl = self.ttl_seconds if service is not None else self.negative_ttl_seconds
+            with self._lock:
+                self._entries[identifier] = (service, now + ttl)
+                self._entries.move_to_end(identifier)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return service
+
+    def invalidate_service(self, service_id: str) -> None:
+        """
+        Drop identifiers resolving to a service, and all negative entries
+        (a newly enabled or renamed service may be cached as missing)
+        """
+        with self._lock:
+            stale = [
+                identifier
+                for identifier, (service, _) in self._entries.items()
+                if service is None or service.service_id == service_id
+            ]
+            for identifier in stale:
+                del self._entries[identifier]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _load(self, identifier: str) -> Tuple[bool, Optional[ResolvedService]]:
+        """
+        Returns:
+            Tuple[bool, Optional[ResolvedService]]: (lookup completed, service); lookup
+            errors return (False, None) so they are not cached negatively
+        """
+        db = None
+        try:
+            db = next(get_db())
+            service_repository = McpServiceRepository(db)
+
+            # Try to find by ID first
+            service = service_repository.get_by_id(identifier)
+            if service:
+                logger.debug(f"Service found (by ID): {service.name} ({service.id})")
+                return True, ResolvedService(service.id, service.name)
+
+            # If not found by ID, try by slug_name
+            service = service_repository.get_by_slug_name(identifier)
+            if service:
+                logger.debug(f"Service found (by slug_name): {service.name} ({service.id})")
+                return True, ResolvedService(service.id, service.name)
+
+            return True, None
+        except Exception as e:
+            logger.error(f"Error occurred while querying service: {str(e)}", exc_info=True)
+            return False, None
+        finally:
+            if db is not None:
+                db.close()
+
+
+# Global instance
+service_resolver = ServiceResolver()
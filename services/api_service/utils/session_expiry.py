@@ -0,0 +1,95 @@
+"""
+Session expiry queue - Track idle deadlines of MCP sessions without full-table scans
+"""
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class SessionExpiryQueue:
+    """
+    Min-heap of session idle deadlines with lazy rescheduling
+
+    Activity updates only overwrite a timestamp (O(1)); the heap entry of a session
+    is re-pushed with its real deadline when the stale one reaches the top. Expiry
+    cost therefore scales with the number of sessions whose deadline passed, not with
+    the total number of sessions. Uses the monotonic clock so wall-clock jumps do not
+    expire or pin sessions.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # Heap entries: (deadline, generation, session_key)
+        self._heap: List[Tuple[float, int, str]] = []
+        # session_key -> [last_activity, generation]
+        self._entries: Dict[str, List] = {}
+        self._generations = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_key: str) -> bool:
+        return session_key in self._entries
+
+    def touch(self, session_key: str) -> None:
+        """
+        Record activity for a session, scheduling it if not tracked yet
+
+        Args:
+            session_key: Session key
+        """
+        now = time.monotonic()
+        entry = self._entries.get(session_key)
+        if entry is not None:
+            entry[0] = now
+            return
+        generation = next(self._generations)
+        self._entries[session_key] = [now, generation]
+        heapq.heappush(self._heap, (now + self.ttl_seconds, generation, session_key))
+
+    def discard(self, session_key: str) -> None:
+        """
+        Stop tracking a session; its heap entry is dropped lazily when popped
+
+        Args:
+            session_key: Session key
+        """
+        self._entries.pop(session_key, None)
+
+    def next_deadline(self) -> Optional[float]:
+        """
+        Get the earliest scheduled deadline (monotonic seconds)
+
+        Returns:
+            Optional[float]: Deadline, or None if nothing is scheduled
+        """
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: Optional[float] = None) -> List[str]:
+        """
+        Pop sessions idle for longer than the TTL; they are no longer tracked afterwards
+
+        Args:
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            List[str]: Expired session keys
+        """
+        if now is None:
+            now = time.monotonic()
+        expired: List[str] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, generation, session_key = heapq.heappop(self._heap)
+            entry = self._entries.get(session_key)
+            if entry is None or entry[1] != generation:
+                # Discarded or re-added since this entry was pushed
+                continue
+            deadline = entry[0] + self.ttl_seconds
+            if deadline > now:
+                # Active since scheduling: reschedule lazily at the real deadline
+                heapq.heappush(self._heap, (deadline, generation, session_key))
+                continue
+            del self._entries[session_key]
+            expired.append(session_key)
+        return expired
@@ -0,0 +1,170 @@
+"""
+Tool search - BM25 ranking of a service's tools against a natural-language query
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import mcp.types as types
+
+SEARCH_TOOL_NAME = "search_tools"
+MAX_SEARCH_LIMIT = 50
+
+# Splits identifiers as well as prose: getUserById -> get, user, by, id
+_TOKEN_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+# Same split over character classes, for non-ASCII text: C (CJK), U (uppercase),
+# L (other letters and marks), D (digits); anything else separates words
+_CLASS_TOKEN_RE = re.compile(r"C+|U+(?!L)|U?L+|D+")
+# Han, kana and Hangul: written without spaces, indexed as characters and bigrams
+_CJK_RE = re.compile(
+    "[\u1100-\u11ff\u2e80-\u2fdf\u3005-\u3007\u3040-\u30ff\u31f0-\u31ff\u3400-\u4dbf"
+    "\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\U00020000-\U0003134f]"
+)
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from get in into is it of on or set the this to with which your you".split()
+)
+# Term weights per field: a match in the tool name counts more than one in its description
+_NAME_WEIGHT = 3
+_PARAMETER_WEIGHT = 2
+_DESCRIPTION_WEIGHT = 1
+
+
+@lru_cache(maxsize=4096)
+def _char_class(char: str) -> str:
+    if _CJK_RE.match(char):
+        return "C"
+    category = unicodedata.category(char)
+    if category in ("Lu", "Lt"):
+        return "U"
+    if category[0] in "LM":
+        return "L"
+    if category == "Nd":
+        return "D"
+    return " "
+
+
+def _words(text: str) -> List[str]:
+    """Words of a text; CJK runs come out as their characters and bigrams"""
+    if text.isascii():
+        return _TOKEN_RE.findall(text)
+    # Fullwidth/halfwidth forms and compatibility characters to their plain form
+    text = unicodedata.normalize("NFKC", text)
+    classes = "".join(_char_class(char) for char in text)
+    words = []
+    for match in _CLASS_TOKEN_RE.finditer(classes):
+        word = text[match.start():match.end()]
+        if classes[match.start()] == "C":
+            words.extend(word)
+            words.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            words.append(word)
+    return words
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens of a text or identifier, without stop words and plural 's'
+
+    CJK text has no word boundaries: its characters and their bigrams are the tokens.
+    """
+    tokens = []
+    for token in _words(text or ""):
+        token = token.lower()
+        if token in _STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class ToolSearchIndex:
+    """
+    In-memory BM25 index over tool names, descriptions and parameter names
+
+    Fields are weighted by repeating their terms (a simplified BM25F). Built once
+    per tool list version; a query only walks the postings of its own terms.
+    """
+
+    def __init__(self, tools: List[types.Tool], k1: float = 1.2, b: float = 0.75):
+        self.tools = tools
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._doc_lengths: List[int] = []
+
+        for doc_id, tool in enumerate(tools):
+            frequencies: Dict[str, int] = {}
+            for tokens, weight in self._fields(tool):
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0) + weight
+            self._doc_lengths.append(sum(frequencies.values()))
+            for token, frequency in frequencies.items():
+                self._postings.setdefault(token, []).append((doc_id, frequency))
+
+        count = len(tools)
+        self._avg_length = (sum(self._doc_lengths) / count) if count else 0.0
+        self._idf = {
+            token: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+    @staticmethod
+    def _fields(tool: types.Tool):
+        properties = (tool.inputSchema or {}).get("properties") or {}
+        parameter_tokens = []
+        for name in properties:
+            parameter_tokens.extend(tokenize(name))
+        return (
+            (tokenize(tool.name) + tokenize(tool.title or ""), _NAME_WEIGHT),
+            (parameter_tokens, _PARAMETER_WEIGHT),
+            (tokenize(tool.description or ""), _DESCRIPTION_WEIGHT),
+        )
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[types.Tool, float]]:
+        """
+        Rank tools against a query
+
+        Args:
+            query: Natural-language query
+            limit: Maximum number of results
+
+        Returns:
+            List[Tuple[types.Tool, float]]: Best matching tools with their scores, best first
+        """
+        scores: Dict[int, float] = {}
+        k1, b, avg_length = self.k1, self.b, self._avg_length or 1.0
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = self._idf[token]
+            for doc_id, frequency in postings:
+                norm = k1 * (1 - b + b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.tools[doc_id], score) for doc_id, score in best]
+
+
+def search_tool_definition() -> types.Tool:
+    """Definition of the search meta-tool added to services with many tools"""
+    return types.Tool(
+        name=SEARCH_TOOL_NAME,
+        description=(
+            "Search the tools of this service. Describe the task in natural language to get the best "
+            "matching tools with their input schemas, instead of loading every tool; then call them by name."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "What you want to do, e.g. 'create an invoice for a customer'"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": MAX_SEARCH_LIMIT, "default": 10,
+                          "description": "Maximum number of tools to return"},
+            },
+            "required": ["query"],
+        },
+    )
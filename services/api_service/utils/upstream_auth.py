@@ -0,0 +1,266 @@
+"""
+Upstream auth - OAuth2 client credentials tokens for upstream APIs, cached in-process and in Redis
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Dict, NamedTuple, Optional
+
+import httpx
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+from services.common.utils.secure_config import decrypt_config
+
+logger = get_logger(__name__)
+
+OAUTH2_CLIENT_CREDENTIALS = "oauth2_client_credentials"
+
+# Refresh-failure behavior
+FAIL_CLOSED = "fail"        # the tool call fails
+USE_STALE = "use_stale"     # keep sending the last token and let the upstream decide
+
+# Delete the refresh lock only if it is still ours
+_UNLOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class UpstreamAuthError(Exception):
+    """No valid upstream token could be obtained"""
+
+
+class UpstreamToken(NamedTuple):
+    access_token: str
+    token_type: str
+    # time.time() based
+    expires_at: float
+    refresh_token: Optional[str] = None
+    # time.time() when issued (0 for tokens cached before it was recorded)
+    issued_at: float = 0.0
+
+
+class UpstreamAuthManager:
+    """
+    Upstream token provider keyed by service
+
+    Tokens live in a process-local map and in Redis (shared by API workers, TTL =
+    token lifetime). A token inside the refresh window is still returned while a
+    single background refresh runs; only a missing or expired token makes the call
+    wait, and concurrent waiters share one fetch (per process, plus a Redis lock
+    across processes). Refresh tokens are used when the token endpoint issues them,
+    with a fallback to a new client credentials grant.
+    """
+
+    def __init__(self):
+        self.refresh_before_seconds = Config.UPSTREAM_AUTH_REFRESH_BEFORE_SECONDS
+        self.failure_backoff_seconds = Config.UPSTREAM_AUTH_FAILURE_BACKOFF_SECONDS
+        self.on_refresh_failure = Config.UPSTREAM_AUTH_ON_REFRESH_FAILURE
+        self._tokens: Dict[str, UpstreamToken] = {}
+        self._configs: Dict[str, dict] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._failed_until: Dict[str, float] = {}
+
+    def parse_config(self, auth_config: Optional[str]) -> Optional[dict]:
+        """Decrypt and validate a service auth_config (cached by its stored value)"""
+        if not auth_config:
+            return None
+        config = self._configs.get(auth_config)
+        if config is None:
+            config = decrypt_config(auth_config) or {}
+            if len(self._configs) > 1000:
+                self._configs.clear()
+            self._configs[auth_config] = config
+        if config.get("type") != OAUTH2_CLIENT_CREDENTIALS:
+            return None
+        return config
+
+    async def get_auth_headers(self, service_id: str, auth_config: Optional[str]) -> Dict[str, str]:
+        """
+        Auth headers for a call to the service upstream
+
+        Args:
+            service_id: Service ID
+            auth_config: Stored (encrypted) auth_config of the service
+
+        Returns:
+            Dict[str, str]: Headers to add, empty if the service has no upstream auth
+
+        Raises:
+            UpstreamAuthError: If no token is available and the failure policy is to fail
+        """
+        config = self.parse_config(auth_config)
+        if config is None:
+            return {}
+        key = self._cache_key(service_id, config)
+        token = await self._get_token(key, config)
+        header = config.get("header") or "Authorization"
+        if header.lower() == "authorization":
+            return {header: f"{token.token_type or 'Bearer'} {token.access_token}"}
+        return {header: token.access_token}
+
+    def invalidate(self, service_id: str, auth_config: Optional[str]) -> None:
+        """Drop a token the upstream rejected (e.g. revoked before its expiry)"""
+        config = self.parse_config(auth_config)
+        if config is None:
+            return
+        key = self._cache_key(service_id, config)
+        self._tokens.pop(key, None)
+        try:
+            redis_client.delete(key)
+        except Exception as e:
+            logger.warning(f"Failed to drop cached upstream token: {e}")
+
+    @staticmethod
+    def _cache_key(service_id: str, config: dict) -> str:
+        # Changing the credentials changes the key, so stale tokens are never reused
+        digest = hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        return RedisKeys.upstream_token_key(service_id, digest)
+
+    async def _get_token(self, key: str, config: dict) -> UpstreamToken:
+        now = time.time()
+        token = self._tokens.get(key)
+        if token is None:
+            token = await asyncio.to_thread(self._load_shared, key)
+            if token is not None:
+                self._tokens[key] = token
+
+        if token is not None and token.expires_at > now:
+            if token.expires_at - now <= self._refresh_window(config, token) and now >= self._failed_until.get(key, 0):
+                # Still valid: refresh in the background, callers keep the current token
+                self._refresh(key, config, token)
+            return token
+
+        if now < self._failed_until.get(key, 0):
+            return self._on_failure(key, config, token, "token endpoint recently failed")
+        try:
+            return await asyncio.shield(self._refresh(key, config, token))
+        except Exception as e:
+            return self._on_failure(key, config, token, str(e))
+
+    def _refresh_window(self, config: dict, token: UpstreamToken) -> float:
+        window = float(config.get("refresh_before_seconds") or self.refresh_before_seconds)
+        # Short-lived tokens would otherwise be refreshed on every call
+        if token.issued_at:
+            window = min(window, (token.expires_at - token.issued_at) / 2)
+        return window
+
+    def _on_failure(self, key: str, config: dict, token: Optional[UpstreamToken], reason: str) -> UpstreamToken:
+        policy = config.get("on_refresh_failure") or self.on_refresh_failure
+        if policy == USE_STALE and token is not None:
+            logger.warning(f"Using stale upstream token ({reason})")
+            return token
+        raise UpstreamAuthError(f"Failed to obtain upstream access token: {reason}")
+
+    def _refresh(self, key: str, config: dict, current: Optional[UpstreamToken]) -> asyncio.Task:
+        """Start (or join) the single refresh of a token"""
+        task = self._refreshing.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._do_refresh(key, config, current))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._refreshing[key] = task
+        return task
+
+    async def _do_refresh(self, key: str, config: dict, current: Optional[UpstreamToken]) -> UpstreamToken:
+        lock_key = f"{key}:lock"
+        lock_token = uuid.uuid4().hex
+        try:
+            locked = await asyncio.to_thread(redis_client.client.set, lock_key, lock_token, nx=True, ex=30)
+        except Exception as e:
+            logger.warning(f"Upstream token lock unavailable, refreshing without it: {e}")
+            locked = True
+
+        try:
+            if not locked:
+                # Another worker is refreshing: wait for its token
+                for _ in range(50):
+                    await asyncio.sleep(0.1)
+                    token = await asyncio.to_thread(self._load_shared, key)
+                    if token is not None and (current is None or token.access_token != current.access_token):
+                        self._tokens[key] = token
+                        return token
+
+            token = None
+            if current is not None and current.refresh_token:
+                try:
+                    token = await self._request_token(config, {"grant_type": "refresh_token", "refresh_token": current.refresh_token})
+                except Exception as e:
+                    logger.info(f"Upstream refresh_token grant failed, using client credentials: {e}")
+            if token is None:
+                params = {"grant_type": "client_credentials"}
+                if config.get("scope"):
+                    params["scope"] = config["scope"]
+                if config.get("audience"):
+                    params["audience"] = config["audience"]
+                token = await self._request_token(config, params)
+        except Exception as e:
+            self._failed_until[key] = time.time() + self.failure_backoff_seconds
+            logger.error(f"Upstream token request failed: {e}")
+            raise
+        finally:
+            if locked:
+                try:
+                    # The lock may have expired and been taken by another worker meanwhile
+                    await asyncio.to_thread(redis_client.client.eval, _UNLOCK_SCRIPT, 1, lock_key, lock_token)
+                except Exception:
+                    pass
+
+        self._failed_until.pop(key, None)
+        self._tokens[key] = token
+        try:
+            await asyncio.to_thread(self._store_shared, key, token)
+        except Exception as e:
+            logger.warning(f"Failed to share upstream token: {e}")
+        return token
+
+    async def _request_token(self, config: dict, params: dict) -> UpstreamToken:
+        auth = None
+        data = dict(params)
+        if config.get("auth_method") == "client_secret_basic":
+            auth = httpx.BasicAuth(config.get("client_id", ""), config.get("client_secret", ""))
+        else:
+            data["client_id"] = config.get("client_id", "")
+            data["client_secret"] = config.get("client_secret", "")
+
+        async with httpx.AsyncClient(timeout=Config.UPSTREAM_AUTH_TIMEOUT_SECONDS) as client:
+            response = await client.post(config["token_url"], data=data, auth=auth, headers={"Accept": "application/json"})
+            response.raise_for_status()
+            body = response.json()
+
+        access_token = body.get("access_token")
+        if not access_token:
+            raise UpstreamAuthError("Token endpoint response has no access_token")
+        expires_in = float(body.get("expires_in") or 3600)
+        issued_at = time.time()
+        return UpstreamToken(
+            access_token=access_token,
+            token_type=body.get("token_type") or "Bearer",
+            expires_at=issued_at + expires_in,
+            refresh_token=body.get("refresh_token"),
+            issued_at=issued_at,
+        )
+
+    @staticmethod
+    def _load_shared(key: str) -> Optional[UpstreamToken]:
+        value = redis_client.client.get(key)
+        if not value:
+            return None
+        return UpstreamToken(**json.loads(value))
+
+    @staticmethod
+    def _store_shared(key: str, token: UpstreamToken) -> None:
+        ttl = int(token.expires_at - time.time())
+        if ttl > 0:
+            redis_client.client.set(key, json.dumps(token._asdict()), ex=ttl)
+
+
+# Global instance
+upstream_auth = UpstreamAuthManager()
@@ -51,6 +51,7 @@ class Config:
     _default_no_auth_paths = [
         "/",
         "/health",
+        "/metrics",
         "/docs",
         "/openapi.json",
         "/redoc",
@@ -77,4 +78,114 @@ class Config:
     ]
     MCP_SESSION_IDLE_TTL_SECONDS = int(os.getenv("MCP_SESSION_IDLE_TTL_SECONDS", 900))
     MCP_SESSION_CLEANUP_INTERVAL_SECONDS = int(os.getenv("MCP_SESSION_CLEANUP_INTERVAL_SECONDS", 60))
+    # Per-session memory accounting: measured baseline of a live transport + server task, and node cap (0 = unlimited)
+    MCP_SESSION_BASE_MEMORY_BYTES = int(os.getenv("MCP_SESSION_BASE_MEMORY_BYTES", 32768))
+    MCP_SESSION_MEMORY_LIMIT_MB = int(os.getenv("MCP_SESSION_MEMORY_LIMIT_MB", 0))
+    # MCP event store for resumable streams: "list" (Redis lists) or "stream" (Redis Streams)
+    MCP_EVENT_STORE_BACKEND = os.getenv("MCP_EVENT_STORE_BACKEND", "list").lower()
+    MCP_EVENT_STREAM_MAXLEN = int(os.getenv("MCP_EVENT_STREAM_MAXLEN", 1000))
+    # Compress event payloads at or above this size (0 = never) and cap retained bytes per session (0 = unlimited)
+    MCP_EVENT_COMPRESS_MIN_BYTES = int(os.getenv("MCP_EVENT_COMPRESS_MIN_BYTES", 0))
+    MCP_EVENT_SESSION_MAX_BYTES = int(os.getenv("MCP_EVENT_SESSION_MAX_BYTES", 0))
+    # Stateless StreamableHTTP: JSON responses, no persistent transport/server per client
+    MCP_STATELESS_MODE = os.getenv("MCP_STATELESS_MODE", "false").lower() == "true"
+    MCP_STATELESS_SERVICE_IDS = [s.strip() for s in os.getenv("MCP_STATELESS_SERVICE_IDS", "").split(",") if s.strip()]
+    # Process-local API key auth cache (positive / negative entry TTLs, max entries)
+    APIKEY_AUTH_CACHE_TTL_SECONDS = int(os.getenv("APIKEY_AUTH_CACHE_TTL_SECONDS", 60))
+    APIKEY_AUTH_NEGATIVE_TTL_SECONDS = int(os.getenv("APIKEY_AUTH_NEGATIVE_TTL_SECONDS", 30))
+    APIKEY_AUTH_CACHE_MAX_ENTRIES = int(os.getenv("APIKEY_AUTH_CACHE_MAX_ENTRIES", 10000))
+    # Process-local group -> services permission sets (safety-net TTL; changes are pushed via Redis)
+    PERMISSION_INDEX_TTL_SECONDS = int(os.getenv("PERMISSION_INDEX_TTL_SECONDS", 60))
+    # Process-local service identifier (ID / slug_name) resolution cache
+    SERVICE_RESOLVER_TTL_SECONDS = int(os.getenv("SERVICE_RESOLVER_TTL_SECONDS", 60))
+    SERVICE_RESOLVER_NEGATIVE_TTL_SECONDS = int(os.getenv("SERVICE_RESOLVER_NEGATIVE_TTL_SECONDS", 30))
+    SERVICE_RESOLVER_MAX_ENTRIES = int(os.getenv("SERVICE_RESOLVER_MAX_ENTRIES", 10000))
+    # Rate limits (requests per second and burst size; 0 RPS = unlimited), enforced per apikey, user and service
+    RATE_LIMIT_APIKEY_RPS = float(os.getenv("RATE_LIMIT_APIKEY_RPS", 0))
+    RATE_LIMIT_APIKEY_BURST = float(os.getenv("RATE_LIMIT_APIKEY_BURST", 0))
+    RATE_LIMIT_USER_RPS = float(os.getenv("RATE_LIMIT_USER_RPS", 0))
+    RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", 0))
+    RATE_LIMIT_SERVICE_RPS = float(os.getenv("RATE_LIMIT_SERVICE_RPS", 0))
+    RATE_LIMIT_SERVICE_BURST = float(os.getenv("RATE_LIMIT_SERVICE_BURST", 0))
+    RATE_LIMIT_LOCAL_MAX_ENTRIES = int(os.getenv("RATE_LIMIT_LOCAL_MAX_ENTRIES", 10000))
+    # Admission control: shed new work with 503 + Retry-After when saturated
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "false").lower() == "true"
+    # Signal limits (0 = ignore the signal)
+    ADMISSION_MAX_LOOP_LAG_MS = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", 200))
+    ADMISSION_MAX_DB_POOL_UTILIZATION = float(os.getenv("ADMISSION_MAX_DB_POOL_UTILIZATION", 0.9))
+    ADMISSION_MAX_INFLIGHT_CALLS = int(os.getenv("ADMISSION_MAX_INFLIGHT_CALLS", 0))
+    ADMISSION_MAX_BROKER_LATENCY_MS = float(os.getenv("ADMISSION_MAX_BROKER_LATENCY_MS", 500))
+    # Load score (1.0 = a signal at its limit) at which anonymous traffic / existing sessions are shed
+    ADMISSION_LOW_PRIORITY_THRESHOLD = float(os.getenv("ADMISSION_LOW_PRIORITY_THRESHOLD", 0.7))
+    ADMISSION_HIGH_PRIORITY_THRESHOLD = float(os.getenv("ADMISSION_HIGH_PRIORITY_THRESHOLD", 1.5))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 2))
+    # Upstream tool call deadline when the tool has no timeout_ms of its own
+    UPSTREAM_DEFAULT_TIMEOUT_MS = int(os.getenv("UPSTREAM_DEFAULT_TIMEOUT_MS", 30000))
+    # Hedged GETs: resend after the tool's latency quantile once enough samples exist
+    UPSTREAM_HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE_ENABLED", "true").lower() == "true"
+    UPSTREAM_HEDGE_QUANTILE = float(os.getenv("UPSTREAM_HEDGE_QUANTILE", 0.95))
+    UPSTREAM_HEDGE_MIN_SAMPLES = int(os.getenv("UPSTREAM_HEDGE_MIN_SAMPLES", 20))
+    UPSTREAM_HEDGE_MIN_DELAY_MS = int(os.getenv("UPSTREAM_HEDGE_MIN_DELAY_MS", 10))
+    # Rolling window of the per-tool latency histograms
+    UPSTREAM_LATENCY_WINDOW_SECONDS = int(os.getenv("UPSTREAM_LATENCY_WINDOW_SECONDS", 60))
+    # Upstream response bodies above this size are rejected while streaming (0 = unlimited)
+    UPSTREAM_MAX_RESPONSE_BYTES = int(os.getenv("UPSTREAM_MAX_RESPONSE_BYTES", 64 * 1024 * 1024))
+    # Tool results longer than this (characters, 0 = never) are stored in Redis and read via resources/read
+    # (tools without an outputSchema only: the summary returned instead has no structuredContent)
+    MCP_LARGE_RESULT_THRESHOLD_CHARS = int(os.getenv("MCP_LARGE_RESULT_THRESHOLD_CHARS", 0))
+    MCP_LARGE_RESULT_CHUNK_CHARS = int(os.getenv("MCP_LARGE_RESULT_CHUNK_CHARS", 256 * 1024))
+    MCP_LARGE_RESULT_TTL_SECONDS = int(os.getenv("MCP_LARGE_RESULT_TTL_SECONDS", 900))
+    # CPU-heavy Python steps (schema building, output validation) on payloads at or above this size run in a worker thread (0 = always inline)
+    CPU_OFFLOAD_THRESHOLD_BYTES = int(os.getenv("CPU_OFFLOAD_THRESHOLD_BYTES", 256 * 1024))
+    CPU_OFFLOAD_MAX_WORKERS = int(os.getenv("CPU_OFFLOAD_MAX_WORKERS", 4))
+    # Idempotency keys for tools/call: stored result TTL, in-flight marker TTL (extended while the call runs; bounds
+    # how long a crashed worker holds a key), how long a retry waits for the first call, and the largest result stored
+    # for replay (0 = unlimited)
+    IDEMPOTENCY_RESULT_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_RESULT_TTL_SECONDS", 86400))
+    IDEMPOTENCY_INFLIGHT_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_INFLIGHT_TTL_SECONDS", 120))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 30))
+    IDEMPOTENCY_MAX_RESULT_BYTES = int(os.getenv("IDEMPOTENCY_MAX_RESULT_BYTES", 1024 * 1024))
+    # Upstream OAuth2 tokens: refresh this long before expiry, token endpoint timeout, retry backoff after a failure,
+    # and what to do when no fresh token can be obtained ("fail" or "use_stale"; overridable per service)
+    UPSTREAM_AUTH_REFRESH_BEFORE_SECONDS = int(os.getenv("UPSTREAM_AUTH_REFRESH_BEFORE_SECONDS", 60))
+    UPSTREAM_AUTH_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_AUTH_TIMEOUT_SECONDS", 10))
+    UPSTREAM_AUTH_FAILURE_BACKOFF_SECONDS = int(os.getenv("UPSTREAM_AUTH_FAILURE_BACKOFF_SECONDS", 5))
+    UPSTREAM_AUTH_ON_REFRESH_FAILURE = os.getenv("UPSTREAM_AUTH_ON_REFRESH_FAILURE", "fail").lower()
+    # Mock upstream: serve the tools' response examples instead of calling the upstream, for every service
+    # (MCP_MOCK_UPSTREAM) or per service (mcp_service.mock_enabled). Latency is log-normal with the given
+    # median and p99 (p99 <= median = fixed latency); a share of calls fails with a simulated upstream error.
+    # Mock calls are free unless charging is opted into, for every service (MCP_MOCK_BILLING) or per service
+    # (mcp_service.mock_billing_enabled)
+    MCP_MOCK_UPSTREAM = os.getenv("MCP_MOCK_UPSTREAM", "false").lower() == "true"
+    MCP_MOCK_BILLING = os.getenv("MCP_MOCK_BILLING", "false").lower() == "true"
+    MCP_MOCK_LATENCY_MEDIAN_MS = float(os.getenv("MCP_MOCK_LATENCY_MEDIAN_MS", 50))
+    MCP_MOCK_LATENCY_P99_MS = float(os.getenv("MCP_MOCK_LATENCY_P99_MS", 250))
+    MCP_MOCK_ERROR_RATE = float(os.getenv("MCP_MOCK_ERROR_RATE", 0))
+    # Concurrent tools/call requests per MCP session (0 = unlimited); further calls wait for a slot
+    MCP_SESSION_MAX_CONCURRENT_CALLS = int(os.getenv("MCP_SESSION_MAX_CONCURRENT_CALLS", 8))
+    # Pre-deductions of a user arriving within this window are reserved as one batch (0 = same event loop tick)
+    BILLING_BATCH_WINDOW_MS = float(os.getenv("BILLING_BATCH_WINDOW_MS", 0))
+    # Bulkheads: upstream calls of the services in an isolation pool (mcp_service.isolation_pool, default pool
+    # otherwise) share a concurrency limit and a dedicated connection pool; calls wait at most BULKHEAD_MAX_WAIT_MS
+    # for a slot. BULKHEAD_POOLS sets per-pool limits as "name:max_concurrent:max_connections,..."
+    BULKHEAD_ENABLED = os.getenv("BULKHEAD_ENABLED", "false").lower() == "true"
+    BULKHEAD_POOLS = os.getenv("BULKHEAD_POOLS", "")
+    BULKHEAD_DEFAULT_MAX_CONCURRENT = int(os.getenv("BULKHEAD_DEFAULT_MAX_CONCURRENT", 100))
+    BULKHEAD_DEFAULT_MAX_CONNECTIONS = int(os.getenv("BULKHEAD_DEFAULT_MAX_CONNECTIONS", 100))
+    BULKHEAD_MAX_WAIT_MS = float(os.getenv("BULKHEAD_MAX_WAIT_MS", 1000))
+    # Each API worker publishes its connection counters to Redis at this interval for cluster-wide stats
+    CONNECTION_STATS_HEARTBEAT_SECONDS = int(os.getenv("CONNECTION_STATS_HEARTBEAT_SECONDS", 10))
+    # tools/list page size, opt-in (0 = no pagination): services with more tools are listed with
+    # cursors, so clients must follow nextCursor to see every tool (e.g. 200)
+    MCP_TOOLS_PAGE_SIZE = int(os.getenv("MCP_TOOLS_PAGE_SIZE", 0))
+    # Services with at least this many tools get the search_tools meta-tool (BM25 over tool names/descriptions),
+    # opt-in (0 = off): it is added to the tool list clients see (e.g. 50)
+    MCP_TOOL_SEARCH_MIN_TOOLS = int(os.getenv("MCP_TOOL_SEARCH_MIN_TOOLS", 0))
+    # Prometheus /metrics endpoint; state gauges (DB pool, sessions) are refreshed by every worker at this interval
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_REFRESH_SECONDS = int(os.getenv("METRICS_REFRESH_SECONDS", 15))
+    # Tracing exporters, comma separated: otlp (OTEL_EXPORTER_OTLP_* settings), console, file (empty = off)
+    TRACING_EXPORTERS = os.getenv("TRACING_EXPORTERS", "")
+    TRACING_FILE_PATH = os.getenv("TRACING_FILE_PATH", "logs/traces.jsonl")
+    TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", 1.0))
     ALLOWED_ORIGINS = [s.strip() for s in os.getenv("ALLOWED_ORIGINS", "*").split(",") if s.strip()]
@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from .config import Config
+from .metrics import DB_QUERY_SECONDS
 from .models.base import Base
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,25 @@ engine = create_engine(**engine_config)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "unknown"
+    DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -29,6 +29,8 @@ DUPLICATE_RESOURCE = {"code": 409, "message": "Resource already exists"}
 VALIDATION_FAILED = {"code": 422, "message": "Validation failed"}
 BUSINESS_ERROR = {"code": 422, "message": "Business logic error"}
 
+TOO_MANY_REQUESTS = {"code": 429, "message": "Too many requests"}
+
 # 5xx Server Errors  
 INTERNAL_ERROR = {"code": 500, "message": "Internal server error"}
 DATABASE_ERROR = {"code": 500, "message": "Database operation failed"}
@@ -60,6 +60,13 @@ class BusinessException(BaseAPIException):
         super().__init__(message, 422, data)
 
 
+class TooManyRequestsException(BaseAPIException):
+    """Exception for rate limited requests (429)"""
+    
+    def __init__(self, message: str = "Too many requests", data: Optional[Dict[str, Any]] = None):
+        super().__init__(message, 429, data)
+
+
 class InternalServerException(BaseAPIException):
     """Exception for internal server errors (500)"""
     
@@ -1,13 +1,189 @@
 """
 Unified logging configuration for XPack project
 Supports different log levels and service-specific log files
+
+Records are handed to a queue by the logging call and written (console and
+rotating files, rotation included) by a background listener thread, so no disk
+I/O happens on the event loop thread. On the way in, records below WARNING can
+be sampled (LOG_SAMPLING) and rate limited per logger (LOG_RATE_LIMIT_PER_SECOND),
+and long messages are truncated (LOG_MAX_MESSAGE_CHARS). LOG_JSON switches the
+output to one JSON object per line.
 """
 
+import atexit
+import copy
+import json
 import os
 import logging
 import logging.handlers
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+from opentelemetry import trace
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'service': getattr(record, 'service_name', None),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        trace_id = getattr(record, 'trace_id', None)
+        if trace_id:
+            entry['trace_id'] = trace_id
+        dropped = getattr(record, 'dropped', None)
+        if dropped:
+            entry['dropped'] = dropped
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogPipelineFilter(logging.Filter):
+    """
+    Sampling, rate limiting and truncation of log records
+
+    Warnings and errors always pass. Below WARNING, a record is kept with the
+    sampling ratio of its logger (longest matching prefix in LOG_SAMPLING) and
+    while its logger stays under the per-second limit; the first record let
+    through after a limited second reports how many were dropped. The decision
+    is stored on the record, so every handler sharing this filter agrees on it.
+    """
+
+    def __init__(self, sampling: Dict[str, float], rate_limit: int, max_message_chars: int):
+        super().__init__()
+        self.sampling = sampling
+        self.rate_limit = rate_limit
+        self.max_message_chars = max_message_chars
+        self._ratios: Dict[str, float] = {}
+        # Logger name -> [window start second, records in window, dropped records]
+        self._windows: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = getattr(record, '_pipeline_decision', None)
+        if decision is not None:
+            return decision
+
+        dropped = 0
+        if record.levelno < logging.WARNING:
+            if self.sampling and random.random() >= self._ratio(record.name):
+                record._pipeline_decision = False
+                return False
+            if self.rate_limit > 0:
+                dropped = self._take(record.name)
+                if dropped < 0:
+                    record._pipeline_decision = False
+                    return False
+
+        message = record.getMessage()
+        if 0 < self.max_message_chars < len(message):
+            message = f"{message[:self.max_message_chars]}... [truncated {len(message) - self.max_message_chars} chars]"
+        if dropped:
+            message = f"{message} [{dropped} records of this logger dropped by rate limit]"
+            record.dropped = dropped
+        record.msg = message
+        record.args = None
+
+        # Captured here: the listener thread does not see the caller's span
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = trace.format_trace_id(span_context.trace_id)
+
+        record._pipeline_decision = True
+        return True
+
+    def _ratio(self, name: str) -> float:
+        ratio = self._ratios.get(name)
+        if ratio is None:
+            ratio = 1.0
+            best = -1
+            for prefix, value in self.sampling.items():
+                if (name == prefix or name.startswith(prefix + '.')) and len(prefix) > best:
+                    ratio, best = value, len(prefix)
+            self._ratios[name] = ratio
+        return ratio
+
+    def _take(self, name: str) -> int:
+        """Count a record against its logger's limit: -1 if over, else records dropped in the previous window"""
+        second = int(time.monotonic())
+        with self._lock:
+            window = self._windows.get(name)
+            if window is None or window[0] != second:
+                dropped = window[2] if window is not None else 0
+                self._windows[name] = [second, 1, 0]
+                return dropped
+            if window[1] >= self.rate_limit:
+                window[2] += 1
+                return -1
+            window[1] += 1
+            return 0
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the caller on debug and info records
+
+    When the queue is full (the listener cannot keep up with the disk), records
+    below WARNING are dropped and counted; warnings and errors wait briefly.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Tracebacks are rendered here; the message was already merged by LogPipelineFilter
+        record = copy.copy(record)
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING:
+                self.dropped += 1
+                return
+            try:
+                self.queue.put(record, timeout=0.1)
+            except queue.Full:
+                self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def shutdown_logging() -> None:
+    """Stop the listener thread after it wrote the queued records"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
 
 
 class LoggingConfig:
@@ -38,6 +214,12 @@ class LoggingConfig:
         self.log_to_file = self._get_log_to_file()
         self.max_size = self._get_max_size()
         self.backup_count = self._get_backup_count()
+        self.log_async = os.getenv("LOG_ASYNC", "true").lower() == "true"
+        self.queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        self.log_json = os.getenv("LOG_JSON", "false").lower() == "true"
+        self.max_message_chars = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "4096"))
+        self.sampling = self._get_sampling()
+        self.rate_limit = int(os.getenv("LOG_RATE_LIMIT_PER_SECOND", "0"))
         
         # Create logs directory
         self.logs_dir = Path("logs") / service_name
@@ -64,9 +246,20 @@ class LoggingConfig:
         """Get backup count from environment variable"""
         return int(os.getenv("LOG_BACKUP_COUNT", "5"))
     
+    def _get_sampling(self) -> Dict[str, float]:
+        """Get per-logger sampling ratios from environment variable (e.g. "services.api_service=0.1,httpx=0")"""
+        sampling = {}
+        for item in os.getenv("LOG_SAMPLING", "").split(","):
+            name, _, ratio = item.partition("=")
+            if name.strip() and ratio.strip():
+                sampling[name.strip()] = min(1.0, max(0.0, float(ratio)))
+        return sampling
+
     def _setup_logging(self):
         """Setup logging configuration"""
+        global _listener
         # Clear existing handlers
+        shutdown_logging()
         root_logger = logging.getLogger()
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
@@ -75,16 +268,35 @@ class LoggingConfig:
         root_logger.setLevel(self.log_level)
         
         # Create formatter
-        formatter = logging.Formatter(self.LOG_FORMAT, self.DATE_FORMAT)
+        if self.log_json:
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(self.LOG_FORMAT, self.DATE_FORMAT)
+
+        # Output handlers: attached to the root logger, or written by the listener thread
+        output_logger = logging.Logger("xpack.log_output") if self.log_async else root_logger
         
         # Add console handler
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
-        root_logger.addHandler(console_handler)
+        output_logger.addHandler(console_handler)
         
         # Add file handlers if enabled
         if self.log_to_file:
-            self._add_file_handlers(root_logger, formatter)
+            self._add_file_handlers(output_logger, formatter)
+
+        if self.log_async:
+            queue_handler = NonBlockingQueueHandler(queue.Queue(self.queue_size))
+            root_logger.addHandler(queue_handler)
+            _listener = logging.handlers.QueueListener(
+                queue_handler.queue, *output_logger.handlers, respect_handler_level=True
+            )
+            _listener.start()
+
+        # Sampling, rate limiting and truncation, before records are queued or written
+        pipeline_filter = LogPipelineFilter(self.sampling, self.rate_limit, self.max_message_chars)
+        for handler in root_logger.handlers:
+            handler.addFilter(pipeline_filter)
         
         # Set third-party library log levels
         self._configure_third_party_loggers()
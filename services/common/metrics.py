@@ -0,0 +1,217 @@
+"""
+Prometheus metrics - Latency histograms and counters of the hot path, served on /metrics
+
+Multi-worker deployments set PROMETHEUS_MULTIPROC_DIR to an empty directory per
+service (cleared before the workers start): every worker then writes its samples
+to memory-mapped files there and /metrics, whichever worker serves it, reports
+the sum over all workers.
+"""
+
+import asyncio
+import os
+import time
+from typing import Callable, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from starlette.responses import Response
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds; 1 ms to 1 minute
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds; Redis and DB round trips are mostly sub-millisecond
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "xpack_http_request_duration_seconds", "HTTP request latency (streaming responses: until the stream ends)",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+TOOL_CALL_SECONDS = Histogram(
+    "xpack_tool_call_duration_seconds", "Tool call latency, billing included",
+    ["service_id", "tool", "status"], buckets=LATENCY_BUCKETS,
+)
+PRE_DEDUCT_SECONDS = Histogram(
+    "xpack_billing_pre_deduct_duration_seconds", "Balance check and pre-deduction latency",
+    ["outcome"], buckets=FAST_BUCKETS,
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "xpack_redis_command_duration_seconds", "Redis command latency (pipelines count as one command)",
+    ["command"], buckets=FAST_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "xpack_db_query_duration_seconds", "SQL statement latency",
+    ["operation"], buckets=FAST_BUCKETS,
+)
+RABBITMQ_PUBLISH_SECONDS = Histogram(
+    "xpack_rabbitmq_publish_duration_seconds", "RabbitMQ publish latency",
+    ["queue", "status"], buckets=FAST_BUCKETS,
+)
+BILLING_MESSAGES = Counter(
+    "xpack_billing_messages", "Billing messages handled by the consumer",
+    ["status"],
+)
+BILLING_MESSAGE_SECONDS = Histogram(
+    "xpack_billing_message_duration_seconds", "Billing message processing time",
+    buckets=FAST_BUCKETS,
+)
+BILLING_MESSAGE_LAG_SECONDS = Histogram(
+    "xpack_billing_message_lag_seconds", "Time from publish to the consumer picking up a billing message",
+    buckets=LATENCY_BUCKETS,
+)
+EVENT_STORE_EVENTS = Counter(
+    "xpack_event_store_events", "Events stored for resumable MCP streams",
+    ["backend"],
+)
+EVENT_STORE_BYTES = Counter(
+    "xpack_event_store_bytes", "Bytes of events stored for resumable MCP streams",
+    ["backend"],
+)
+# Gauges are summed over live workers
+DB_POOL_CONNECTIONS = Gauge(
+    "xpack_db_pool_connections", "SQLAlchemy pool connections", ["state"], multiprocess_mode="livesum",
+)
+MCP_SESSIONS = Gauge(
+    "xpack_mcp_sessions", "Active StreamableHTTP sessions", multiprocess_mode="livesum",
+)
+MCP_SESSION_MEMORY_BYTES = Gauge(
+    "xpack_mcp_session_memory_bytes", "Estimated memory of active StreamableHTTP sessions", multiprocess_mode="livesum",
+)
+MCP_CONNECTIONS = Gauge(
+    "xpack_mcp_connections", "Tracked MCP client connections", multiprocess_mode="livesum",
+)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def metrics_response() -> Response:
+    """Current metrics in the Prometheus text format"""
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess files (call on shutdown)"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def refresh_db_pool_gauges() -> None:
+    from services.common.database import get_db_pool_status
+
+    status = get_db_pool_status()
+    if "error" in status:
+        return
+    DB_POOL_CONNECTIONS.labels("checked_out").set(status["checked_out_connections"])
+    DB_POOL_CONNECTIONS.labels("checked_in").set(status["checked_in_connections"])
+    # QueuePool reports overflow as negative until the pool is full
+    DB_POOL_CONNECTIONS.labels("overflow").set(max(0, status["overflow_connections"]))
+
+
+class GaugeRefresher:
+    """
+    Refreshes state gauges (pool usage, sessions, ...) of this worker periodically
+
+    Every worker must update its own gauges: a scrape is served by a single worker
+    and, in multiprocess mode, reads the values the others last wrote.
+    """
+
+    def __init__(self, interval_seconds: int = Config.METRICS_REFRESH_SECONDS):
+        self.interval_seconds = max(1, interval_seconds)
+        self._callbacks: List[Callable[[], None]] = [refresh_db_pool_gauges]
+        self._task: Optional[asyncio.Task] = None
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    def start(self) -> None:
+        """Start refreshing (call from the running loop)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def refresh(self) -> None:
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Failed to refresh metrics gauge: {e}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            self.refresh()
+            await asyncio.sleep(self.interval_seconds)
+
+
+def route_template(scope, root_path: str) -> str:
+    """
+    Path template of the route that handled a request (e.g. /mcp/{service_id})
+
+    Args:
+        scope: ASGI scope, after the request was routed
+        root_path: root_path of the scope before routing
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    # Mounted apps extend root_path with their mount path
+    mount_path = scope.get("root_path", "")[len(root_path):]
+    if not hasattr(route, "endpoint"):
+        # A mount serving a plain ASGI app
+        return mount_path or path
+    return mount_path + path
+
+
+class HttpMetricsMiddleware:
+    """
+    ASGI middleware recording request latency by route template
+
+    Routes are labelled with their path template (e.g. /mcp/{service_id}), never the
+    raw path; unmatched requests share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_template(scope, root_path), str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+# Global instance
+gauge_refresher = GaugeRefresher()
@@ -0,0 +1,219 @@
+# Admission control middleware: shed new work early when the service is saturated
+
+import asyncio
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from fastapi.responses import JSONResponse
+from services.common.config import Config
+from services.common.database import get_db_pool_status
+from services.common.logging_config import get_logger
+from services.common.utils.response_utils import ResponseUtils
+from services.common import error_msg
+
+logger = get_logger(__name__)
+
+# Request priorities (higher survives more load)
+PRIORITY_LOW = 0       # anonymous traffic (no credentials)
+PRIORITY_NORMAL = 1    # authenticated requests opening new sessions / connections
+PRIORITY_HIGH = 2      # requests on existing sessions (in-flight work, paid calls)
+
+
+class AdmissionController:
+    """
+    Tracks saturation signals and decides whether to admit new requests
+
+    Each signal is normalized against its limit (1.0 = at the limit) and the load
+    score is the maximum of them:
+    - event loop lag (sampled by a background task)
+    - DB pool utilization (checked out / (pool_size + max_overflow)); checkouts
+      beyond this point wait up to pool_timeout
+    - in-flight tool calls
+    - broker backpressure (RabbitMQ connection.blocked, publish latency decaying
+      while idle); a blocked connection scores between the normal and high
+      thresholds, so existing sessions are still admitted
+
+    Low priority requests are shed first, existing sessions last. Whether a request
+    belongs to an existing session is answered by the session lookup registered by
+    the service (see set_session_lookup).
+    """
+
+    def __init__(self):
+        self.max_loop_lag = Config.ADMISSION_MAX_LOOP_LAG_MS / 1000.0
+        self.max_db_pool_utilization = Config.ADMISSION_MAX_DB_POOL_UTILIZATION
+        self.max_inflight_calls = Config.ADMISSION_MAX_INFLIGHT_CALLS
+        self.max_broker_latency = Config.ADMISSION_MAX_BROKER_LATENCY_MS / 1000.0
+        # Load score at which each priority is shed
+        self.thresholds = {
+            PRIORITY_LOW: Config.ADMISSION_LOW_PRIORITY_THRESHOLD,
+            PRIORITY_NORMAL: 1.0,
+            PRIORITY_HIGH: Config.ADMISSION_HIGH_PRIORITY_THRESHOLD,
+        }
+        self.loop_lag = 0.0
+        self.inflight_calls = 0
+        self.shed_count = 0
+        self._lag_task: Optional[asyncio.Task] = None
+        self._score = 0.0
+        self._score_at = 0.0
+        self._session_lookup: Optional[Callable[[dict], bool]] = None
+
+    def set_session_lookup(self, lookup: Callable[[dict], bool]) -> None:
+        """Register the check of whether an ASGI scope targets a live session of this process"""
+        self._session_lookup = lookup
+
+    def is_session_request(self, scope) -> bool:
+        if self._session_lookup is None:
+            return False
+        try:
+            return self._session_lookup(scope)
+        except Exception as e:
+            logger.warning(f"Session lookup failed: {e}")
+            return False
+
+    def start(self) -> None:
+        """Start the event loop lag sampler (call from the running loop)"""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(self._sample_loop_lag())
+
+    async def stop(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
+
+    async def _sample_loop_lag(self, interval: float = 0.25) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.monotonic() - started - interval)
+            # React quickly to spikes, decay slowly
+            self.loop_lag = lag if lag > self.loop_lag else 0.7 * self.loop_lag + 0.3 * lag
+            self._poll_broker()
+
+    @staticmethod
+    def _poll_broker() -> None:
+        # Deliver connection.blocked/unblocked even when nothing is being published
+        try:
+            from services.common.rabbitmq import rabbitmq_client
+        except Exception:
+            return
+        rabbitmq_client.poll_events()
+
+    @contextmanager
+    def track_inflight(self):
+        """Count a tool call as in flight for the duration of the context"""
+        self.inflight_calls += 1
+        try:
+            yield
+        finally:
+            self.inflight_calls -= 1
+
+    def signals(self) -> dict:
+        """Current normalized signals (1.0 = at the configured limit)"""
+        signals = {}
+        if self.max_loop_lag > 0:
+            signals["loop_lag"] = self.loop_lag / self.max_loop_lag
+        if self.max_db_pool_utilization > 0:
+            status = get_db_pool_status()
+            capacity = Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+            checked_out = status.get("checked_out_connections", 0)
+            signals["db_pool"] = checked_out / max(1, capacity) / self.max_db_pool_utilization
+        if self.max_inflight_calls > 0:
+            signals["inflight_calls"] = self.inflight_calls / self.max_inflight_calls
+        broker = self._broker_signal()
+        if broker is not None:
+            signals["broker"] = broker
+        return signals
+
+    def _broker_signal(self) -> Optional[float]:
+        try:
+            from services.common.rabbitmq import rabbitmq_client
+        except Exception:
+            return None
+        if rabbitmq_client.blocked:
+            # Publishes block until the alarm clears: stop new sessions, keep serving existing ones
+            return self.thresholds[PRIORITY_NORMAL]
+        if self.max_broker_latency > 0:
+            return rabbitmq_client.publish_latency() / self.max_broker_latency
+        return None
+
+    def load_score(self) -> float:
+        # Signals are cheap but shared by every request; refresh at most every 100ms
+        now = time.monotonic()
+        if now - self._score_at >= 0.1:
+            try:
+                self._score = max(self.signals().values(), default=0.0)
+            except Exception as e:
+                logger.warning(f"Failed to compute admission load score: {e}")
+                self._score = 0.0
+            self._score_at = now
+        return self._score
+
+    def admit(self, priority: int) -> bool:
+        return self.load_score() < self.thresholds[priority]
+
+    def retry_after(self) -> int:
+        """Retry hint in seconds, growing with the load score"""
+        return min(30, max(1, math.ceil(Config.ADMISSION_RETRY_AFTER_SECONDS * self._score)))
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": Config.ADMISSION_CONTROL_ENABLED,
+            "load_score": round(self.load_score(), 3),
+            "signals": {name: round(value, 3) for name, value in self.signals().items()},
+            "loop_lag_ms": round(self.loop_lag * 1000, 2),
+            "inflight_calls": self.inflight_calls,
+            "shed_count": self.shed_count,
+        }
+
+
+admission_controller = AdmissionController()
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware shedding requests with 503 + Retry-After under load
+
+    Pure ASGI (not BaseHTTPMiddleware) so streaming SSE responses pass through untouched.
+    Monitoring paths are always admitted.
+    """
+
+    EXEMPT_PATHS = ("/", "/health", "/metrics", "/mcp/connections/stats")
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not Config.ADMISSION_CONTROL_ENABLED or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        priority = self._priority(scope)
+        if self.controller.admit(priority):
+            await self.app(scope, receive, send)
+            return
+
+        self.controller.shed_count += 1
+        retry_after = self.controller.retry_after()
+        logger.warning(f"Request shed by admission control - Path: {scope['path']}, Priority: {priority}, Load: {self.controller.load_score():.2f}")
+        response = JSONResponse(
+            status_code=503,
+            content=ResponseUtils.error(message=error_msg.SERVICE_UNAVAILABLE["message"], code=503, data={"retry_after": retry_after}),
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
+
+    def _priority(self, scope) -> int:
+        # Live session of this process (checked against the session registry, not client headers)
+        if self.controller.is_session_request(scope):
+            return PRIORITY_HIGH
+        query = scope.get("query_string", b"")
+        if b"apikey=" in query or b"authkey=" in query:
+            return PRIORITY_NORMAL
+        return PRIORITY_LOW
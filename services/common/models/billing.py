@@ -22,6 +22,8 @@ class BillingMessage:
     call_end_time: Optional[datetime] = None
     call_log_id: Optional[str] = None
     apikey_id: Optional[str] = None
+    # Served by the mock upstream (see services.api_service.utils.mock_upstream)
+    mock: bool = False
 
 
 @dataclass
@@ -38,6 +40,7 @@ class ApiCallLogInfo:
     call_start_time: datetime
     call_end_time: Optional[datetime] = None
     apikey_id: Optional[str] = None
+    mock: bool = False
 
 
 @dataclass
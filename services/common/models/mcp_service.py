@@ -20,6 +20,7 @@ class McpService(Base):
     long_description: Mapped[str] = mapped_column(String, nullable=True, comment="Detailed description of the service (Markdown format)")
     base_url: Mapped[str] = mapped_column(String(512), nullable=True, comment="api url")
     headers: Mapped[str] = mapped_column(String, nullable=True, comment="Additional headers for requests (JSON Array format)")
+    auth_config: Mapped[str] = mapped_column(String, nullable=True, comment="Upstream auth configuration (encrypted JSON), e.g. OAuth2 client credentials")
     charge_type: Mapped[ChargeType] = mapped_column(
         Enum(ChargeType, values_callable=lambda obj: [e.value for e in obj]),
         nullable=False,
@@ -33,8 +34,11 @@ class McpService(Base):
         Numeric(10, 2), nullable=True, comment="Output token price (2 decimal places, for per_token charge type)"
     )
     enabled: Mapped[int] = mapped_column(Integer, nullable=True, comment="Service status: 0=disabled, 1=enabled")
+    mock_billing_enabled: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="Charge calls served in mock mode at the service price: 0=free, 1=charged")
     tags: Mapped[str] = mapped_column(String, nullable=True, comment="Tags")
     service_type: Mapped[str] = mapped_column(String(255), nullable=True, comment="Service type",default="openapi")
+    isolation_pool: Mapped[str] = mapped_column(String(64), nullable=True, comment="Bulkhead isolation pool, NULL for the default pool")
+    mock_enabled: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="Serve response examples instead of calling the upstream: 0=disabled, 1=enabled")
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=True,
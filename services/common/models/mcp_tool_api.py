@@ -40,6 +40,8 @@ class McpToolApi(Base):
     response_examples: Mapped[str] = mapped_column(String, nullable=True, comment="Response example")
     response_headers: Mapped[str] = mapped_column(String, nullable=True, comment="Response header definition")
     operation_examples: Mapped[str] = mapped_column(String, nullable=True, comment="API call example")
+    timeout_ms: Mapped[int] = mapped_column(Integer, nullable=True, comment="Upstream call timeout in milliseconds, NULL=default")
+    hedge_enabled: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="Hedge slow GET calls: 0=disabled, 1=enabled")
     enabled: Mapped[int] = mapped_column(Integer, nullable=False, default=1, comment="API status: 0=disabled, 1=enabled")
     is_deleted: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="Soft delete flag: 0=active, 1=deleted")
     created_at: Mapped[datetime] = mapped_column(
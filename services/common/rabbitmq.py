@@ -1,14 +1,27 @@
 import pika
 import logging
+import threading
+import time
+from typing import Optional
 from .config import Config
+from .metrics import RABBITMQ_PUBLISH_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Idle time after which the publish latency EWMA has decayed to half its value
+PUBLISH_LATENCY_HALF_LIFE_SECONDS = 5.0
+
 
 class RabbitMQClient:
     def __init__(self):
         self.connection = None
         self.channel = None
+        # Backpressure signals: broker flow control (connection.blocked) and publish latency EWMA
+        self.blocked = False
+        self.publish_latency_ewma = 0.0
+        self._last_publish_at = 0.0
+        # BlockingConnection is not thread-safe: publishes and event polling take turns
+        self._lock = threading.Lock()
         self._setup_connection()
 
     def _setup_connection(self):
@@ -24,14 +37,69 @@ class RabbitMQClient:
                 blocked_connection_timeout=300,
             )
             self.connection = pika.BlockingConnection(parameters)
+            self.connection.add_on_connection_blocked_callback(self._on_blocked)
+            self.connection.add_on_connection_unblocked_callback(self._on_unblocked)
+            self.blocked = False
             self.channel = self.connection.channel()
             logger.info("RabbitMQ connection established successfully")
         except Exception as e:
             logger.error(f"Failed to establish RabbitMQ connection: {str(e)}")
             raise
 
-    def publish(self, queue: str, message: str, persistent: bool = True):
-        """Publish message to queue"""
+    def _on_blocked(self, connection, method):
+        logger.warning("RabbitMQ connection blocked by broker (resource alarm)")
+        self.blocked = True
+
+    def _on_unblocked(self, connection, method):
+        logger.info("RabbitMQ connection unblocked")
+        self.blocked = False
+
+    def publish(self, queue: str, message: str, persistent: bool = True, headers: Optional[dict] = None):
+        """Publish message to queue (headers: extra message headers, e.g. trace context)"""
+        started = time.monotonic()
+        status = "error"
+        try:
+            with self._lock:
+                self._publish(queue, message, persistent, headers)
+            status = "success"
+        finally:
+            finished = time.monotonic()
+            elapsed = finished - started
+            self.publish_latency_ewma = 0.8 * self.publish_latency() + 0.2 * elapsed
+            self._last_publish_at = finished
+            RABBITMQ_PUBLISH_SECONDS.labels(queue, status).observe(elapsed)
+
+    def publish_latency(self) -> float:
+        """
+        Publish latency EWMA, decayed by the time since the last publish
+
+        The EWMA only moves on publishes; without the decay a slow publish followed
+        by no traffic would report the broker as slow forever.
+        """
+        if not self._last_publish_at:
+            return self.publish_latency_ewma
+        idle = time.monotonic() - self._last_publish_at
+        return self.publish_latency_ewma * 0.5 ** (idle / PUBLISH_LATENCY_HALF_LIFE_SECONDS)
+
+    def poll_events(self) -> None:
+        """
+        Process pending connection events without blocking
+
+        Blocked/unblocked notifications (and heartbeats) are only delivered while pika
+        processes I/O, which otherwise happens during publishes only. Skipped while a
+        publish holds the connection.
+        """
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if self.connection and not self.connection.is_closed:
+                self.connection.process_data_events(time_limit=0)
+        except Exception as e:
+            logger.warning(f"RabbitMQ event polling failed: {str(e)}")
+        finally:
+            self._lock.release()
+
+    def _publish(self, queue: str, message: str, persistent: bool = True, headers: Optional[dict] = None):
         try:
             # Ensure connection is available
             if not self.connection or self.connection.is_closed:
@@ -44,9 +112,7 @@ class RabbitMQClient:
             self.channel.queue_declare(queue=queue, durable=True)
 
             # Publish message
-            properties = None
-            if persistent:
-                properties = pika.BasicProperties(delivery_mode=2)
+            properties = self._properties(persistent, headers)
 
             self.channel.basic_publish(exchange="", routing_key=queue, body=message, properties=properties)
             logger.info(f"Message successfully published to queue: {queue}, message length: {len(message)} bytes")
@@ -61,13 +127,18 @@ class RabbitMQClient:
 
                 # Retry sending
                 self.channel.queue_declare(queue=queue, durable=True)
-                properties = pika.BasicProperties(delivery_mode=2) if persistent else None
+                properties = self._properties(persistent, headers)
                 self.channel.basic_publish(exchange="", routing_key=queue, body=message, properties=properties)
                 logger.info(f"Message retry successful to queue {queue}")
             except Exception as retry_error:
                 logger.error(f"Message retry failed: {str(retry_error)}")
                 raise
 
+    @staticmethod
+    def _properties(persistent: bool, headers: Optional[dict] = None) -> pika.BasicProperties:
+        # Publish time lets consumers measure their lag
+        return pika.BasicProperties(delivery_mode=2 if persistent else None, headers={**(headers or {}), "x-published-at": time.time()})
+
     def close(self):
         """Close connection"""
         try:
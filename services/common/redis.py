@@ -1,7 +1,35 @@
+import time
 import redis
 from redis import Redis
+from redis.client import Pipeline
 from typing import Optional, Any
 from .config import Config
+from .metrics import REDIS_COMMAND_SECONDS
+
+
+class TimedPipeline(Pipeline):
+    """Pipeline recording the latency of each execute() as one "pipeline" command"""
+
+    def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.labels("pipeline").observe(time.perf_counter() - started)
+
+
+class TimedRedis(Redis):
+    """Redis client recording command latency by command name"""
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(str(args[0]).lower()).observe(time.perf_counter() - started)
+
+    def pipeline(self, transaction=True, shard_hint=None) -> TimedPipeline:
+        return TimedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
 
 
 class RedisClient:
@@ -10,7 +38,7 @@ class RedisClient:
     def __init__(self):
         """Initialize Redis connection"""
         try:
-            self.client: Redis = redis.Redis(
+            self.client: Redis = TimedRedis(
                 host=Config.REDIS_HOST,
                 port=Config.REDIS_PORT,
                 password=Config.REDIS_PASSWORD,
@@ -38,11 +38,71 @@ class RedisKeys:
         """Generate MCP service cache key by slug name"""
         return f"xpack:mcp_service:slug:{slug_name}"
 
+    @staticmethod
+    def mcp_tools_revision_key(service_id: str) -> str:
+        """Generate MCP service tool list revision key (incremented on every service update)"""
+        return f"xpack:mcp_service:tools_revision:{service_id}"
+
     @staticmethod
     def user_apikey_key(apikey_hash: str) -> str:
         """Generate user API key cache key (using hash for security)"""
         return f"xpack:user_apikey:{apikey_hash}"
 
+    @staticmethod
+    def resource_group_services_key(group_id: str) -> str:
+        """Generate resource group -> bound service IDs set key (permission index)"""
+        return f"xpack:resource_group:services:{group_id}"
+
+    @staticmethod
+    def resource_group_version_key(group_id: str) -> str:
+        """Generate resource group change counter key (bumped on every change of the group's services)"""
+        return f"xpack:resource_group:version:{group_id}"
+
+    @staticmethod
+    def rate_limit_key(scope: str, identifier: str) -> str:
+        """Generate rate limit token bucket key (scope: apikey, user or service)"""
+        return f"xpack:ratelimit:{scope}:{identifier}"
+
+    @staticmethod
+    def tool_result_meta_key(result_id: str) -> str:
+        """Generate large tool result metadata hash key (owner, service, chunk count)"""
+        return f"xpack:mcp:result:meta:{result_id}"
+
+    @staticmethod
+    def tool_result_chunks_key(result_id: str) -> str:
+        """Generate large tool result chunk list key"""
+        return f"xpack:mcp:result:chunks:{result_id}"
+
+    @staticmethod
+    def idempotency_key(scope: str, key_hash: str) -> str:
+        """Generate tools/call idempotency key (scope: API key or user ID, key_hash: hashed client key)"""
+        return f"xpack:mcp:idempotency:{scope}:{key_hash}"
+
+    @staticmethod
+    def upstream_token_key(service_id: str, config_hash: str) -> str:
+        """Generate upstream OAuth2 access token key (config_hash changes with the credentials)"""
+        return f"xpack:upstream:token:{service_id}:{config_hash}"
+
+    @staticmethod
+    def mcp_conn_workers_key() -> str:
+        """Generate sorted set of API workers reporting connection stats (score: last heartbeat)"""
+        return "xpack:mcp:conn:workers"
+
+    @staticmethod
+    def mcp_conn_worker_key(worker_id: str) -> str:
+        """Generate per-worker connection counters hash (totals and per-service counts)"""
+        return f"xpack:mcp:conn:worker:{worker_id}"
+
+    @staticmethod
+    def mcp_conn_worker_users_key(worker_id: str) -> str:
+        """Generate per-worker HyperLogLog of connected user IDs"""
+        return f"xpack:mcp:conn:worker:{worker_id}:users"
+
+    @staticmethod
+    def auth_invalidation_channel() -> str:
+        """Pub/sub channel for API key / user auth cache invalidation"""
+        return "xpack:auth:invalidate"
+
     @staticmethod
     def login_fail_count_key(ip: str, user: str) -> str:
         """Generate login fail count cache key"""
@@ -0,0 +1,167 @@
+"""
+Tracing - OpenTelemetry spans across the tool call path and the billing consumer
+
+Spans are exported by a background thread (BatchSpanProcessor) to the exporters
+listed in TRACING_EXPORTERS: "otlp" (OTLP/HTTP, OTEL_EXPORTER_OTLP_* settings),
+"console" (stdout) and "file" (one JSON span per line in TRACING_FILE_PATH, so
+traces can be read without a collector). With no exporter configured, tracing
+calls are no-ops.
+"""
+
+import functools
+import inspect
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from opentelemetry import propagate, trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from services.common.config import Config
+from services.common.logging_config import get_logger
+from services.common.metrics import route_template
+
+logger = get_logger(__name__)
+
+tracer = trace.get_tracer("xpack")
+
+# Scope key holding the trace context of the HTTP request span
+SCOPE_CONTEXT_KEY = "xpack.trace_context"
+
+_provider: Optional[TracerProvider] = None
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> SpanExportResult:
+        lines = "".join(json.dumps(json.loads(span.to_json()), separators=(",", ":")) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(lines)
+        except OSError as e:
+            logger.warning(f"Failed to write trace spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def _create_exporter(name: str) -> Optional[SpanExporter]:
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return JsonFileSpanExporter(Config.TRACING_FILE_PATH)
+    logger.warning(f"Unknown tracing exporter: {name}")
+    return None
+
+
+def setup_tracing(service_name: str) -> None:
+    """Install the tracer provider of the service (once per process)"""
+    global _provider
+    names = [name.strip().lower() for name in Config.TRACING_EXPORTERS.split(",") if name.strip()]
+    if _provider is not None or not names:
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": f"xpack-{service_name}"}),
+        sampler=ParentBased(TraceIdRatioBased(Config.TRACING_SAMPLE_RATIO)),
+    )
+    for name in names:
+        exporter = _create_exporter(name)
+        if exporter is not None:
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    logger.info(f"Tracing enabled - Exporters: {', '.join(names)}, Sample ratio: {Config.TRACING_SAMPLE_RATIO}")
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans"""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def inject_headers(headers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Add the current trace context (traceparent) to message or request headers"""
+    headers = dict(headers or {})
+    propagate.inject(headers)
+    return headers
+
+
+def extract_context(headers: Optional[Dict[str, Any]]) -> Context:
+    """Trace context carried by message or request headers"""
+    return propagate.extract({key: str(value) for key, value in (headers or {}).items()})
+
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace ID of the current span, None when not tracing"""
+    context = trace.get_current_span().get_span_context()
+    return trace.format_trace_id(context.trace_id) if context.is_valid else None
+
+
+def traced(name: str, kind: SpanKind = SpanKind.INTERNAL) -> Callable:
+    """Run the decorated function (sync or async) in a span"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(name, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per HTTP request
+
+    The incoming traceparent header (if any) is the parent. The span context is
+    also kept in the ASGI scope, so work handed to other tasks (e.g. a session's
+    MCP server handling the posted message) can continue the request's trace.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in ("/health", "/metrics"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers") or []}
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        with tracer.start_as_current_span(
+            method, context=extract_context(headers), kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as span:
+            scope[SCOPE_CONTEXT_KEY] = trace.set_span_in_context(span)
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Named by route template once routing is done, not by raw path
+                span.update_name(f"{method} {route_template(scope, root_path)}")
@@ -0,0 +1,35 @@
+"""
+Auth invalidation - Broadcast API key / user / group / service changes to API process-local caches
+"""
+
+import logging
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+
+logger = logging.getLogger(__name__)
+
+# Message kinds: "<kind>:<value>"
+APIKEY = "apikey"
+USER = "user"
+GROUP = "group"
+SERVICE = "service"
+
+
+def publish_auth_invalidation(kind: str, value: str) -> bool:
+    """
+    Publish an auth invalidation message to all API service processes
+
+    Args:
+        kind: APIKEY (value is the API key), USER (value is the user ID), GROUP (value is the
+            resource group ID) or SERVICE (value is the service ID)
+        value: API key, user ID, resource group ID or service ID
+
+    Returns:
+        bool: True if published, False otherwise
+    """
+    try:
+        redis_client.client.publish(RedisKeys.auth_invalidation_channel(), f"{kind}:{value}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to publish auth invalidation for {kind}: {e}")
+        return False
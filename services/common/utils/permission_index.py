@@ -0,0 +1,156 @@
+"""
+Permission index - Shared group -> service ID sets in Redis
+
+Each resource group's bound service IDs are kept in a Redis set. A loaded set
+always contains the EMPTY_MARKER member, so an empty group is distinguishable
+from a group that has not been loaded yet. Writers (admin service) only update
+sets that are already loaded; readers (API service) rebuild missing sets from
+the database. Every change is broadcast so API processes drop their local copy.
+
+Every change also bumps a per-group version counter. A reader rebuilding a set
+reads the version before querying the database and stores its result only if
+the version is unchanged, so a change committed during the rebuild is never
+overwritten by the older database state.
+"""
+
+import logging
+from typing import Iterable, Optional, Set
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+from services.common.utils.auth_invalidation import GROUP, publish_auth_invalidation
+
+logger = logging.getLogger(__name__)
+
+GROUP_SERVICES_EXPIRE = 600
+# Much longer than a rebuild, so a counter never expires between its read and the store
+GROUP_VERSION_EXPIRE = 86400
+EMPTY_MARKER = ""
+
+# Bump the version, then apply SADD/SREM only to loaded sets; a partially built set
+# would grant/deny wrongly
+_UPDATE_IF_LOADED = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call(ARGV[2], KEYS[1], unpack(ARGV, 3))
+    return 1
+end
+return 0
+"""
+
+# Drop the set and bump the version
+_DROP = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Replace the set only if the version is still the one read before the rebuild
+_STORE_IF_UNCHANGED = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 1000 do
+    redis.call('SADD', KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def load_group_services(group_id: str) -> Optional[Set[str]]:
+    """
+    Get the service IDs bound to a group
+
+    Args:
+        group_id: Resource group ID
+
+    Returns:
+        Optional[Set[str]]: Service IDs, or None if the group is not loaded
+    """
+    members = redis_client.client.smembers(RedisKeys.resource_group_services_key(group_id))
+    if not members:
+        return None
+    members.discard(EMPTY_MARKER)
+    return members
+
+
+def get_group_version(group_id: str) -> str:
+    """Get a group's change counter; read it before loading the group from the database"""
+    return redis_client.client.get(RedisKeys.resource_group_version_key(group_id)) or "0"
+
+
+def store_group_services(group_id: str, service_ids: Iterable[str], version: str) -> bool:
+    """
+    Replace the service IDs bound to a group, unless the group changed meanwhile
+
+    Args:
+        group_id: Resource group ID
+        service_ids: Bound service IDs
+        version: Group version read (get_group_version) before the service IDs were loaded
+
+    Returns:
+        bool: True if stored, False if the group changed since `version`
+    """
+    stored = redis_client.client.eval(
+        _STORE_IF_UNCHANGED,
+        2,
+        RedisKeys.resource_group_services_key(group_id),
+        RedisKeys.resource_group_version_key(group_id),
+        version,
+        GROUP_SERVICES_EXPIRE,
+        EMPTY_MARKER,
+        *service_ids,
+    )
+    return bool(stored)
+
+
+def add_group_services(group_id: str, service_ids: Iterable[str]) -> None:
+    """Add service IDs to a loaded group and notify API processes"""
+    _update_group(group_id, "SADD", service_ids)
+
+
+def remove_group_services(group_id: str, service_ids: Iterable[str]) -> None:
+    """Remove service IDs from a loaded group and notify API processes"""
+    _update_group(group_id, "SREM", service_ids)
+
+
+def drop_group(group_id: str) -> None:
+    """Drop a group's set (rebuilt from the database on next use) and notify API processes"""
+    try:
+        redis_client.client.eval(
+            _DROP,
+            2,
+            RedisKeys.resource_group_services_key(group_id),
+            RedisKeys.resource_group_version_key(group_id),
+            GROUP_VERSION_EXPIRE,
+        )
+    except Exception as e:
+        logger.error(f"Failed to drop permission index for group {group_id}: {e}")
+    publish_auth_invalidation(GROUP, group_id)
+
+
+def _update_group(group_id: str, command: str, service_ids: Iterable[str]) -> None:
+    service_ids = list(service_ids)
+    if not service_ids:
+        return
+    try:
+        redis_client.client.eval(
+            _UPDATE_IF_LOADED,
+            2,
+            RedisKeys.resource_group_services_key(group_id),
+            RedisKeys.resource_group_version_key(group_id),
+            GROUP_VERSION_EXPIRE,
+            command,
+            *service_ids,
+        )
+    except Exception as e:
+        # Drop the set rather than leave it inconsistent
+        logger.error(f"Failed to update permission index for group {group_id}: {e}")
+        try:
+            redis_client.client.delete(RedisKeys.resource_group_services_key(group_id))
+        except Exception:
+            pass
+    publish_auth_invalidation(GROUP, group_id)
@@ -0,0 +1,36 @@
+"""
+Test setup - in-process Redis (fakeredis) and a mocked RabbitMQ connection
+
+The services connect to Redis and RabbitMQ when their modules are imported, so the
+environment has to be prepared before any `services` import.
+"""
+
+import os
+import threading
+from unittest import mock
+
+import pytest
+from fakeredis import TcpFakeServer
+
+_redis_server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+_redis_server.daemon_threads = True
+threading.Thread(target=_redis_server.serve_forever, daemon=True).start()
+
+os.environ["REDIS_HOST"] = "127.0.0.1"
+os.environ["REDIS_PORT"] = str(_redis_server.server_address[1])
+os.environ["REDIS_PASSWORD"] = ""
+
+mock.patch("pika.BlockingConnection").start()
+
+
+def pytest_unconfigure(config):
+    _redis_server.shutdown()
+    _redis_server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def clean_redis():
+    from services.common.redis import redis_client
+
+    redis_client.client.flushall()
+    yield
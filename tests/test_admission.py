@@ -0,0 +1,121 @@
+import time
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from services.api_service.controllers.mcp import McpController
+from services.api_service.utils.http_session import HttpSession
+from services.common.middleware.admission_middleware import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    AdmissionController,
+    AdmissionControlMiddleware,
+)
+from services.common.rabbitmq import rabbitmq_client
+
+
+def make_controller() -> AdmissionController:
+    controller = AdmissionController()
+    controller.max_loop_lag = 0
+    controller.max_db_pool_utilization = 0
+    controller.max_inflight_calls = 0
+    controller.max_broker_latency = 0.5
+    return controller
+
+
+def scope(path: str, query: bytes = b"", headers=None) -> dict:
+    return {
+        "type": "http",
+        "path": path,
+        "query_string": query,
+        "headers": headers or [],
+        "client": ("10.0.0.1", 5000),
+    }
+
+
+def set_broker(monkeypatch, blocked=False, ewma=0.0, idle=0.0):
+    monkeypatch.setattr(rabbitmq_client, "blocked", blocked)
+    monkeypatch.setattr(rabbitmq_client, "publish_latency_ewma", ewma)
+    monkeypatch.setattr(rabbitmq_client, "_last_publish_at", time.monotonic() - idle)
+
+
+def test_score_is_the_highest_signal(monkeypatch):
+    set_broker(monkeypatch, ewma=0.25)
+    controller = make_controller()
+    controller.max_inflight_calls = 10
+    controller.inflight_calls = 8
+
+    signals = controller.signals()
+    assert signals["inflight_calls"] == 0.8
+    assert 0.49 < signals["broker"] <= 0.5
+    assert controller.load_score() == 0.8
+    assert not controller.admit(PRIORITY_LOW)
+    assert controller.admit(PRIORITY_NORMAL)
+
+
+def test_broker_latency_signal_recovers_when_publishing_stops(monkeypatch):
+    set_broker(monkeypatch, ewma=2.0, idle=0.0)
+    controller = make_controller()
+    assert controller._broker_signal() > controller.thresholds[PRIORITY_HIGH]
+
+    # No publish since: the EWMA decays with idle time instead of sticking
+    monkeypatch.setattr(rabbitmq_client, "_last_publish_at", time.monotonic() - 60)
+    assert controller._broker_signal() < 0.01
+    assert controller.admit(PRIORITY_LOW)
+
+
+def test_blocked_broker_sheds_new_sessions_but_admits_existing(monkeypatch):
+    set_broker(monkeypatch, blocked=True)
+    controller = make_controller()
+
+    assert not controller.admit(PRIORITY_LOW)
+    assert not controller.admit(PRIORITY_NORMAL)
+    assert controller.admit(PRIORITY_HIGH)
+
+
+def test_polling_delivers_unblock_without_publishes(monkeypatch):
+    set_broker(monkeypatch, blocked=True)
+    connection = rabbitmq_client.connection
+    connection.is_closed = False
+    connection.process_data_events.side_effect = lambda time_limit: rabbitmq_client._on_unblocked(connection, None)
+
+    AdmissionController._poll_broker()
+
+    connection.process_data_events.assert_called_with(time_limit=0)
+    assert rabbitmq_client.blocked is False
+    connection.process_data_events.side_effect = None
+
+
+def test_priority_comes_from_session_registry_not_headers():
+    controller = make_controller()
+    middleware = AdmissionControlMiddleware(None, controller)
+    live = scope("/mcp/svc1/streamable-http", b"apikey=k1")
+    spoofed = scope("/mcp/svc1/streamable-http", b"apikey=k2", [(b"mcp-session-id", b"anything")])
+    controller.set_session_lookup(lambda request_scope: request_scope is live)
+
+    assert middleware._priority(live) == PRIORITY_HIGH
+    assert middleware._priority(spoofed) == PRIORITY_NORMAL
+    assert middleware._priority(scope("/mcp/svc1/streamable-http")) == PRIORITY_LOW
+
+
+class RunningTask:
+    def done(self):
+        return False
+
+
+def test_controller_matches_requests_to_live_sessions():
+    controller = McpController()
+    request_scope = scope("/mcp/svc1/streamable-http", b"apikey=k1", [(b"user-agent", b"client/1.0")])
+    session = HttpSession("svc1:user1:fp", "svc1", "user1", None, transport=SimpleNamespace(), task=RunningTask())
+    controller._http_sessions[session.session_key] = session
+    assert not controller.has_live_session(request_scope)
+
+    req = Request(request_scope)
+    controller._register_session_alias(session, controller._session_alias(req, controller._client_fingerprint(req, "10.0.0.1")))
+
+    assert controller.has_live_session(request_scope)
+    # Another key or another client is a different session
+    assert not controller.has_live_session(scope("/mcp/svc1/streamable-http", b"apikey=k2", [(b"user-agent", b"client/1.0")]))
+    assert not controller.has_live_session(scope("/mcp/svc1/streamable-http", b"apikey=k1", [(b"user-agent", b"other")]))
+    assert not controller.has_live_session(scope("/mcp/messages/", b"session_id=0123456789abcdef0123456789abcdef"))
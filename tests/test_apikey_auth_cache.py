@@ -0,0 +1,117 @@
+import time
+
+from services.api_service.utils import apikey_auth_cache as auth_cache_module
+from services.api_service.utils.apikey_auth_cache import ApiKeyAuth, ApiKeyAuthCache
+from services.common.utils.auth_invalidation import APIKEY, USER, publish_auth_invalidation
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+KEYS = {
+    "key1": ApiKeyAuth("user1", "id1", None, "g1"),
+    "key2": ApiKeyAuth("user1", "id2", None, "g1"),
+    "key3": ApiKeyAuth("user2", "id3", None, None),
+}
+
+
+def make_cache(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(auth_cache_module, "time", clock)
+    cache = ApiKeyAuthCache(**{"ttl_seconds": 60, "negative_ttl_seconds": 5, "max_entries": 100, **kwargs})
+    cache.loads = []
+
+    def load(apikey):
+        cache.loads.append(apikey)
+        return True, KEYS.get(apikey)
+
+    cache._load = load
+    return cache, clock
+
+
+def test_keys_are_loaded_once_per_ttl(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+
+    assert cache.get("key1") == KEYS["key1"]
+    assert cache.get("key1") == KEYS["key1"]
+    assert cache.loads == ["key1"]
+
+    clock.now += 61
+    cache.get("key1")
+    assert cache.loads == ["key1", "key1"]
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_unknown_keys_are_cached_negatively_for_a_shorter_ttl(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+
+    assert cache.get("unknown") is None
+    assert cache.get("unknown") is None
+    assert cache.loads == ["unknown"]
+
+    clock.now += 6
+    assert cache.get("unknown") is None
+    assert cache.loads == ["unknown", "unknown"]
+
+
+def test_lookup_errors_are_not_cached(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache._load = lambda apikey: (False, None)
+
+    assert cache.get("key1") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_invalidation_by_key_and_user(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    for apikey in KEYS:
+        cache.get(apikey)
+
+    cache._apply_invalidation(f"{APIKEY}:key3")
+    cache._apply_invalidation(f"{USER}:user1")
+    assert cache.get_stats()["entries"] == 0
+
+    for apikey in KEYS:
+        cache.get(apikey)
+    assert len(cache.loads) == 6
+
+
+def test_least_recently_used_keys_are_evicted(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=2)
+    cache.get("key1")
+    cache.get("key2")
+    cache.get("key1")
+    cache.get("key3")
+
+    assert list(cache._entries) == ["key1", "key3"]
+    # The evicted key no longer belongs to its user's index
+    assert cache._user_keys == {"user1": {"key1"}, "user2": {"key3"}}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_published_invalidations_reach_the_listener(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    pings = []
+    cache.add_invalidation_handler("ping", pings.append)
+    cache.start_invalidation_listener()
+    try:
+        # Subscribed once a ping gets through
+        assert wait_for(lambda: publish_auth_invalidation("ping", "1") and bool(pings))
+        cache.get("key1")
+
+        publish_auth_invalidation(APIKEY, "key1")
+
+        assert wait_for(lambda: "key1" not in cache._entries)
+    finally:
+        cache.stop_invalidation_listener()
@@ -0,0 +1,70 @@
+import asyncio
+from decimal import Decimal
+
+from services.api_service.services.billing_service import BillingService
+from services.common.redis import redis_client
+
+BALANCE_KEY = "xpack:wallet:balance:user1"
+
+
+def make_service(balance: str) -> BillingService:
+    redis_client.client.set(BALANCE_KEY, balance)
+    service = BillingService()
+    service.batch_window_seconds = 0.05
+    return service
+
+
+def cached_balance() -> Decimal:
+    return Decimal(redis_client.client.get(BALANCE_KEY))
+
+
+def test_concurrent_reservations_are_applied_in_order():
+    service = make_service("10")
+
+    async def scenario():
+        return await asyncio.gather(*(service._reserve("user1", Decimal(amount)) for amount in ("4", "7", "5")))
+
+    results = asyncio.run(scenario())
+
+    assert results == [(True, Decimal("6")), (False, Decimal("6")), (True, Decimal("1"))]
+    assert cached_balance() == Decimal("1")
+
+
+def test_caller_cancelled_before_the_batch_reserves_nothing():
+    service = make_service("10")
+
+    async def scenario():
+        kept = asyncio.create_task(service._reserve("user1", Decimal("3")))
+        cancelled = asyncio.create_task(service._reserve("user1", Decimal("5")))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(scenario()) == (True, Decimal("7"))
+    assert cached_balance() == Decimal("7")
+
+
+def test_caller_cancelled_while_the_batch_is_applied_is_refunded():
+    service = make_service("10")
+    reserve_batch = service._reserve_batch
+
+    async def scenario():
+        tasks = []
+
+        async def cancel_during_batch(user_id, amounts):
+            results = await reserve_batch(user_id, amounts)
+            tasks[1].cancel()
+            await asyncio.sleep(0)
+            return results
+
+        service._reserve_batch = cancel_during_batch
+        tasks.append(asyncio.create_task(service._reserve("user1", Decimal("3"))))
+        tasks.append(asyncio.create_task(service._reserve("user1", Decimal("5"))))
+        result = await tasks[0]
+        flushing = service._flushing.get("user1")
+        if flushing is not None:
+            await flushing
+        return result
+
+    assert asyncio.run(scenario()) == (True, Decimal("7"))
+    assert cached_balance() == Decimal("7")
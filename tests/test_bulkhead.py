@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from services.api_service.utils.bulkhead import DEFAULT_POOL, BulkheadFullError, BulkheadManager, IsolationPool
+
+
+def test_call_waiting_past_the_timeout_is_rejected():
+    pool = IsolationPool("slow", max_concurrent=1, max_connections=1)
+
+    async def scenario():
+        async with pool.slot(1):
+            with pytest.raises(BulkheadFullError) as error:
+                async with pool.slot(0.05):
+                    pass
+            assert error.value.pool == "slow"
+            assert pool.waiting == 0
+        # The slot is free again once the first call finished
+        async with pool.slot(0.05):
+            assert pool.active == 1
+
+    asyncio.run(scenario())
+    stats = pool.get_stats()
+    assert (stats["active"], stats["completed"], stats["rejected"]) == (0, 2, 1)
+
+
+def test_waiting_call_gets_the_freed_slot():
+    pool = IsolationPool("pool", max_concurrent=1, max_connections=1)
+    order = []
+
+    async def call(name, hold):
+        async with pool.slot(1):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        first = asyncio.create_task(call("first", 0.1))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, call("second", 0))
+
+    asyncio.run(scenario())
+    assert order == ["first", "second"]
+    assert pool.get_stats()["avg_wait_ms"] > 0
+
+
+def test_failing_call_frees_its_slot():
+    pool = IsolationPool("pool", max_concurrent=1, max_connections=1)
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            async with pool.slot(0.05):
+                raise ValueError("upstream error")
+        async with pool.slot(0.05):
+            pass
+
+    asyncio.run(scenario())
+    assert pool.get_stats()["rejected"] == 0
+
+
+def test_pools_use_configured_limits():
+    manager = BulkheadManager(
+        enabled=True, pool_limits="search:2:4, reports:3, bad:x", default_max_concurrent=8, default_max_connections=16
+    )
+
+    assert (manager.pool_for("search").max_concurrent, manager.pool_for("search").max_connections) == (2, 4)
+    assert (manager.pool_for("reports").max_concurrent, manager.pool_for("reports").max_connections) == (3, 3)
+    assert (manager.pool_for("bad").max_concurrent, manager.pool_for("bad").max_connections) == (8, 16)
+    assert manager.pool_for(None) is manager.pool_for(DEFAULT_POOL)
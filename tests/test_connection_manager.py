@@ -0,0 +1,63 @@
+import time
+
+from services.api_service.utils.connection_manager import ConnectionManager
+
+
+def test_indexes_follow_register_and_unregister():
+    manager = ConnectionManager()
+    first = manager.register_connection("svc1", "user1", "10.0.0.1")
+    manager.register_connection("svc1", "user2", "10.0.0.2")
+    manager.register_connection("svc2", "user1", "10.0.0.1")
+
+    assert manager.register_connection("svc1", "user1", "10.0.0.1") == first
+    assert manager.connections[first].connection_count == 2
+    assert manager.count_service_connections("svc1") == 2
+    assert set(manager.get_user_connections("user1")) == {first, "svc2:user1:10.0.0.1"}
+
+    manager.unregister_connection(first)
+    manager.unregister_connection("svc2:user1:10.0.0.1")
+
+    assert manager.count_service_connections("svc1") == 1
+    assert manager.get_user_connections("user1") == {}
+    assert manager.get_stats()["unique_services"] == 1
+    assert manager.get_stats()["unique_users"] == 1
+
+
+def test_stale_connections_are_cleaned_from_the_front():
+    manager = ConnectionManager()
+    stale = manager.register_connection("svc1", "user1", "10.0.0.1")
+    active = manager.register_connection("svc1", "user2", "10.0.0.2")
+    manager.connections[stale].last_activity = time.time() - 600
+    manager.connections[active].last_activity = time.time() - 600
+    # Activity moves a connection to the back
+    manager.update_activity(active)
+
+    manager.cleanup_stale_connections(timeout_seconds=300)
+
+    assert list(manager.connections) == [active]
+    assert manager.count_service_connections("svc1") == 1
+    assert manager.get_user_connections("user1") == {}
+
+
+def test_cluster_stats_add_up_live_workers():
+    workers = []
+    for worker_id, connections in (("w1", [("svc1", "user1"), ("svc1", "user2")]), ("w2", [("svc1", "user1"), ("svc2", "user3")])):
+        manager = ConnectionManager()
+        manager.worker_id = worker_id
+        for index, (service_id, user_id) in enumerate(connections):
+            manager.register_connection(service_id, user_id, f"10.0.0.{index}")
+        manager._publish(*manager._snapshot())
+        workers.append(manager)
+
+    cluster = workers[0].get_cluster_stats(page=1, page_size=1)
+
+    assert cluster["workers"] == 2
+    assert cluster["total_connections"] == 4
+    # user1 is connected to both workers
+    assert cluster["unique_users"] == 3
+    assert cluster["unique_services"] == 2
+    assert cluster["services"] == [{"service_id": "svc1", "connections": 3}]
+
+    workers[1]._withdraw()
+    workers[0]._cluster_cache = None
+    assert workers[0].get_cluster_stats()["total_connections"] == 2
@@ -0,0 +1,57 @@
+import asyncio
+import gc
+import json
+import threading
+
+import pytest
+
+from services.api_service.utils import upstream_response
+from services.api_service.utils.cpu_offload import CpuOffloader
+
+
+def run_in_thread_name(offloader: CpuOffloader, size: int) -> str:
+    return asyncio.run(offloader.run("step", size, lambda: threading.current_thread().name))
+
+
+def test_small_payloads_run_inline_and_large_ones_in_workers():
+    offloader = CpuOffloader(threshold_bytes=100, max_workers=1)
+    try:
+        assert run_in_thread_name(offloader, 99) == threading.current_thread().name
+        assert run_in_thread_name(offloader, 100).startswith("cpu-offload")
+    finally:
+        offloader.shutdown()
+
+    stats = offloader.get_stats()["kinds"]["step"]
+    assert (stats["inline"], stats["offloaded"]) == (1, 1)
+
+
+def test_zero_threshold_keeps_everything_inline():
+    offloader = CpuOffloader(threshold_bytes=0, max_workers=1)
+
+    assert run_in_thread_name(offloader, 10 ** 9) == threading.current_thread().name
+    assert offloader._executor is None
+
+
+def test_worker_errors_reach_the_caller():
+    offloader = CpuOffloader(threshold_bytes=1, max_workers=1)
+
+    def fail():
+        raise ValueError("bad schema")
+
+    try:
+        with pytest.raises(ValueError, match="bad schema"):
+            asyncio.run(offloader.run("step", 10, fail))
+    finally:
+        offloader.shutdown()
+
+
+def test_large_documents_are_parsed_with_the_gc_paused(monkeypatch):
+    states = []
+    monkeypatch.setattr(upstream_response, "_loads", lambda text: states.append(gc.isenabled()) or json.loads(text))
+    large = json.dumps(["x" * 100] * (upstream_response._GC_PAUSE_MIN_CHARS // 100))
+
+    assert upstream_response.loads("[1]") == [1]
+    assert len(upstream_response.loads(large)) == upstream_response._GC_PAUSE_MIN_CHARS // 100
+
+    assert states == [True, False]
+    assert gc.isenabled()
@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.api_service.services.mcp_tool_service import McpToolService
+from services.api_service.utils.latency_histogram import upstream_latency
+
+
+class TrackingStream(httpx.AsyncByteStream):
+    def __init__(self, closed: list, name: str):
+        self.closed = closed
+        self.name = name
+
+    async def __aiter__(self):
+        yield self.name.encode()
+
+    async def aclose(self):
+        self.closed.append(self.name)
+
+
+def run_hedged(behaviours, delay=0.02):
+    """Send a hedged GET; behaviours[i] is the coroutine function answering the i-th request"""
+    calls, closed, cancelled = [], [], []
+
+    async def handler(request):
+        name = f"request{len(calls)}"
+        calls.append(name)
+        try:
+            await behaviours[len(calls) - 1]()
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+        return httpx.Response(200, headers={"x-request": name}, stream=TrackingStream(closed, name))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            request = client.build_request("GET", "http://upstream.test/items")
+            response = await McpToolService._hedged_send(client, request, delay)
+            await asyncio.sleep(0.05)
+            return response.headers["x-request"]
+
+    return asyncio.run(run()), calls, closed, cancelled
+
+
+def sleep(seconds):
+    async def behaviour():
+        await asyncio.sleep(seconds)
+    return behaviour
+
+
+def fail():
+    async def behaviour():
+        raise httpx.ConnectError("connection refused")
+    return behaviour
+
+
+def test_fast_primary_sends_no_hedge():
+    sent = upstream_latency.hedges_sent
+
+    winner, calls, closed, cancelled = run_hedged([sleep(0)])
+
+    assert winner == "request0"
+    assert calls == ["request0"]
+    assert upstream_latency.hedges_sent == sent
+
+
+def test_faster_hedge_wins_and_primary_is_cancelled():
+    won = upstream_latency.hedges_won
+
+    winner, calls, closed, cancelled = run_hedged([sleep(10), sleep(0)])
+
+    assert winner == "request1"
+    assert cancelled == ["request0"]
+    assert closed == []
+    assert upstream_latency.hedges_won == won + 1
+
+
+def test_failed_hedge_loses_to_the_primary():
+    winner, calls, closed, cancelled = run_hedged([sleep(0.1), fail()])
+
+    assert winner == "request0"
+    assert calls == ["request0", "request1"]
+
+
+def test_loser_response_is_closed():
+    gate = {}
+
+    async def answer_together():
+        # Both requests answer at the same time: one wins, the other must be closed
+        if "event" not in gate:
+            gate["event"] = asyncio.Event()
+            asyncio.get_running_loop().call_later(0.1, gate["event"].set)
+        await gate["event"].wait()
+
+    winner, calls, closed, cancelled = run_hedged([answer_together, answer_together])
+
+    assert len(calls) == 2
+    assert closed == [name for name in calls if name != winner]
+
+
+def test_both_failing_raise_the_error():
+    with pytest.raises(httpx.ConnectError):
+        run_hedged([fail(), fail()], delay=0)
@@ -0,0 +1,117 @@
+import asyncio
+
+import mcp.types as types
+
+from services.api_service.utils.idempotency import ACQUIRED, BUSY, CONFLICT, REPLAY, IdempotencyStore
+from services.common.redis import redis_client
+
+FINGERPRINT = IdempotencyStore.fingerprint("svc1", "echo", {"text": "hi"})
+
+
+def make_store(**kwargs) -> IdempotencyStore:
+    options = dict(result_ttl_seconds=60, inflight_ttl_seconds=60, wait_seconds=0, max_result_bytes=0)
+    options.update(kwargs)
+    return IdempotencyStore(**options)
+
+
+def test_completed_call_is_replayed():
+    store = make_store()
+
+    async def scenario():
+        claim = await store.claim("key1", "idem-1", FINGERPRINT)
+        assert claim.outcome == ACQUIRED
+        await store.complete(claim, FINGERPRINT, [types.TextContent(type="text", text="result")], {"ok": True})
+        return await store.claim("key1", "idem-1", FINGERPRINT)
+
+    replay = asyncio.run(scenario())
+    assert replay.outcome == REPLAY
+    content, data = replay.result
+    assert content[0].text == "result"
+    assert data == {"ok": True}
+
+
+def test_key_reused_for_another_call_conflicts():
+    store = make_store()
+
+    async def scenario():
+        await store.claim("key1", "idem-1", FINGERPRINT)
+        return await store.claim("key1", "idem-1", IdempotencyStore.fingerprint("svc1", "echo", {"text": "other"}))
+
+    assert asyncio.run(scenario()).outcome == CONFLICT
+
+
+def test_release_lets_a_retry_execute_again():
+    store = make_store()
+
+    async def scenario():
+        claim = await store.claim("key1", "idem-1", FINGERPRINT)
+        assert (await store.claim("key1", "idem-1", FINGERPRINT)).outcome == BUSY
+        await store.release(claim)
+        return await store.claim("key1", "idem-1", FINGERPRINT)
+
+    assert asyncio.run(scenario()).outcome == ACQUIRED
+
+
+def test_waiting_retry_gets_the_result_of_the_first_call():
+    store = make_store(wait_seconds=5)
+
+    async def scenario():
+        claim = await store.claim("key1", "idem-1", FINGERPRINT)
+        retry = asyncio.create_task(store.claim("key1", "idem-1", FINGERPRINT))
+        await asyncio.sleep(0.2)
+        await store.complete(claim, FINGERPRINT, [types.TextContent(type="text", text="result")], {})
+        return await retry
+
+    assert asyncio.run(scenario()).outcome == REPLAY
+
+
+def test_marker_outlives_its_ttl_while_the_call_runs():
+    store = make_store(inflight_ttl_seconds=1)
+
+    async def scenario():
+        claim = await store.claim("key1", "idem-1", FINGERPRINT)
+        async with store.keep_alive(claim):
+            await asyncio.sleep(2.5)
+            during = await store.claim("key1", "idem-1", FINGERPRINT)
+        await asyncio.sleep(1.5)
+        after = await store.claim("key1", "idem-1", FINGERPRINT)
+        return during, after
+
+    during, after = asyncio.run(scenario())
+    assert during.outcome == BUSY
+    # Without the refresh (e.g. the worker died) the marker expires
+    assert after.outcome == ACQUIRED
+
+
+def test_replay_keeps_content_meta():
+    store = make_store()
+
+    async def scenario():
+        claim = await store.claim("key1", "idem-1", FINGERPRINT)
+        await store.complete(claim, FINGERPRINT, [types.TextContent(type="text", text="r", _meta={"xpack/mock": True})], {})
+        return await store.claim("key1", "idem-1", FINGERPRINT)
+
+    content, _ = asyncio.run(scenario()).result
+    assert content[0].meta == {"xpack/mock": True}
+
+
+def test_late_result_does_not_replace_a_retry_marker():
+    store = make_store()
+
+    async def scenario():
+        first = await store.claim("key1", "idem-1", FINGERPRINT)
+        # The first call's marker expired and a retry claimed the key
+        redis_client.client.delete(first.key)
+        retry = await store.claim("key1", "idem-1", FINGERPRINT)
+        assert retry.outcome == ACQUIRED
+
+        await store.complete(first, FINGERPRINT, [types.TextContent(type="text", text="late")], {})
+        during = await store.claim("key1", "idem-1", FINGERPRINT)
+        await store.release(retry)
+        after = await store.claim("key1", "idem-1", FINGERPRINT)
+        return during, after
+
+    during, after = asyncio.run(scenario())
+    assert during.outcome == BUSY
+    # The retry still owned its marker and could release it
+    assert after.outcome == ACQUIRED
@@ -0,0 +1,73 @@
+import logging
+import queue
+from types import SimpleNamespace
+
+from services.common import logging_config
+from services.common.logging_config import LogPipelineFilter, NonBlockingQueueHandler
+
+
+def record(name="services.api", level=logging.INFO, msg="hello %s", args=("world",)) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_sampling_uses_the_longest_matching_prefix(monkeypatch):
+    monkeypatch.setattr(logging_config, "random", SimpleNamespace(random=lambda: 0.5))
+    pipeline = LogPipelineFilter({"services": 0.9, "services.api.noisy": 0.1}, rate_limit=0, max_message_chars=0)
+
+    assert pipeline.filter(record("services.api"))
+    assert not pipeline.filter(record("services.api.noisy.handler"))
+    # Not a prefix match: "services.api.noisy" does not cover "services.api.noisy2"
+    assert pipeline.filter(record("services.api.noisy2"))
+    assert pipeline.filter(record("other"))
+
+
+def test_warnings_are_never_sampled_or_rate_limited(monkeypatch):
+    monkeypatch.setattr(logging_config, "random", SimpleNamespace(random=lambda: 0.99))
+    pipeline = LogPipelineFilter({"services": 0.0}, rate_limit=1, max_message_chars=0)
+
+    assert all(pipeline.filter(record(level=logging.WARNING)) for _ in range(5))
+
+
+def test_rate_limit_reports_dropped_records_in_the_next_window(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(logging_config, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    pipeline = LogPipelineFilter({}, rate_limit=2, max_message_chars=0)
+
+    assert [pipeline.filter(record()) for _ in range(5)] == [True, True, False, False, False]
+    # Other loggers have their own limit
+    assert pipeline.filter(record("services.admin"))
+
+    clock.now += 1
+    next_window = record()
+    assert pipeline.filter(next_window)
+    assert next_window.dropped == 3
+    assert next_window.getMessage() == "hello world [3 records of this logger dropped by rate limit]"
+
+
+def test_long_messages_are_truncated():
+    pipeline = LogPipelineFilter({}, rate_limit=0, max_message_chars=5)
+    long_record = record(msg="x" * 12, args=None)
+
+    assert pipeline.filter(long_record)
+    assert long_record.getMessage() == "xxxxx... [truncated 7 chars]"
+
+
+def test_decision_is_shared_by_handlers(monkeypatch):
+    draws = iter([0.1, 0.9])
+    monkeypatch.setattr(logging_config, "random", SimpleNamespace(random=lambda: next(draws)))
+    pipeline = LogPipelineFilter({"services": 0.5}, rate_limit=0, max_message_chars=0)
+    kept = record()
+
+    # A second handler running the same filter gets the same answer without a new draw
+    assert pipeline.filter(kept) and pipeline.filter(kept)
+    assert kept.getMessage() == "hello world"
+
+
+def test_full_queue_drops_info_records_without_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.enqueue(record())
+    handler.enqueue(record())
+    handler.enqueue(record(level=logging.ERROR))
+
+    assert handler.dropped == 2
+    assert handler.queue.qsize() == 1
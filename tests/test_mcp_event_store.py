@@ -0,0 +1,64 @@
+import asyncio
+
+import mcp.types as types
+
+from services.api_service.utils.mcp_event_store import RedisStreamEventStore, _get_binary_client
+
+
+def message(text: str) -> types.JSONRPCMessage:
+    return types.JSONRPCMessage(types.JSONRPCNotification(jsonrpc="2.0", method="notifications/message", params={"data": text}))
+
+
+def stored(store: RedisStreamEventStore, stream_id: str) -> int:
+    return _get_binary_client().xlen(store._key(stream_id))
+
+
+def replay(store: RedisStreamEventStore, event_id: str) -> list:
+    sent = []
+
+    async def send(event):
+        sent.append(event.message.root.params["data"])
+
+    asyncio.run(store.replay_events_after(event_id, send))
+    return sent
+
+
+def test_maxlen_trims_exactly_and_accounting_follows():
+    store = RedisStreamEventStore("s1", maxlen=3, compress_min_bytes=0, max_session_bytes=0)
+
+    ids = [asyncio.run(store.store_event("a", message(str(i)))) for i in range(10)]
+
+    assert stored(store, "a") == 3
+    assert len(store._entries["a"]) == 3
+    assert store._total_bytes == sum(size for _, size in store._entries["a"])
+    assert replay(store, ids[6]) == ["7", "8", "9"]
+
+
+def test_session_cap_evicts_oldest_across_streams():
+    store = RedisStreamEventStore("s2", maxlen=0, compress_min_bytes=0, max_session_bytes=1)
+    size = len(store._encode(message("x" * 100)))
+    store.max_session_bytes = size * 3
+
+    first = asyncio.run(store.store_event("a", message("x" * 100)))
+    asyncio.run(store.store_event("b", message("y" * 100)))
+    asyncio.run(store.store_event("a", message("z" * 100)))
+    asyncio.run(store.store_event("b", message("w" * 100)))
+
+    assert store._total_bytes <= store.max_session_bytes
+    assert stored(store, "a") == 1
+    assert stored(store, "b") == 2
+    # The evicted first event is gone; later ones still replay
+    assert replay(store, first) == ["z" * 100]
+
+
+def test_event_larger_than_session_cap_is_not_stored():
+    store = RedisStreamEventStore("s3", maxlen=0, compress_min_bytes=0, max_session_bytes=200)
+    kept = asyncio.run(store.store_event("a", message("small")))
+
+    event_id = asyncio.run(store.store_event("a", message("x" * 500)))
+
+    assert event_id == ""
+    assert stored(store, "a") == 1
+    assert replay(store, kept) == []
+    assert asyncio.run(store.store_event("a", message("after"))) != ""
+    assert replay(store, kept) == ["after"]
@@ -0,0 +1,184 @@
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import mcp.types as types
+import pytest
+from mcp.shared.exceptions import McpError
+
+from services.api_service.services import mcp_server_factory
+from services.api_service.services.mcp_server_factory import McpServerFactory, ToolSnapshot
+from services.api_service.services.mcp_service import McpService
+from services.api_service.utils.tool_search import SEARCH_TOOL_NAME
+from services.api_service.utils.apikey_auth_cache import ApiKeyAuthCache
+from services.common.config import Config
+from services.common.redis import redis_client
+from services.common.redis_keys import RedisKeys
+from services.common.utils.auth_invalidation import SERVICE
+
+
+class FakeDb:
+    def close(self):
+        pass
+
+
+class FakeMcpService:
+    """Tool list of one service: a version and the tool names of that version"""
+
+    def __init__(self, version, names):
+        self.version = version
+        self.names = names
+
+    def get_tools_version(self, service_id):
+        return self.version
+
+    def get_tool_apis(self, service_id):
+        return [SimpleNamespace(name=name, response_schema=None, response_examples=None) for name in self.names]
+
+    def convert_apis_to_tools(self, tool_apis):
+        return [types.Tool(name=api.name, inputSchema={"type": "object"}) for api in tool_apis]
+
+
+class FakeToolApiRepository:
+    def get_versions_by_service_id(self, service_id):
+        return [("api1", None)]
+
+
+@pytest.fixture
+def tool_list(monkeypatch):
+    service = FakeMcpService("v1", ["c", "a", "d", "b", "e"])
+    monkeypatch.setattr(mcp_server_factory, "get_db", lambda: iter([FakeDb()]))
+    monkeypatch.setattr(McpServerFactory, "_create_mcp_service", lambda self, db: service)
+    monkeypatch.setattr(Config, "MCP_TOOLS_PAGE_SIZE", 2)
+    monkeypatch.setattr(Config, "MCP_TOOL_SEARCH_MIN_TOOLS", 0)
+    return service
+
+
+def list_all(factory, service_id):
+    pages, cursor = [], None
+    while True:
+        result = asyncio.run(factory._handle_list_tools_page(service_id, cursor))
+        pages.append([tool.name for tool in result.tools])
+        cursor = result.nextCursor
+        if cursor is None:
+            return pages
+
+
+def test_server_is_shared_until_evicted():
+    factory = McpServerFactory()
+
+    server, _ = asyncio.run(factory.get_server("svc1"))
+    assert asyncio.run(factory.get_server("svc1"))[0] is server
+
+    factory.evict_server("svc1")
+    assert asyncio.run(factory.get_server("svc1"))[0] is not server
+
+
+def test_service_invalidation_reaches_every_handler():
+    cache = ApiKeyAuthCache()
+    factory = McpServerFactory()
+    asyncio.run(factory.get_server("svc1"))
+    asyncio.run(factory.get_server("svc2"))
+    resolved = []
+    cache.add_invalidation_handler(SERVICE, resolved.append)
+    cache.add_invalidation_handler(SERVICE, factory.evict_server, factory.clear_servers)
+
+    cache._apply_invalidation(f"{SERVICE}:svc1")
+
+    assert resolved == ["svc1"]
+    assert set(factory._servers) == {"svc2"}
+
+
+def test_only_tools_without_output_schema_are_offloaded():
+    factory = McpServerFactory()
+    assert factory._has_output_schema("svc1", "plain")
+
+    tools = [
+        types.Tool(name="plain", inputSchema={"type": "object"}),
+        types.Tool(name="typed", inputSchema={"type": "object"}, outputSchema={"type": "object"}),
+    ]
+    factory._tool_snapshots["svc1"] = OrderedDict(v1=ToolSnapshot(tools))
+
+    assert not factory._has_output_schema("svc1", "plain")
+    assert factory._has_output_schema("svc1", "typed")
+    assert factory._has_output_schema("svc1", "unknown")
+
+
+def test_tools_cursor_round_trip_and_rejects_garbage():
+    cursor = McpServerFactory._encode_tools_cursor("v1", "tool")
+    assert McpServerFactory._decode_tools_cursor(cursor) == ("v1", "tool")
+
+    with pytest.raises(McpError):
+        McpServerFactory._decode_tools_cursor("not a cursor")
+
+
+def test_tools_are_listed_in_pages(tool_list):
+    factory = McpServerFactory()
+
+    assert list_all(factory, "svc1") == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_listing_in_progress_keeps_its_version(tool_list):
+    factory = McpServerFactory()
+    first = asyncio.run(factory._handle_list_tools_page("svc1", None))
+
+    tool_list.version, tool_list.names = "v2", ["a", "aa", "b", "c", "d", "e"]
+    second = asyncio.run(factory._handle_list_tools_page("svc1", first.nextCursor))
+    assert [tool.name for tool in second.tools] == ["c", "d"]
+
+    # Once its version is no longer cached, the listing continues in the current list
+    tool_list.version = "v3"
+    asyncio.run(factory._handle_list_tools_page("svc1", None))
+    third = asyncio.run(factory._handle_list_tools_page("svc1", first.nextCursor))
+    assert [tool.name for tool in third.tools] == ["c", "d"]
+    assert McpServerFactory._decode_tools_cursor(third.nextCursor)[0] == "v3"
+
+
+def test_new_tool_version_clears_sdk_tool_cache(tool_list):
+    factory = McpServerFactory()
+    server, _ = asyncio.run(factory.get_server("svc1"))
+    asyncio.run(factory._handle_list_tools_page("svc1", None))
+    server._tool_cache["a"] = types.Tool(name="a", inputSchema={"type": "object"})
+
+    asyncio.run(factory._handle_list_tools_page("svc1", None))
+    assert "a" in server._tool_cache
+
+    tool_list.version = "v2"
+    asyncio.run(factory._handle_list_tools_page("svc1", None))
+    assert server._tool_cache == {}
+
+
+def test_evicted_server_still_running_reloads_tools():
+    factory = McpServerFactory()
+    server, _ = asyncio.run(factory.get_server("svc1"))
+    server._tool_cache["a"] = types.Tool(name="a", inputSchema={"type": "object"})
+
+    factory.evict_server("svc1")
+
+    assert server._tool_cache == {}
+
+
+def test_tools_version_changes_with_revision():
+    service = McpService(FakeToolApiRepository(), None)
+    version = service.get_tools_version("svc1")
+    assert service.get_tools_version("svc1") == version
+
+    # Same update times (one-second resolution), but the admin service bumped the revision
+    redis_client.incr(RedisKeys.mcp_tools_revision_key("svc1"))
+
+    assert service.get_tools_version("svc1") != version
+
+
+def test_tools_are_listed_in_one_page_when_pagination_is_off(tool_list, monkeypatch):
+    monkeypatch.setattr(Config, "MCP_TOOLS_PAGE_SIZE", 0)
+    factory = McpServerFactory()
+
+    assert list_all(factory, "svc1") == [["a", "b", "c", "d", "e"]]
+
+
+def test_search_tool_is_only_added_when_enabled(tool_list, monkeypatch):
+    monkeypatch.setattr(Config, "MCP_TOOLS_PAGE_SIZE", 0)
+    assert list_all(McpServerFactory(), "svc1") == [["a", "b", "c", "d", "e"]]
+
+    monkeypatch.setattr(Config, "MCP_TOOL_SEARCH_MIN_TOOLS", 5)
+    assert list_all(McpServerFactory(), "svc1") == [[SEARCH_TOOL_NAME, "a", "b", "c", "d", "e"]]
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.api_service.controllers.mcp import McpController
+from services.api_service.utils.http_session import HttpSession
+
+
+def add_session(controller, session_key, memory_estimate):
+    session = HttpSession(session_key, "svc1", "user1", None, SimpleNamespace(), memory_estimate=memory_estimate)
+    controller._http_sessions[session_key] = session
+    controller._session_memory_total += memory_estimate
+    return session
+
+
+def test_session_stats_report_last_measured_estimates():
+    controller = McpController()
+    add_session(controller, "s1", 1000)
+    add_session(controller, "s2", 3000)
+
+    stats = controller.get_session_stats(top=1)
+
+    assert stats["active_sessions"] == 2
+    assert stats["estimated_memory_bytes"] == 4000
+    assert stats["average_session_bytes"] == 2000
+    assert [item["session_key"] for item in stats["largest_sessions"]] == ["s2"]
+    # Read-only: the total gating new sessions is only updated on the event loop
+    assert controller.get_session_totals() == (2, 4000)
+    assert controller._http_sessions["s1"].memory_estimate == 1000
+
+
+def test_transport_ready_wait_ends_when_the_server_signals():
+    async def scenario():
+        controller = McpController()
+        task = asyncio.create_task(asyncio.Event().wait())
+        session = HttpSession("s1", "svc1", "user1", None, SimpleNamespace(is_terminated=False), task=task)
+        asyncio.get_running_loop().call_later(0.05, session.ready.set)
+        started = time.monotonic()
+        try:
+            await controller._wait_transport_ready(session, timeout_seconds=2)
+            return time.monotonic() - started
+        finally:
+            task.cancel()
+
+    assert asyncio.run(scenario()) < 1
+
+
+def test_transport_ready_wait_fails_on_timeout_or_termination():
+    async def scenario(ready, terminated):
+        controller = McpController()
+        task = asyncio.create_task(asyncio.Event().wait())
+        session = HttpSession("s1", "svc1", "user1", None, SimpleNamespace(is_terminated=terminated), task=task)
+        if ready:
+            session.ready.set()
+        try:
+            await controller._wait_transport_ready(session, timeout_seconds=0.05)
+        finally:
+            task.cancel()
+
+    with pytest.raises(TimeoutError, match="not ready"):
+        asyncio.run(scenario(ready=False, terminated=False))
+    with pytest.raises(TimeoutError, match="terminated"):
+        asyncio.run(scenario(ready=True, terminated=True))
@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import mcp.types as types
+from starlette.requests import Request
+
+from services.api_service.controllers.mcp import McpController
+from services.api_service.utils.apikey_auth_cache import ApiKeyAuth
+from services.common.config import Config
+
+
+def make_controller() -> McpController:
+    controller = McpController()
+    controller._extract_service_id = lambda req: "svc1"
+    controller._extract_user_info = lambda req: ApiKeyAuth("user1", "key1", None, None)
+    controller._check_invoke_permission = lambda group_id, service_id: True
+
+    async def no_rate_limit(user_id, apikey_id, service_id):
+        pass
+
+    async def list_tools_page(service_id, cursor):
+        return types.ListToolsResult(tools=[types.Tool(name="echo", inputSchema={"type": "object"})])
+
+    controller._enforce_rate_limit = no_rate_limit
+    controller.server_factory._handle_list_tools_page = list_tools_page
+    return controller
+
+
+def request(controller: McpController, method: str, body: bytes = b"", headers=None):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/mcp/svc1/streamable-http",
+        "raw_path": b"/mcp/svc1/streamable-http",
+        "query_string": b"apikey=secret",
+        "headers": [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+        "client": ("10.0.0.1", 5000),
+        "server": ("testserver", 80),
+        "scheme": "http",
+    }
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if received:
+            return received.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        asgi = await controller.handle_streamable_http_asgi(None)
+        await asgi(scope, receive, send)
+
+    asyncio.run(run())
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    payload = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    return start["status"], payload
+
+
+def test_stateless_post_gets_json_response_without_session():
+    controller = make_controller()
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list", "params": {}}).encode()
+
+    status, payload = request(controller, "POST", body, {
+        "x-mcp-stateless": "true",
+        "accept": "application/json",
+        "content-type": "application/json",
+    })
+
+    assert status == 200
+    response = json.loads(payload)
+    assert response["id"] == 1
+    assert [tool["name"] for tool in response["result"]["tools"]] == ["echo"]
+    assert controller._http_sessions == {}
+
+
+def test_stateless_mode_only_accepts_post():
+    controller = make_controller()
+
+    status, _ = request(controller, "GET", headers={"x-mcp-stateless": "1", "accept": "text/event-stream"})
+
+    assert status == 405
+
+
+def test_stateless_mode_requires_json_accept():
+    controller = make_controller()
+
+    status, _ = request(controller, "POST", b"{}", {"x-mcp-stateless": "yes", "content-type": "application/json"})
+
+    assert status == 406
+
+
+def test_stateless_opt_in_order(monkeypatch):
+    controller = McpController()
+
+    def is_stateless(header=None, service_id="svc1"):
+        headers = [(b"x-mcp-stateless", header.encode())] if header is not None else []
+        return controller._is_stateless_request(Request({"type": "http", "headers": headers}), service_id)
+
+    monkeypatch.setattr(Config, "MCP_STATELESS_MODE", False)
+    monkeypatch.setattr(Config, "MCP_STATELESS_SERVICE_IDS", ["svc1"])
+    assert is_stateless()
+    assert not is_stateless(service_id="svc2")
+    assert not is_stateless("false")
+
+    monkeypatch.setattr(Config, "MCP_STATELESS_MODE", True)
+    assert is_stateless(service_id="svc2")
+    assert not is_stateless("0", service_id="svc2")
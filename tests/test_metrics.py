@@ -0,0 +1,74 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from services.common import metrics
+from services.common.metrics import GaugeRefresher, HttpMetricsMiddleware
+
+
+def request_count(method: str, route: str, status: str) -> float:
+    value = metrics.REGISTRY.get_sample_value(
+        "xpack_http_request_duration_seconds_count", {"method": method, "route": route, "status": status}
+    )
+    return value or 0.0
+
+
+def make_client() -> TestClient:
+    async def item(request):
+        return PlainTextResponse("ok")
+
+    async def raw_app(scope, receive, send):
+        await PlainTextResponse("raw", status_code=202)(scope, receive, send)
+
+    inner = Starlette(routes=[Route("/tools/{name}", item)])
+    app = Starlette(routes=[
+        Route("/items/{item_id}", item),
+        Mount("/svc", app=inner),
+        Mount("/raw", app=raw_app),
+    ])
+    app.add_middleware(HttpMetricsMiddleware)
+    return TestClient(app)
+
+
+def test_requests_are_labelled_with_route_templates():
+    client = make_client()
+    before = {
+        "item": request_count("GET", "/items/{item_id}", "200"),
+        "mounted": request_count("GET", "/svc/tools/{name}", "200"),
+        "raw": request_count("POST", "/raw", "202"),
+        "unmatched": request_count("GET", "unmatched", "404"),
+    }
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/svc/tools/echo")
+    client.post("/raw/anything")
+    client.get("/nowhere/42")
+
+    assert request_count("GET", "/items/{item_id}", "200") == before["item"] + 2
+    assert request_count("GET", "/svc/tools/{name}", "200") == before["mounted"] + 1
+    assert request_count("POST", "/raw", "202") == before["raw"] + 1
+    assert request_count("GET", "unmatched", "404") == before["unmatched"] + 1
+
+
+def test_metrics_are_served_in_the_prometheus_format():
+    response = metrics.metrics_response()
+
+    assert response.media_type.startswith("text/plain")
+    assert b"xpack_http_request_duration_seconds_bucket" in response.body
+
+
+def test_failing_gauge_callback_does_not_stop_the_others():
+    refresher = GaugeRefresher()
+    calls = []
+    refresher._callbacks = []
+
+    def broken():
+        raise RuntimeError("pool unavailable")
+
+    refresher.add_callback(broken)
+    refresher.add_callback(lambda: calls.append("sessions"))
+    refresher.refresh()
+
+    assert calls == ["sessions"]
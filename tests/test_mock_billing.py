@@ -0,0 +1,77 @@
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+
+from services.api_service.services import mcp_server_factory as factory_module
+from services.api_service.services.mcp_server_factory import McpServerFactory
+from services.api_service.utils.mock_upstream import MOCK_META_KEY, mock_upstream
+from services.common.models.billing import PreDeductResult
+
+TOOL = SimpleNamespace(
+    id="api1", service_id="svc1", name="echo", path="/echo", method=SimpleNamespace(value="GET"),
+    response_examples='{"ok": true}', response_schema=None, timeout_ms=1000, hedge_enabled=0,
+    query_parameters=None, path_parameters=None, header_parameters=None, request_body_schema=None, custom_headers=None,
+)
+
+
+class FakeDb:
+    def close(self):
+        pass
+
+
+class FakeMcpService:
+    def __init__(self, call_params):
+        self.call_params = call_params
+
+    def get_service_call_params(self, service_id):
+        return self.call_params
+
+    def get_tool_by_name(self, service_id, name):
+        return TOOL
+
+
+class FakeBilling:
+    def __init__(self):
+        self.pre_deducted = []
+        self.messages = []
+
+    async def check_and_pre_deduct(self, user_id, service_id, tool_name):
+        self.pre_deducted.append(tool_name)
+        return PreDeductResult(True, "ok", Decimal("0.5"), Decimal("10"), Decimal("0"), Decimal("0"), "per_call")
+
+    async def send_billing_message(self, call_log, call_success, call_end_time):
+        self.messages.append((call_log, call_success))
+
+
+def run_call(monkeypatch, call_params):
+    monkeypatch.setattr(factory_module, "get_db", lambda: iter([FakeDb()]))
+    monkeypatch.setattr(mock_upstream, "latency_median_ms", 0)
+    monkeypatch.setattr(mock_upstream, "global_enabled", False)
+    monkeypatch.setattr(mock_upstream, "global_billing", False)
+    factory = McpServerFactory()
+    factory.billing_service = FakeBilling()
+    factory._create_mcp_service = lambda db: FakeMcpService(call_params)
+    result, data, success = asyncio.run(factory._execute_call_tool_with_billing("svc1", "echo", {}, "user1", "key1"))
+    return factory.billing_service, result, data, success
+
+
+def test_mock_calls_are_marked_and_not_charged(monkeypatch):
+    billing, result, data, success = run_call(monkeypatch, {"mock_enabled": 1})
+
+    assert success and data == {"ok": True}
+    assert result[0].meta == {MOCK_META_KEY: True}
+    assert billing.pre_deducted == []
+    call_log, call_success = billing.messages[0]
+    assert call_success and call_log.mock
+    assert call_log.unit_price == 0
+
+
+def test_mock_charging_is_an_explicit_opt_in(monkeypatch):
+    billing, result, _, success = run_call(monkeypatch, {"mock_enabled": 1, "mock_billing_enabled": 1})
+
+    assert success
+    assert result[0].meta == {MOCK_META_KEY: True}
+    assert billing.pre_deducted == ["echo"]
+    call_log, _ = billing.messages[0]
+    assert call_log.mock
+    assert call_log.unit_price == Decimal("0.5")
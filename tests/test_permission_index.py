@@ -0,0 +1,61 @@
+from services.api_service.utils import permission_index as api_index
+from services.api_service.utils.permission_index import PermissionIndex
+from services.common.utils import permission_index as shared_index
+
+
+class FakeDb:
+    def close(self):
+        pass
+
+
+def use_database(monkeypatch, load):
+    monkeypatch.setattr(api_index, "get_db", lambda: iter([FakeDb()]))
+    monkeypatch.setattr(api_index.ResourceGroupMapRepository, "get_by_id", lambda self, group_id, force_update=False: load())
+
+
+def test_rebuild_is_stored_and_shared(monkeypatch):
+    use_database(monkeypatch, lambda: ["svc1", "svc2"])
+
+    assert PermissionIndex().get_group_services("g1") == {"svc1", "svc2"}
+    assert shared_index.load_group_services("g1") == {"svc1", "svc2"}
+
+    shared_index.add_group_services("g1", ["svc3"])
+    assert shared_index.load_group_services("g1") == {"svc1", "svc2", "svc3"}
+
+
+def test_change_during_rebuild_discards_stale_result(monkeypatch):
+    index = PermissionIndex()
+
+    def stale_load():
+        # The admin service binds svc2 after this read, before the index is stored,
+        # and its invalidation message reaches this process
+        shared_index.add_group_services("g1", ["svc2"])
+        index.invalidate_group("g1")
+        return ["svc1"]
+
+    use_database(monkeypatch, stale_load)
+
+    assert index.get_group_services("g1") == {"svc1"}
+    assert shared_index.load_group_services("g1") is None
+    assert "g1" not in index._groups
+
+    use_database(monkeypatch, lambda: ["svc1", "svc2"])
+    assert index.get_group_services("g1") == {"svc1", "svc2"}
+    assert shared_index.load_group_services("g1") == {"svc1", "svc2"}
+
+
+def test_drop_bumps_version():
+    version = shared_index.get_group_version("g1")
+    assert shared_index.store_group_services("g1", ["svc1"], version)
+
+    shared_index.drop_group("g1")
+
+    assert shared_index.load_group_services("g1") is None
+    assert not shared_index.store_group_services("g1", ["svc1"], version)
+
+
+def test_large_group_is_stored_in_chunks():
+    service_ids = [f"svc{i}" for i in range(2500)]
+
+    assert shared_index.store_group_services("g1", service_ids, shared_index.get_group_version("g1"))
+    assert shared_index.load_group_services("g1") == set(service_ids)
@@ -0,0 +1,95 @@
+import asyncio
+
+from services.api_service.utils.rate_limiter import RateLimiter, RateLimitRule
+
+
+def make_limiter(rate: float, burst: float) -> RateLimiter:
+    limiter = RateLimiter()
+    limiter.rules = {
+        "apikey": RateLimitRule("apikey", rate, burst),
+        "user": RateLimitRule("user", 0, 0),
+        "service": RateLimitRule("service", 0, 0),
+    }
+    return limiter
+
+
+def test_shared_bucket_allows_burst_then_rejects():
+    limiter = make_limiter(rate=1, burst=3)
+    buckets = limiter._buckets("key1", "user1", "svc1")
+
+    results = [limiter._check_shared(buckets) for _ in range(4)]
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    allowed, blocked, wait = results[-1]
+    assert blocked == 1
+    assert 0 < wait <= 1
+
+
+def test_rejected_call_does_not_drain_other_buckets():
+    limiter = RateLimiter()
+    limiter.rules = {
+        "apikey": RateLimitRule("apikey", 1, 5),
+        "user": RateLimitRule("user", 1, 1),
+        "service": RateLimitRule("service", 0, 0),
+    }
+    buckets = limiter._buckets("key1", "user1", "svc1")
+
+    assert limiter._check_shared(buckets)[0] is True
+    allowed, blocked, _ = limiter._check_shared(buckets)
+    assert allowed is False
+    assert buckets[blocked - 1][0].scope == "user"
+
+    # The apikey bucket only paid for the admitted call
+    apikey_only = limiter._buckets("key1", None, None)
+    assert [limiter._check_shared(apikey_only)[0] for _ in range(5)] == [True, True, True, True, False]
+
+
+def test_local_precheck_rejects_without_redis():
+    limiter = make_limiter(rate=1, burst=2)
+
+    decisions = [asyncio.run(limiter.check("key2", "user1", "svc1")) for _ in range(3)]
+
+    assert [d.allowed for d in decisions] == [True, True, False]
+    assert decisions[-1].scope == "apikey"
+    assert decisions[-1].retry_after > 0
+
+
+def test_disabled_rules_allow_everything():
+    limiter = make_limiter(rate=0, burst=0)
+
+    assert not limiter.enabled
+    assert asyncio.run(limiter.check("key3", "user1", "svc1")).allowed
+
+
+def make_apikey_and_service_limiter() -> RateLimiter:
+    limiter = RateLimiter()
+    limiter.rules = {
+        "apikey": RateLimitRule("apikey", 1, 3),
+        "user": RateLimitRule("user", 0, 0),
+        "service": RateLimitRule("service", 1, 1),
+    }
+    return limiter
+
+
+def test_local_rejection_does_not_drain_other_local_buckets():
+    limiter = make_apikey_and_service_limiter()
+
+    assert asyncio.run(limiter.check("key4", "user1", "svc4")).allowed
+    decision = asyncio.run(limiter.check("key4", "user1", "svc4"))
+    assert not decision.allowed
+    assert decision.scope == "service"
+
+    # The apikey bucket only paid for the admitted call
+    assert [asyncio.run(limiter.check("key4", "user1", f"svc-{i}")).allowed for i in range(3)] == [True, True, False]
+
+
+def test_shared_rejection_refunds_local_buckets():
+    limiter = make_apikey_and_service_limiter()
+    # Another process used up the shared service bucket
+    limiter._check_shared(limiter._buckets(None, None, "svc5"))
+
+    decision = asyncio.run(limiter.check("key5", "user1", "svc5"))
+    assert not decision.allowed
+    assert decision.scope == "service"
+
+    assert [asyncio.run(limiter.check("key5", "user1", f"svc-{i}")).allowed for i in range(4)] == [True, True, True, False]
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from services.admin_service.services import resource_group_service
+from services.admin_service.services.resource_group_service import ResourceGroupService
+from services.common.redis_keys import RedisKeys
+from services.common.utils.auth_invalidation import USER
+
+
+class FakeDb:
+    def __init__(self, events):
+        self.events = events
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+
+def test_group_deletion_is_published_after_commit(monkeypatch):
+    events = []
+    monkeypatch.setattr(resource_group_service, "publish_auth_invalidation", lambda kind, value: events.append((kind, value)))
+    service = ResourceGroupService(FakeDb(events))
+    service.map_repo = SimpleNamespace(delete_by_group_id=lambda gid, commit: 1)
+    service.group_repo = SimpleNamespace(delete=lambda gid, commit: object())
+    service.user_repo = SimpleNamespace(
+        update_resource_group_by_group_id=lambda gid, new_gid, commit: [SimpleNamespace(id="u1"), SimpleNamespace(id="u2")]
+    )
+    service.redis.set(RedisKeys.user_key("u1"), "stale")
+
+    assert service.delete_group("g1")
+
+    assert events == ["commit", (USER, "u1"), (USER, "u2")]
+    assert service.redis.get(RedisKeys.user_key("u1")) is None
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.api_service.utils import service_resolver as resolver_module
+from services.api_service.utils.service_resolver import ResolvedService, ServiceResolver
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeDb:
+    def close(self):
+        pass
+
+
+SERVICES = {"svc1": SimpleNamespace(id="svc1", name="Weather", slug_name="weather")}
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    queries = []
+
+    class FakeRepository:
+        def __init__(self, db):
+            pass
+
+        def get_by_id(self, identifier):
+            queries.append(("id", identifier))
+            return SERVICES.get(identifier)
+
+        def get_by_slug_name(self, identifier):
+            queries.append(("slug", identifier))
+            return next((service for service in SERVICES.values() if service.slug_name == identifier), None)
+
+    monkeypatch.setattr(resolver_module, "get_db", lambda: iter([FakeDb()]))
+    monkeypatch.setattr(resolver_module, "McpServiceRepository", FakeRepository)
+    return queries
+
+
+def make_resolver(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(resolver_module, "time", clock)
+    return ServiceResolver(**{"ttl_seconds": 60, "negative_ttl_seconds": 5, "max_entries": 100, **kwargs}), clock
+
+
+def test_ids_and_slugs_resolve_to_the_same_service(monkeypatch, lookups):
+    resolver, _ = make_resolver(monkeypatch)
+
+    assert resolver.resolve("svc1") == ResolvedService("svc1", "Weather")
+    assert resolver.resolve("weather") == ResolvedService("svc1", "Weather")
+    assert resolver.resolve("weather") == ResolvedService("svc1", "Weather")
+    assert lookups == [("id", "svc1"), ("id", "weather"), ("slug", "weather")]
+
+
+def test_unknown_identifiers_are_cached_negatively(monkeypatch, lookups):
+    resolver, clock = make_resolver(monkeypatch)
+
+    assert resolver.resolve("typo") is None
+    assert resolver.resolve("typo") is None
+    assert len(lookups) == 2
+
+    clock.now += 6
+    assert resolver.resolve("typo") is None
+    assert len(lookups) == 4
+
+
+def test_lookup_errors_are_not_cached(monkeypatch, lookups):
+    resolver, _ = make_resolver(monkeypatch)
+
+    def broken_db():
+        raise ConnectionError("database down")
+
+    monkeypatch.setattr(resolver_module, "get_db", broken_db)
+
+    assert resolver.resolve("svc1") is None
+    assert resolver._entries == {}
+
+
+def test_invalidation_drops_the_service_and_negative_entries(monkeypatch, lookups):
+    resolver, _ = make_resolver(monkeypatch)
+    resolver.resolve("svc1")
+    resolver.resolve("weather")
+    resolver.resolve("renamed")
+    SERVICES["svc2"] = SimpleNamespace(id="svc2", name="Maps", slug_name="maps")
+    try:
+        resolver.resolve("svc2")
+
+        resolver.invalidate_service("svc1")
+
+        assert list(resolver._entries) == ["svc2"]
+    finally:
+        del SERVICES["svc2"]
+
+
+def test_least_recently_used_identifiers_are_evicted(monkeypatch, lookups):
+    resolver, _ = make_resolver(monkeypatch, max_entries=2)
+    resolver.resolve("svc1")
+    resolver.resolve("weather")
+    resolver.resolve("svc1")
+    resolver.resolve("other")
+
+    assert list(resolver._entries) == ["svc1", "other"]
@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+
+from services.api_service.controllers.mcp import McpController
+from services.api_service.utils import session_expiry
+from services.api_service.utils.http_session import HttpSession
+from services.api_service.utils.session_expiry import SessionExpiryQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_queue(monkeypatch, ttl=10):
+    clock = FakeClock()
+    monkeypatch.setattr(session_expiry, "time", clock)
+    return SessionExpiryQueue(ttl), clock
+
+
+def test_idle_sessions_expire_after_ttl(monkeypatch):
+    queue, clock = make_queue(monkeypatch)
+    queue.touch("s1")
+    clock.now += 5
+    queue.touch("s2")
+
+    assert queue.pop_expired(clock.now + 4) == []
+    assert queue.pop_expired(clock.now + 5) == ["s1"]
+    assert "s1" not in queue and "s2" in queue
+    assert queue.pop_expired(clock.now + 10) == ["s2"]
+    assert len(queue) == 0
+
+
+def test_activity_reschedules_lazily(monkeypatch):
+    queue, clock = make_queue(monkeypatch)
+    queue.touch("s1")
+    clock.now += 8
+    queue.touch("s1")
+
+    # The original deadline passed, but the session was active since: pushed back
+    assert queue.pop_expired(clock.now + 2) == []
+    assert queue.next_deadline() == clock.now + 10
+    assert queue.pop_expired(clock.now + 10) == ["s1"]
+
+
+def test_discarded_sessions_are_dropped(monkeypatch):
+    queue, clock = make_queue(monkeypatch)
+    queue.touch("s1")
+    queue.discard("s1")
+
+    assert queue.pop_expired(clock.now + 10) == []
+    # Re-added after the discard: only the new entry counts
+    queue.touch("s1")
+    clock.now += 5
+    assert queue.pop_expired(clock.now + 5) == ["s1"]
+    assert queue.pop_expired(clock.now + 100) == []
+
+
+def test_gc_recycles_idle_sessions_and_keeps_running_ones():
+    async def run():
+        controller = McpController()
+        controller._session_expiry = SessionExpiryQueue(0)
+        running_task = asyncio.create_task(asyncio.Event().wait())
+        sessions = {
+            "idle": HttpSession("idle", "svc1", "user1", None, SimpleNamespace(is_terminated=True), memory_estimate=100),
+            "running": HttpSession("running", "svc1", "user2", None, SimpleNamespace(is_terminated=False),
+                                   task=running_task, memory_estimate=200),
+        }
+        for key, session in sessions.items():
+            controller._http_sessions[key] = session
+            controller._session_memory_total += session.memory_estimate
+            controller._note_session_activity(key)
+
+        controller._ensure_session_gc_task()
+        await asyncio.sleep(1.2)
+        controller._session_gc_stop_event.set()
+        controller._session_gc_task.cancel()
+        running_task.cancel()
+        return controller
+
+    controller = asyncio.run(run())
+
+    assert list(controller._http_sessions) == ["running"]
+    assert controller._session_memory_total == 200
+    assert "running" in controller._session_expiry
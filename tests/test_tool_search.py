@@ -0,0 +1,58 @@
+import mcp.types as types
+
+from services.api_service.utils.tool_search import ToolSearchIndex, tokenize
+
+
+def tool(name, description="", parameters=()):
+    properties = {parameter: {"type": "string"} for parameter in parameters}
+    return types.Tool(name=name, description=description, inputSchema={"type": "object", "properties": properties})
+
+
+def test_identifiers_are_split():
+    assert tokenize("getUserById") == ["user", "id"]
+    assert tokenize("HTTPServerError2") == ["http", "server", "error", "2"]
+    assert tokenize("list_invoices") == ["list", "invoice"]
+
+
+def test_non_ascii_latin_text_is_split():
+    assert tokenize("créerFactureÉlectronique") == ["créer", "facture", "électronique"]
+    # Fullwidth forms are normalized
+    assert tokenize("ｇｅｔＵｓｅｒ") == ["user"]
+
+
+def test_cjk_text_is_indexed_as_characters_and_bigrams():
+    assert tokenize("查询用户") == ["查", "询", "用", "户", "查询", "询用", "用户"]
+    assert tokenize("searchUsers 用户") == ["search", "user", "用", "户", "用户"]
+
+
+def test_search_ranks_name_matches_first():
+    index = ToolSearchIndex([
+        tool("create_invoice", "Create an invoice for a customer", ["customer_id", "amount"]),
+        tool("list_customers", "List the customers of the account"),
+        tool("send_email", "Send an email, e.g. an invoice reminder", ["to", "body"]),
+    ])
+
+    results = index.search("create invoice")
+
+    assert [result.name for result, _ in results] == ["create_invoice", "send_email"]
+    assert results[0][1] > results[1][1]
+
+
+def test_search_matches_cjk_descriptions():
+    index = ToolSearchIndex([
+        tool("get_user", "查询用户信息"),
+        tool("create_order", "创建订单"),
+        tool("get_weather", "天気予報を取得する"),
+    ])
+
+    assert [result.name for result, _ in index.search("用户")] == ["get_user"]
+    assert [result.name for result, _ in index.search("订单")] == ["create_order"]
+    assert index.search("天気")[0][0].name == "get_weather"
+
+
+def test_search_limit_and_unknown_terms():
+    index = ToolSearchIndex([tool(f"report_{i}", "Monthly report") for i in range(5)])
+
+    assert len(index.search("report", limit=2)) == 2
+    assert index.search("unrelated") == []
+    assert ToolSearchIndex([]).search("report") == []
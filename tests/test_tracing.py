@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from services.common import tracing
+from services.common.tracing import TracingMiddleware, extract_context, inject_headers, traced
+
+_exporter = InMemorySpanExporter()
+_provider = TracerProvider()
+_provider.add_span_processor(SimpleSpanProcessor(_exporter))
+# The global provider can only be set once per process
+trace.set_tracer_provider(_provider)
+
+
+@pytest.fixture
+def spans():
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def test_request_span_is_named_by_route_and_continues_the_callers_trace(spans):
+    seen = {}
+
+    async def tool(request):
+        seen["context"] = request.scope[tracing.SCOPE_CONTEXT_KEY]
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/mcp/{service_id}", tool)])
+    app.add_middleware(TracingMiddleware)
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+
+    TestClient(app).get("/mcp/abc", headers={"traceparent": f"00-{trace_id}-b7ad6b7169203331-01"})
+
+    (span,) = spans.get_finished_spans()
+    assert span.name == "GET /mcp/{service_id}"
+    assert span.kind == SpanKind.SERVER
+    assert trace.format_trace_id(span.context.trace_id) == trace_id
+    assert span.attributes["http.response.status_code"] == 200
+    assert trace.get_current_span(seen["context"]).get_span_context().span_id == span.context.span_id
+
+
+def test_health_checks_are_not_traced(spans):
+    app = Starlette(routes=[Route("/health", lambda request: PlainTextResponse("ok"))])
+    app.add_middleware(TracingMiddleware)
+
+    TestClient(app).get("/health")
+
+    assert spans.get_finished_spans() == ()
+
+
+def test_message_headers_carry_the_trace_to_the_consumer(spans):
+    with tracing.tracer.start_as_current_span("publish") as publish:
+        headers = inject_headers({"message_id": "m1"})
+
+    assert headers["message_id"] == "m1"
+    with tracing.tracer.start_as_current_span("consume", context=extract_context(headers)) as consume:
+        assert tracing.current_trace_id() == trace.format_trace_id(publish.get_span_context().trace_id)
+
+    assert consume.parent.span_id == publish.get_span_context().span_id
+
+
+def test_traced_wraps_sync_and_async_functions(spans):
+    @traced("sync_work")
+    def sync_work(value):
+        return value * 2
+
+    @traced("async_work")
+    async def async_work(value):
+        return value + 1
+
+    assert sync_work(2) == 4
+    assert asyncio.run(async_work(2)) == 3
+    assert [span.name for span in spans.get_finished_spans()] == ["sync_work", "async_work"]
+    assert tracing.current_trace_id() is None
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+
+from services.api_service.utils import upstream_auth as upstream_auth_module
+from services.api_service.utils.http_client import HttpRequestBuilder
+from services.api_service.utils.upstream_auth import UpstreamAuthManager, UpstreamToken
+from services.common.redis import redis_client
+
+CONFIG = {"type": "oauth2_client_credentials", "token_url": "https://auth.example/token", "client_id": "c", "client_secret": "s"}
+
+
+def token(lifetime: float, remaining: float, access_token: str = "t1") -> UpstreamToken:
+    now = time.time()
+    return UpstreamToken(access_token, "Bearer", now + remaining, issued_at=now + remaining - lifetime)
+
+
+def test_refresh_window_is_capped_at_half_the_lifetime():
+    manager = UpstreamAuthManager()
+    manager.refresh_before_seconds = 300
+
+    assert manager._refresh_window(CONFIG, token(lifetime=3600, remaining=3600)) == 300
+    assert manager._refresh_window(CONFIG, token(lifetime=120, remaining=120)) == 60
+    # Tokens cached without issue time keep the configured window
+    assert manager._refresh_window(CONFIG, UpstreamToken("t", "Bearer", time.time() + 120)) == 300
+
+
+def test_short_lived_token_is_not_refreshed_on_every_call(monkeypatch):
+    manager = UpstreamAuthManager()
+    manager.refresh_before_seconds = 300
+    refreshed = []
+    monkeypatch.setattr(manager, "_refresh", lambda key, config, current: refreshed.append(current))
+    manager._tokens["k"] = token(lifetime=120, remaining=100)
+
+    assert asyncio.run(manager._get_token("k", CONFIG)).access_token == "t1"
+    assert refreshed == []
+
+    manager._tokens["k"] = token(lifetime=120, remaining=50)
+    asyncio.run(manager._get_token("k", CONFIG))
+    assert len(refreshed) == 1
+
+
+def test_refresh_keeps_a_lock_taken_over_by_another_worker(monkeypatch):
+    manager = UpstreamAuthManager()
+
+    async def request_token(config, params):
+        # Our lock expired during a slow token request and another worker took it
+        redis_client.client.set("k:lock", "other-worker", ex=30)
+        return token(lifetime=3600, remaining=3600, access_token="t2")
+
+    monkeypatch.setattr(manager, "_request_token", request_token)
+
+    assert asyncio.run(manager._do_refresh("k", CONFIG, None)).access_token == "t2"
+    assert redis_client.client.get("k:lock") == "other-worker"
+
+
+def test_refresh_releases_its_own_lock(monkeypatch):
+    manager = UpstreamAuthManager()
+
+    async def request_token(config, params):
+        return token(lifetime=3600, remaining=3600, access_token="t2")
+
+    monkeypatch.setattr(manager, "_request_token", request_token)
+
+    asyncio.run(manager._do_refresh("k", CONFIG, None))
+    assert redis_client.client.get("k:lock") is None
+    assert upstream_auth_module.UpstreamAuthManager._load_shared("k").access_token == "t2"
+
+
+def test_request_headers_log_masks_credentials(caplog, monkeypatch):
+    builder = HttpRequestBuilder()
+    logger = logging.getLogger("services.api_service.utils.http_client")
+    monkeypatch.setattr(logger, "propagate", True)
+
+    with caplog.at_level(logging.DEBUG, logger=logger.name):
+        headers = builder._build_headers(None, {}, {"X-Api-Key": "service-secret"}, {"Authorization": "Bearer upstream-secret"})
+
+    assert headers["Authorization"] == "Bearer upstream-secret"
+    assert "upstream-secret" not in caplog.text
+    assert "service-secret" not in caplog.text
+    assert "MCP Tool Server (XPack)" in caplog.text
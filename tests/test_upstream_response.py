@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services.api_service.utils import upstream_response
+from services.api_service.utils.upstream_response import (
+    ResponseTooLargeError,
+    count_words,
+    decode_text,
+    loads,
+    read_bounded,
+)
+
+
+class ChunkStream(httpx.AsyncByteStream):
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+
+def response(chunks, headers=None) -> httpx.Response:
+    return httpx.Response(200, headers=headers, stream=ChunkStream(chunks))
+
+
+def test_body_within_limit_is_read():
+    assert asyncio.run(read_bounded(response([b"ab", b"cd"]), 4)) == b"abcd"
+    assert asyncio.run(read_bounded(response([b"x" * 100]), 0)) == b"x" * 100
+
+
+def test_oversized_body_fails_without_reading_the_rest():
+    stream_response = response([b"x" * 10] * 100)
+
+    with pytest.raises(ResponseTooLargeError):
+        asyncio.run(read_bounded(stream_response, 25))
+
+    assert stream_response.stream.sent == 3
+
+
+def test_oversized_content_length_fails_before_reading():
+    stream_response = response([b"x" * 10], headers={"content-length": "1000"})
+
+    with pytest.raises(ResponseTooLargeError) as error:
+        asyncio.run(read_bounded(stream_response, 100))
+
+    assert error.value.max_bytes == 100
+    assert stream_response.stream.sent == 0
+
+
+def test_body_is_decoded_with_the_response_charset():
+    body = "café".encode("latin-1")
+
+    assert decode_text(httpx.Response(200, headers={"content-type": "text/plain; charset=latin-1"}), body) == "café"
+    # UTF-8 by default, invalid bytes replaced
+    assert decode_text(httpx.Response(200), "café".encode() + b"\xff") == "café�"
+
+
+def test_loads_accepts_what_json_accepts():
+    assert loads('{"a": [1, 2.5, null]}') == {"a": [1, 2.5, None]}
+    assert loads(str(2 ** 70)) == 2 ** 70
+
+
+def test_count_words_matches_split_across_chunks(monkeypatch):
+    monkeypatch.setattr(upstream_response, "_WORD_COUNT_CHUNK", 4)
+    for text in ("one two three", "  spaced   out  ", "abcdefgh ij", "a b c d e f g h", ""):
+        assert count_words(text) == len(text.split())